@@ -0,0 +1,158 @@
+"""
+Índice de eventos detectados durante la misión
+
+Se construye una sola vez al cargar la misión: un diccionario por id y dos
+listas ordenadas (por timestamp y por posición en el túnel) sobre las que
+las consultas por ventana se resuelven con bisect en O(log n + k).
+
+Para el panel de filtros se precalculan bitsets empaquetados por tipo y por
+severidad, y un índice invertido de términos de `title`/`description`; una
+combinación de filtros se resuelve con AND bit a bit.
+"""
+
+import re
+import unicodedata
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+
+import numpy as np
+
+
+TOKEN_PATTERN = re.compile(r'\w+')
+
+
+@lru_cache(maxsize=65536)
+def normalize_term(term):
+    """Término en minúsculas y sin tildes"""
+    decomposed = unicodedata.normalize('NFKD', term.lower())
+    return ''.join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def tokenize(text):
+    """Términos normalizados de un texto"""
+    return [normalize_term(token) for token in TOKEN_PATTERN.findall(str(text))]
+
+
+class SortedKeyIndex:
+    """Eventos ordenados por una clave numérica para consultas por rango"""
+
+    def __init__(self, events, key):
+        order = sorted(range(len(events)), key=lambda i: (events[i][key], i))
+        self._keys = [events[i][key] for i in order]
+        self._events = [events[i] for i in order]
+
+    def between(self, low, high):
+        """Eventos con low <= clave <= high, en orden de clave"""
+        start = bisect_left(self._keys, low)
+        end = bisect_right(self._keys, high)
+        return self._events[start:end]
+
+    def around(self, center, radius):
+        """Eventos a no más de `radius` de `center`"""
+        return self.between(center - radius, center + radius)
+
+
+class EventBitsets:
+    """Bitsets empaquetados (uint8) sobre las posiciones de la lista de eventos"""
+
+    def __init__(self, size):
+        self.size = size
+        self.all = np.packbits(np.ones(size, dtype=bool))
+        self.none = np.zeros_like(self.all)
+
+    def from_indices(self, indices):
+        """Bitset con los bits de `indices` activos"""
+        mask = np.zeros(self.size, dtype=bool)
+        mask[np.asarray(indices, dtype=np.int64)] = True
+        return np.packbits(mask)
+
+    def group_by(self, events, key):
+        """Un bitset por cada valor distinto de `key`"""
+        groups = {}
+        for i, event in enumerate(events):
+            groups.setdefault(event.get(key), []).append(i)
+        return {value: self.from_indices(indices) for value, indices in groups.items()}
+
+    def indices(self, bits):
+        """Posiciones activas de un bitset, en orden"""
+        return np.flatnonzero(np.unpackbits(bits, count=self.size))
+
+
+class TextIndex:
+    """Índice invertido término -> índices ordenados de eventos"""
+
+    def __init__(self, events, bitsets, fields=('title', 'description')):
+        self._bitsets = bitsets
+        postings = {}
+        for i, event in enumerate(events):
+            terms = set()
+            for field in fields:
+                terms.update(tokenize(event.get(field, '')))
+            for term in terms:
+                postings.setdefault(term, []).append(i)
+        self._postings = {term: np.array(indices, dtype=np.int64)
+                          for term, indices in postings.items()}
+        self._vocabulary = sorted(self._postings)
+
+    def _prefix_indices(self, prefix):
+        """Eventos con algún término que comienza con `prefix`"""
+        start = bisect_left(self._vocabulary, prefix)
+        matches = []
+        for token in self._vocabulary[start:]:
+            if not token.startswith(prefix):
+                break
+            matches.append(self._postings[token])
+        return np.concatenate(matches) if matches else np.zeros(0, dtype=np.int64)
+
+    def search(self, query):
+        """Bitset de eventos que contienen todos los términos de `query`
+
+        El último término se trata como prefijo, para filtrar mientras se
+        escribe.
+        """
+        terms = tokenize(query)
+        bits = self._bitsets.all
+        for i, term in enumerate(terms):
+            if i == len(terms) - 1:
+                indices = self._prefix_indices(term)
+            else:
+                indices = self._postings.get(term, np.zeros(0, dtype=np.int64))
+            bits = bits & self._bitsets.from_indices(indices)
+        return bits
+
+
+class EventIndex:
+    """Búsquedas de eventos por id, tiempo, posición y filtros"""
+
+    def __init__(self, events):
+        self.events = events
+        self._by_id = {event['id']: event for event in events}
+        self.by_time = SortedKeyIndex(events, 'timestamp')
+        self.by_position = SortedKeyIndex(events, 'position')
+
+        self._bitsets = EventBitsets(len(events))
+        self._by_type = self._bitsets.group_by(events, 'type')
+        self._by_severity = self._bitsets.group_by(events, 'severity')
+        self._text = TextIndex(events, self._bitsets)
+
+    def __len__(self):
+        return len(self.events)
+
+    def get(self, event_id):
+        """Evento con el id dado, o None"""
+        return self._by_id.get(event_id)
+
+    def filter_indices(self, event_type="all", severity="all", text=""):
+        """Posiciones de los eventos que cumplen los filtros, en orden"""
+        bits = self._bitsets.all
+        if event_type != "all":
+            bits = bits & self._by_type.get(event_type, self._bitsets.none)
+        if severity != "all":
+            bits = bits & self._by_severity.get(severity, self._bitsets.none)
+        if text.strip():
+            bits = bits & self._text.search(text)
+        return self._bitsets.indices(bits).tolist()
+
+    def filter(self, event_type="all", severity="all", text=""):
+        """Eventos que cumplen los filtros, en el orden original"""
+        return [self.events[i] for i in self.filter_indices(event_type, severity, text)]
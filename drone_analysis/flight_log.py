@@ -0,0 +1,213 @@
+"""
+Lectura de registros del registrador de vuelo (.fdr)
+
+La Interfaz 2 (teleoperación) graba cada frame de telemetría, los comandos
+del operador y los eventos marcados en segmentos .fdr (formato documentado
+en drone_teleoperation/recorder.py). Este módulo reúne los segmentos de una
+grabación y los convierte al almacén columnar de la Interfaz 3:
+
+    timestamp        s desde el primer frame
+    position         recorrido horizontal acumulado (m)
+    height           z
+    speed            |v|
+    slam_quality     confianza SLAM
+    signal_strength  % del enlace convertido a dBm aproximados (-100 + %/2)
+    temperature      temperatura del controlador
+    gases, batería   directos
+
+Los eventos marcados y las acciones de emergencia del operador se
+convierten en eventos de misión con la posición del instante en que
+ocurrieron.
+"""
+
+import json
+import re
+import struct
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+
+from telemetry import TelemetryStore
+
+
+FDR_MAGIC = b'UAVFDR\x00\x00'
+FDR_VERSION = 1
+FILE_HEADER = struct.Struct('<8sHHI')
+RECORD_HEADER = struct.Struct('<BxHd')
+
+REC_TELEMETRY = 1
+REC_MOVE = 2
+REC_COMMAND = 3
+REC_EVENT = 4
+
+# Cabecera del frame de estado del protocolo de teleoperación
+FRAME_HEADER_FIELDS = [('magic', 'S2'), ('version', 'u1'), ('flags', 'u1'),
+                       ('seq', '<u4'), ('timestamp', '<f8')]
+
+MONTHS = ('Enero', 'Febrero', 'Marzo', 'Abril', 'Mayo', 'Junio', 'Julio',
+          'Agosto', 'Septiembre', 'Octubre', 'Noviembre', 'Diciembre')
+
+# Tipo de evento marcado -> (tipo de evento de misión, título)
+MARKED_EVENTS = {
+    'gas': ('gas', 'Gas marcado por el operador'),
+    'crack': ('crack', 'Grieta marcada por el operador'),
+    'obstacle': ('obstacle', 'Obstáculo marcado por el operador'),
+}
+
+# Acciones de emergencia -> (severidad, título)
+OPERATOR_ACTIONS = {
+    'emergencyStop': ('critical', 'Parada de emergencia (E-STOP)'),
+    'returnToHome': ('warning', 'Retorno al inicio (RTH)'),
+    'hover': ('info', 'Hover de emergencia'),
+    'safeMode': ('warning', 'Modo seguro activado'),
+}
+
+
+class FlightLogError(ValueError):
+    """Registro de vuelo inválido o incompatible"""
+
+
+def is_flight_log(path):
+    return Path(path).suffix.lower() == '.fdr'
+
+
+def recording_segments(path):
+    """Segmentos de la grabación a la que pertenece `path`, en orden"""
+    path = Path(path)
+    match = re.fullmatch(r'(.+)_(\d{3})\.fdr', path.name)
+    if match is None:
+        return [path]
+    return sorted(path.parent.glob(f"{match.group(1)}_[0-9][0-9][0-9].fdr"))
+
+
+def _read_segment(path):
+    """Metadatos, frames crudos (bytes concatenados), tiempos y otros registros"""
+    data = Path(path).read_bytes()
+    if len(data) < FILE_HEADER.size:
+        raise FlightLogError(f"{path}: archivo demasiado corto")
+    magic, version, frame_size, meta_length = FILE_HEADER.unpack_from(data)
+    if magic != FDR_MAGIC:
+        raise FlightLogError(f"{path}: no es un registro de vuelo")
+    if version != FDR_VERSION:
+        raise FlightLogError(f"{path}: versión {version} no soportada")
+    pos = FILE_HEADER.size + meta_length
+    meta = json.loads(data[FILE_HEADER.size:pos].decode('utf-8'))
+
+    view = memoryview(data)
+    frames, times, records = [], [], []
+    unpack = RECORD_HEADER.unpack_from
+    end = len(data)
+    while pos + RECORD_HEADER.size <= end:
+        kind, length, t = unpack(data, pos)
+        body = pos + RECORD_HEADER.size
+        if body + length > end:
+            break  # último registro incompleto (grabación interrumpida)
+        if kind == REC_TELEMETRY:
+            if length == frame_size:
+                frames.append(view[body:body + length])
+                times.append(t)
+        elif kind in (REC_COMMAND, REC_EVENT):
+            records.append((kind, t, json.loads(bytes(view[body:body + length]).decode('utf-8'))))
+        pos = body + length
+    return meta, frame_size, b''.join(frames), times, records
+
+
+def _event(number, event_type, subtype, t, position, severity, title, description,
+           value=None, unit='', recommendation=''):
+    return {
+        'id': f'EVT-{number:03d}',
+        'type': event_type,
+        'subtype': subtype,
+        'timestamp': round(t, 1),
+        'position': round(position, 1),
+        'severity': severity,
+        'title': title,
+        'description': description,
+        'value': value,
+        'unit': unit,
+        'recommendation': recommendation,
+    }
+
+
+def read_flight_log(path):
+    """Abre una grabación .fdr; devuelve (info, TelemetryStore, eventos, frecuencia)"""
+    segments = recording_segments(path)
+    if not segments:
+        raise FlightLogError(f"{path}: no se encontraron segmentos")
+    meta = None
+    chunks, times, records = [], [], []
+    frame_size = None
+    for segment in segments:
+        segment_meta, segment_frame_size, raw, segment_times, segment_records = _read_segment(segment)
+        if meta is None:
+            meta, frame_size = segment_meta, segment_frame_size
+        elif segment_frame_size != frame_size or segment_meta.get('fields') != meta.get('fields'):
+            raise FlightLogError(f"{segment}: formato de frame distinto al de la grabación")
+        chunks.append(raw)
+        times.extend(segment_times)
+        records.extend(segment_records)
+    if not times:
+        raise FlightLogError(f"{path}: la grabación no contiene telemetría")
+
+    fields = meta['fields']
+    dtype = np.dtype(FRAME_HEADER_FIELDS + [(name, '<f4') for name in fields])
+    if dtype.itemsize != frame_size:
+        raise FlightLogError(f"{path}: tamaño de frame {frame_size} no coincide con los campos")
+    frames = np.frombuffer(b''.join(chunks), dtype=dtype)
+    t = np.asarray(times, dtype=np.float64)
+    t0 = t[0]
+    t -= t0
+
+    n = len(frames)
+    store = TelemetryStore.allocate(n)
+    store.column('timestamp')[:] = t
+    step = np.hypot(np.diff(frames['x'], prepend=frames['x'][0]),
+                    np.diff(frames['y'], prepend=frames['y'][0]))
+    store.column('position')[:] = np.cumsum(step)
+    store.column('height')[:] = frames['z']
+    store.column('speed')[:] = np.sqrt(frames['vx'] ** 2 + frames['vy'] ** 2 + frames['vz'] ** 2)
+    for channel in ('ch4', 'co', 'o2', 'h2s', 'battery'):
+        store.column(channel)[:] = frames[channel]
+    store.column('slam_quality')[:] = frames['slam_confidence']
+    store.column('signal_strength')[:] = np.round(-100 + frames['signal_strength'] / 2)
+    store.column('temperature')[:] = frames['temp_controller']
+
+    # Eventos marcados y acciones de emergencia
+    events = []
+    position = store.column('position')
+    for kind, record_t, payload in records:
+        rel = max(0.0, record_t - t0)
+        at = float(position[store.index_at(rel)])
+        if kind == REC_EVENT and payload.get('type') in MARKED_EVENTS:
+            event_type, title = MARKED_EVENTS[payload['type']]
+            gases = payload.get('gases', {})
+            description = (f"CH4 {gases.get('ch4', 0):.2f}% · CO {gases.get('co', 0):.1f} ppm · "
+                           f"O2 {gases.get('o2', 0):.1f}% ({payload.get('frame', '')})")
+            value, unit = (round(gases['ch4'], 2), '%') if event_type == 'gas' and 'ch4' in gases else (None, '')
+            events.append(_event(len(events) + 1, event_type, 'operator_mark', rel, at, 'warning',
+                                 title, description, value, unit, 'Revisar hallazgo marcado durante el vuelo'))
+        elif kind == REC_COMMAND and payload.get('name') in OPERATOR_ACTIONS:
+            severity, title = OPERATOR_ACTIONS[payload['name']]
+            events.append(_event(len(events) + 1, 'anomaly', 'operator_action', rel, at, severity,
+                                 title, 'Acción de emergencia ejecutada por el operador',
+                                 recommendation='Revisar las condiciones previas a la acción'))
+
+    duration = float(t[-1])
+    started = datetime.fromtimestamp(meta.get('started', 0))
+    ended = started + timedelta(seconds=duration)
+    info = {
+        'mission_id': meta.get('recording', Path(path).stem),
+        'date': f"{started.day} {MONTHS[started.month - 1]} {started.year}",
+        'start_time': started.strftime("%H:%M:%S"),
+        'end_time': ended.strftime("%H:%M:%S"),
+        'duration': f"{int(duration) // 60:02d}:{int(duration) % 60:02d}",
+        'total_time': int(round(duration)),
+        'distance': round(float(position[-1]), 1),
+        'max_depth': meta.get('max_depth', 0),
+        'sector': meta.get('sector', "Sin registrar"),
+        'operator': meta.get('operator', "Sin registrar"),
+        'drone_id': meta.get('drone_id', "Sin registrar"),
+    }
+    sample_rate = (n - 1) / duration if duration > 0 else 1.0
+    return info, store, events, sample_rate
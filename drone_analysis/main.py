@@ -9,92 +9,140 @@ Tesis: DISEÑO DE UN SISTEMA AUTÓNOMO DE INSPECCIÓN CON UN DRON AÉREO
 
 import sys
 import os
-import random
+import argparse
 from pathlib import Path
 from datetime import datetime
 
+import numpy as np
 from PyQt6.QtWidgets import QApplication
 from PyQt6.QtQml import QQmlApplicationEngine
-from PyQt6.QtCore import QObject, pyqtSignal, pyqtSlot, pyqtProperty, QUrl, QTimer
+from PyQt6.QtGui import QGuiApplication
+from PyQt6.QtCore import QObject, pyqtSignal, pyqtSlot, pyqtProperty, QUrl, QTimer, Qt
+
+from telemetry import CHANNEL_NAMES, TelemetryStore, present
+from flight_log import is_flight_log, read_flight_log
+from mission_log import read_mission_log, write_mission_log
+from pyramid import TelemetryPyramid
+from events import EventIndex
+from stats import TelemetryStatsAccumulator
+from models import EventListModel, TelemetryListModel
+from playback import DEFAULT_REFRESH_RATE, PLAYBACK_SPEEDS, PlaybackClock
+from sparklines import SparklineWindows
+
+
+# Información de la misión simulada por defecto
+SIMULATED_MISSION_INFO = {
+    'mission_id': "MSN-2026-0142",
+    'date': "31 Enero 2026",
+    'start_time': "09:15:32",
+    'end_time': "09:28:17",
+    'duration': "12:45",
+    'total_time': 765,  # segundos (12:45)
+    'distance': 342,  # metros
+    'max_depth': 245,  # metros bajo tierra
+    'sector': "Sector A - Nivel -240m",
+    'operator': "Juan Pérez",
+    'drone_id': "UAV-MINE-007",
+}
 
 
 class MissionData:
-    """Datos simulados de una misión completada"""
-    
-    def __init__(self):
-        self.mission_id = "MSN-2026-0142"
-        self.date = "31 Enero 2026"
-        self.start_time = "09:15:32"
-        self.end_time = "09:28:17"
-        self.duration = "12:45"
-        self.distance = 342  # metros
-        self.max_depth = 245  # metros bajo tierra
-        self.sector = "Sector A - Nivel -240m"
-        self.operator = "Juan Pérez"
-        self.drone_id = "UAV-MINE-007"
+    """Datos de una misión completada (simulada o cargada desde registro)"""
+    
+    def __init__(self, info=None, telemetry=None, events=None, sample_rate=1.0, source_path=None):
+        info = dict(SIMULATED_MISSION_INFO, **(info or {}))
+        self.mission_id = info['mission_id']
+        self.date = info['date']
+        self.start_time = info['start_time']
+        self.end_time = info['end_time']
+        self.duration = info['duration']
+        self.total_time = int(info['total_time'])
+        self.distance = info['distance']
+        self.max_depth = info['max_depth']
+        self.sector = info['sector']
+        self.operator = info['operator']
+        self.drone_id = info['drone_id']
+        self.sample_rate = sample_rate
         
-        # Generar datos de telemetría simulados
-        self.telemetry = self._generate_telemetry()
+        # Telemetría (almacén columnar); si no se entrega se simula
+        self.telemetry = telemetry if telemetry is not None else self._generate_telemetry()
+        
+        # Pirámide mín/máx/media para vistas generales y estadísticas de la
+        # telemetría, persistidas juntas: al reabrir no se recorre el registro
+        if source_path is not None:
+            self.pyramid = TelemetryPyramid.for_mission_file(self.telemetry, source_path,
+                                                             self._telemetry_stats)
+            telemetry_stats = self.pyramid.summary
+        else:
+            self.pyramid = TelemetryPyramid.build(self.telemetry)
+            telemetry_stats = self._telemetry_stats()
         
-        # Generar eventos detectados
-        self.events = self._generate_events()
+        # Eventos detectados e índice por id/tiempo/posición
+        self.events = events if events is not None else self._generate_events()
+        self.event_index = EventIndex(self.events)
         
         # Estadísticas de la misión
-        self.stats = self._calculate_stats()
+        self.stats = self._calculate_stats(telemetry_stats)
+    
+    @classmethod
+    def load(cls, path):
+        """Abre un registro de misión (.uavlog, proyectado en memoria) o de vuelo (.fdr)"""
+        reader = read_flight_log if is_flight_log(path) else read_mission_log
+        info, telemetry, events, sample_rate = reader(path)
+        return cls(info, telemetry, events, sample_rate, source_path=path)
+    
+    def save(self, path):
+        """Guarda la misión en formato .uavlog"""
+        write_mission_log(path, self.info, self.telemetry, self.events, self.sample_rate)
+    
+    @property
+    def info(self):
+        """Información de la misión en el formato del registro"""
+        return {key: getattr(self, key) for key in SIMULATED_MISSION_INFO}
     
     def _generate_telemetry(self):
         """Genera datos de telemetría simulados"""
-        data = []
-        num_points = 765  # ~12:45 minutos a 1Hz
+        duration = self.total_time  # ~12:45 minutos
+        num_points = int(duration * self.sample_rate)
+        store = TelemetryStore.allocate(num_points)
+        rng = np.random.default_rng()
+        t = np.arange(num_points) / self.sample_rate
+        
+        store.column('timestamp')[:] = t  # segundos desde inicio
         
-        for i in range(num_points):
-            timestamp = i  # segundos desde inicio
-            
-            # Posición simulada (avance lineal con variaciones)
-            position = (i / num_points) * 342  # metros
-            
-            # Gases simulados con picos
-            ch4_base = 0.3 + random.uniform(-0.1, 0.1)
-            co_base = 5 + random.uniform(-2, 2)
-            o2_base = 20.8 + random.uniform(-0.2, 0.2)
-            h2s_base = 0.5 + random.uniform(-0.2, 0.2) 
-            # Añadir picos de gas en ciertos momentos
-            if 180 <= i <= 220:  # Pico de CH4
-                ch4_base += 1.2 * (1 - abs(i - 200) / 20)
-            if 450 <= i <= 480:  # Pico de CO
-                co_base += 15 * (1 - abs(i - 465) / 15)
-            
-            # Altura y velocidad
-            height = 2.5 + random.uniform(-0.3, 0.3)
-            speed = 0.45 + random.uniform(-0.1, 0.1)
-            
-            # Batería (decremento gradual)
-            battery = 87 - (i / num_points) * 19
-            
-            # Calidad SLAM
-            slam_quality = 92 + random.uniform(-5, 3)
-            
-            # Temperatura
-            temperature = 24 + random.uniform(-1, 1)
-            if 630 <= i <= 670:  # Anomalía térmica
-                temperature += 8 * (1 - abs(i - 650) / 20)
-            
-            data.append({
-                'timestamp': timestamp,
-                'position': round(position, 1),
-                'ch4': round(max(0, ch4_base), 2),
-                'co': round(max(0, co_base), 1),
-                'o2': round(o2_base, 1),
-                'h2s': round(max(0, h2s_base), 2),
-                'height': round(height, 2),
-                'speed': round(speed, 2),
-                'battery': round(battery, 1),
-                'slam_quality': round(min(100, max(0, slam_quality)), 0),
-                'signal_strength': -55 + random.randint(-10, 5),
-                'temperature': round(temperature, 1)
-            })
+        # Posición simulada (avance lineal con variaciones)
+        store.column('position')[:] = (t / duration) * self.distance  # metros
         
-        return data
+        # Gases simulados con picos
+        ch4 = 0.3 + rng.uniform(-0.1, 0.1, num_points)
+        co = 5 + rng.uniform(-2, 2, num_points)
+        o2 = 20.8 + rng.uniform(-0.2, 0.2, num_points)
+        h2s = 0.5 + rng.uniform(-0.2, 0.2, num_points)
+        # Añadir picos de gas en ciertos momentos
+        ch4 += np.where((t >= 180) & (t <= 220), 1.2 * (1 - np.abs(t - 200) / 20), 0)  # Pico de CH4
+        co += np.where((t >= 450) & (t <= 480), 15 * (1 - np.abs(t - 465) / 15), 0)  # Pico de CO
+        store.column('ch4')[:] = np.maximum(0, ch4)
+        store.column('co')[:] = np.maximum(0, co)
+        store.column('o2')[:] = o2
+        store.column('h2s')[:] = np.maximum(0, h2s)
+        
+        # Altura y velocidad
+        store.column('height')[:] = 2.5 + rng.uniform(-0.3, 0.3, num_points)
+        store.column('speed')[:] = 0.45 + rng.uniform(-0.1, 0.1, num_points)
+        
+        # Batería (decremento gradual)
+        store.column('battery')[:] = 87 - (t / duration) * 19
+        
+        # Calidad SLAM
+        store.column('slam_quality')[:] = np.clip(np.round(92 + rng.uniform(-5, 3, num_points)), 0, 100)
+        store.column('signal_strength')[:] = -55 + rng.integers(-10, 6, num_points)
+        
+        # Temperatura
+        temperature = 24 + rng.uniform(-1, 1, num_points)
+        temperature += np.where((t >= 630) & (t <= 670), 8 * (1 - np.abs(t - 650) / 20), 0)  # Anomalía térmica
+        store.column('temperature')[:] = temperature
+        
+        return store
     
     def _generate_events(self):
         """Genera eventos detectados durante la misión"""
@@ -210,19 +258,11 @@ class MissionData:
         ]
         return events
     
-    def _calculate_stats(self):
-        """Calcula estadísticas de la misión"""
+    def _calculate_stats(self, telemetry_stats):
+        """Estadísticas de la misión: conteos de eventos más las de la telemetría"""
         gas_events = [e for e in self.events if e['type'] == 'gas']
         crack_events = [e for e in self.events if e['type'] == 'crack']
         
-        # Calcular promedios de telemetría
-        avg_ch4 = sum(t['ch4'] for t in self.telemetry) / len(self.telemetry)
-        avg_co = sum(t['co'] for t in self.telemetry) / len(self.telemetry)
-        max_ch4 = max(t['ch4'] for t in self.telemetry)
-        max_co = max(t['co'] for t in self.telemetry)
-        avg_o2 = sum(t['o2'] for t in self.telemetry) / len(self.telemetry)
-        min_o2 = min(t['o2'] for t in self.telemetry)
-        
         return {
             'total_events': len(self.events),
             'gas_events': len(gas_events),
@@ -232,18 +272,45 @@ class MissionData:
             'critical_events': len([e for e in self.events if e['severity'] == 'critical']),
             'warning_events': len([e for e in self.events if e['severity'] == 'warning']),
             'low_events': len([e for e in self.events if e['severity'] == 'low']),
-            'avg_ch4': round(avg_ch4, 2),
-            'avg_co': round(avg_co, 1),
-            'avg_o2': round(avg_o2, 1),
-            'max_ch4': round(max_ch4, 2),
-            'max_co': round(max_co, 1),
-            'min_o2': round(min_o2, 1),
-            'avg_speed': 0.45,
-            'coverage_percent': 98.5,
-            'data_quality': 96.2,
-            'slam_avg_quality': 91.4,
-            'battery_start': 87,
-            'battery_end': 68
+            **telemetry_stats,
+        }
+    
+    def _telemetry_stats(self):
+        """Estadísticas de la telemetría (una pasada por bloques; serializables a JSON)"""
+        telemetry = TelemetryStatsAccumulator.from_store(self.telemetry)
+        ch4 = telemetry['ch4']
+        co = telemetry['co']
+        o2 = telemetry['o2']
+        position = telemetry['position']
+        battery = telemetry['battery']
+        
+        # Cobertura: tramo recorrido respecto de la distancia de la misión
+        covered = position.max - position.min if position.count else 0
+        coverage = min(100.0, 100.0 * covered / self.distance) if self.distance else 0.0
+        
+        # Calidad de datos: muestras completas respecto de las esperadas
+        expected = 0
+        if telemetry.samples:
+            span = telemetry.last_timestamp - telemetry.first_timestamp
+            expected = max(telemetry.samples, round(span * self.sample_rate) + 1)
+        data_quality = 100.0 * telemetry.complete_samples / expected if expected else 0.0
+        
+        return {
+            'avg_ch4': round(ch4.mean, 2),
+            'avg_co': round(co.mean, 1),
+            'avg_o2': round(o2.mean, 1),
+            'max_ch4': round(ch4.max, 2) if ch4.count else 0,
+            'max_co': round(co.max, 1) if co.count else 0,
+            'min_o2': round(o2.min, 1) if o2.count else 0,
+            'p95_ch4': round(ch4.sketch.quantile(0.95) or 0, 2),
+            'p95_co': round(co.sketch.quantile(0.95) or 0, 1),
+            'avg_speed': round(telemetry['speed'].mean, 2),
+            'coverage_percent': round(coverage, 1),
+            'data_quality': round(data_quality, 1),
+            'slam_avg_quality': round(telemetry['slam_quality'].mean, 1),
+            'battery_start': round(battery.first) if battery.count else 0,
+            'battery_end': round(battery.last) if battery.count else 0,
+            'channels': {name: stats.summary() for name, stats in telemetry.channels.items()}
         }
 
 
@@ -257,18 +324,26 @@ class AnalysisController(QObject):
     layerVisibilityChanged = pyqtSignal()
     playbackSpeedChanged = pyqtSignal()
     filterChanged = pyqtSignal()
+    sparklinesChanged = pyqtSignal()
     
-    def __init__(self):
+    def __init__(self, mission=None):
         super().__init__()
         
-        # Cargar datos de misión simulados
-        self._mission = MissionData()
+        # Misión cargada desde registro o, por defecto, simulada
+        self._mission = mission if mission is not None else MissionData()
         
         # Estado de la timeline
-        self._current_time = 0  # segundos
-        self._total_time = 765  # segundos (12:45)
+        self._current_time = 0.0  # segundos (resolución sub-segundo)
+        self._total_time = self._mission.total_time
         self._is_playing = False
-        self._playback_speed = 1  # 1x, 2x, 5x, 10x
+        self._playback_speed = 1  # ver PLAYBACK_SPEEDS
+        self._playback_reverse = False
+        self._clock = PlaybackClock(self._total_time)
+        
+        # Muestra actual, calculada una vez por índice y reutilizada por los bindings
+        self._current_index = None
+        self._current_row = {}
+        self._sparklines = SparklineWindows(self._mission.telemetry)
         
         # Evento seleccionado
         self._selected_event_id = ""
@@ -285,16 +360,28 @@ class AnalysisController(QObject):
         # Filtros activos
         self._severity_filter = "all"  # 'all', 'critical', 'warning', 'low', 'info'
         self._type_filter = "all"  # 'all', 'gas', 'crack', 'obstacle', 'anomaly'
+        self._search_text = ""
+        self._filtered_events = None  # caché, se invalida al cambiar filtros
         
-        # Timer para reproducción
-        self._play_timer = QTimer()
-        self._play_timer.timeout.connect(self._on_play_tick)
-        self._update_timer_interval()
-    
-    def _update_timer_interval(self):
-        """Actualiza el intervalo del timer según la velocidad"""
-        base_interval = 1000  # 1 segundo real = 1 segundo simulado a 1x
-        self._play_timer.setInterval(int(base_interval / self._playback_speed))
+        # Modelos de lista para QML
+        self._events_model = EventListModel(self._mission.events, self)
+        self._filtered_events_model = EventListModel(self._mission.events, self)
+        self._telemetry_model = TelemetryListModel(self._mission.telemetry, self)
+        
+        # Timer de frames: avanza el reloj y agrupa las notificaciones a QML
+        # a la frecuencia de refresco de la pantalla
+        self._position_dirty = False
+        self._frame_timer = QTimer()
+        self._frame_timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self._frame_timer.setInterval(max(1, round(1000 / self._display_refresh_rate())))
+        self._frame_timer.timeout.connect(self._on_frame)
+    
+    @staticmethod
+    def _display_refresh_rate():
+        """Frecuencia de refresco de la pantalla principal (Hz)"""
+        screen = QGuiApplication.primaryScreen() if QGuiApplication.instance() else None
+        rate = screen.refreshRate() if screen is not None else 0
+        return rate if rate > 0 else DEFAULT_REFRESH_RATE
     
     # ===== PROPIEDADES DE MISIÓN =====
     @pyqtProperty('QVariant', constant=True)
@@ -322,27 +409,66 @@ class AnalysisController(QObject):
     
     @pyqtProperty('QVariant', notify=filterChanged)
     def filteredEvents(self):
-        """Retorna eventos filtrados según los filtros activos"""
-        events = self._mission.events
-        
-        if self._type_filter != "all":
-            events = [e for e in events if e['type'] == self._type_filter]
-        
-        if self._severity_filter != "all":
-            events = [e for e in events if e['severity'] == self._severity_filter]
-        
-        return events
+        """Retorna eventos filtrados según los filtros activos (cacheados)"""
+        if self._filtered_events is None:
+            self._filtered_events = self._mission.event_index.filter(
+                self._type_filter, self._severity_filter, self._search_text)
+        return self._filtered_events
+    
+    def _on_filters_changed(self):
+        """Invalida la caché de filtros, actualiza el modelo y notifica a QML"""
+        self._filtered_events = None
+        self._filtered_events_model.set_rows(self._mission.event_index.filter_indices(
+            self._type_filter, self._severity_filter, self._search_text))
+        self.filterChanged.emit()
+    
+    @pyqtProperty(QObject, constant=True)
+    def eventsModel(self):
+        """Modelo con todos los eventos de la misión"""
+        return self._events_model
+    
+    @pyqtProperty(QObject, constant=True)
+    def filteredEventsModel(self):
+        """Modelo con los eventos que cumplen los filtros activos"""
+        return self._filtered_events_model
+    
+    @pyqtProperty(QObject, constant=True)
+    def telemetryModel(self):
+        """Modelo con todas las muestras de telemetría"""
+        return self._telemetry_model
     
     # ===== PROPIEDADES DE TIMELINE =====
-    @pyqtProperty(int, notify=timelinePositionChanged)
+    @pyqtProperty(float, notify=timelinePositionChanged)
     def currentTime(self):
         return self._current_time
     
     @currentTime.setter
     def currentTime(self, value):
-        if self._current_time != value:
-            self._current_time = max(0, min(value, self._total_time))
+        self._clock.seek(value)
+        self._set_current_time(self._clock.now())
+    
+    def _set_current_time(self, value):
+        """Actualiza el tiempo; la notificación se emite en el próximo frame"""
+        value = max(0.0, min(float(value), self._total_time))
+        if value != self._current_time:
+            self._current_time = value
+            self._position_dirty = True
+            if not self._frame_timer.isActive():
+                self._frame_timer.start()
+    
+    def _on_frame(self):
+        """Un frame de pantalla: avanza el reloj y notifica una sola vez"""
+        if self._is_playing:
+            self._set_current_time(self._clock.now())
+            if self._clock.at_boundary():
+                self.pause()
+        if self._position_dirty:
+            self._position_dirty = False
             self.timelinePositionChanged.emit()
+            if self._sparklines.move_to(self._current_sample_index()):
+                self.sparklinesChanged.emit()
+        elif not self._is_playing:
+            self._frame_timer.stop()
     
     @pyqtProperty(int, constant=True)
     def totalTime(self):
@@ -356,12 +482,32 @@ class AnalysisController(QObject):
     def playbackSpeed(self):
         return self._playback_speed
     
+    @pyqtProperty(bool, notify=playbackSpeedChanged)
+    def playbackReverse(self):
+        return self._playback_reverse
+    
+    @pyqtProperty('QVariant', constant=True)
+    def playbackSpeeds(self):
+        return list(PLAYBACK_SPEEDS)
+    
+    def _current_sample_index(self):
+        """Índice de la muestra vigente en el tiempo actual (-1 si no hay datos)"""
+        return self._mission.telemetry.index_at(self._current_time)
+    
     @pyqtProperty('QVariant', notify=timelinePositionChanged)
     def currentTelemetry(self):
         """Obtiene la telemetría en el tiempo actual"""
-        if 0 <= self._current_time < len(self._mission.telemetry):
-            return self._mission.telemetry[self._current_time]
-        return self._mission.telemetry[0] if self._mission.telemetry else {}
+        index = self._current_sample_index()
+        if index != self._current_index:
+            self._current_index = index
+            self._current_row = self._mission.telemetry.row(index) if index >= 0 else {}
+        return self._current_row
+    
+    @pyqtProperty('QVariant', notify=sparklinesChanged)
+    def sparklineWindows(self):
+        """Últimas 61 muestras de CH4/CO/H2S/O2 como arreglos float32 (QByteArray)"""
+        self._sparklines.move_to(self._current_sample_index())
+        return self._sparklines.published()
     
     @pyqtProperty(float, notify=timelinePositionChanged)
     def currentPosition(self):
@@ -378,9 +524,7 @@ class AnalysisController(QObject):
     def selectedEvent(self):
         """Retorna el evento seleccionado completo"""
         if self._selected_event_id:
-            for event in self._mission.events:
-                if event['id'] == self._selected_event_id:
-                    return event
+            return self._mission.event_index.get(self._selected_event_id)
         return None
     
     # ===== PROPIEDADES DE FILTROS =====
@@ -392,13 +536,17 @@ class AnalysisController(QObject):
     def severityFilter(self):
         return self._severity_filter
     
+    @pyqtProperty(str, notify=filterChanged)
+    def searchText(self):
+        return self._search_text
+    
     # ===== PROPIEDADES DE CAPAS =====
     @pyqtProperty('QVariant', notify=layerVisibilityChanged)
     def layers(self):
         return self._layers
     
     # ===== SLOTS DE TIMELINE =====
-    @pyqtSlot(int)
+    @pyqtSlot(float)
     def seekTo(self, time):
         """Mover la timeline a un tiempo específico"""
         self.currentTime = time
@@ -408,7 +556,9 @@ class AnalysisController(QObject):
         """Iniciar reproducción"""
         if not self._is_playing:
             self._is_playing = True
-            self._play_timer.start()
+            self._clock.seek(self._current_time)
+            self._clock.start()
+            self._frame_timer.start()
             self.timelinePositionChanged.emit()
     
     @pyqtSlot()
@@ -416,7 +566,7 @@ class AnalysisController(QObject):
         """Pausar reproducción"""
         if self._is_playing:
             self._is_playing = False
-            self._play_timer.stop()
+            self._clock.stop()
             self.timelinePositionChanged.emit()
     
     @pyqtSlot()
@@ -447,39 +597,49 @@ class AnalysisController(QObject):
         """Ir al final"""
         self.seekTo(self._total_time)
     
+    def _update_clock_rate(self):
+        """Aplica velocidad y sentido al reloj de reproducción"""
+        direction = -1 if self._playback_reverse else 1
+        self._clock.set_rate(direction * self._playback_speed)
+    
     @pyqtSlot(int)
     def setPlaybackSpeed(self, speed):
         """Cambiar velocidad de reproducción"""
-        if speed in [1, 2, 5, 10]:
+        if speed in PLAYBACK_SPEEDS:
             self._playback_speed = speed
-            self._update_timer_interval()
+            self._update_clock_rate()
             self.playbackSpeedChanged.emit()
     
     @pyqtSlot()
     def cyclePlaybackSpeed(self):
         """Ciclar entre velocidades de reproducción"""
-        speeds = [1, 2, 5, 10]
+        speeds = PLAYBACK_SPEEDS
         current_index = speeds.index(self._playback_speed) if self._playback_speed in speeds else 0
         next_index = (current_index + 1) % len(speeds)
         self.setPlaybackSpeed(speeds[next_index])
     
-    def _on_play_tick(self):
-        """Callback del timer de reproducción"""
-        if self._current_time < self._total_time:
-            self.currentTime = self._current_time + 1
-        else:
-            self.pause()
+    @pyqtSlot(bool)
+    def setPlaybackReverse(self, reverse):
+        """Reproducir hacia atrás (True) o hacia adelante (False)"""
+        if reverse != self._playback_reverse:
+            self._playback_reverse = reverse
+            self._update_clock_rate()
+            self.playbackSpeedChanged.emit()
+    
+    @pyqtSlot()
+    def togglePlaybackReverse(self):
+        """Alternar el sentido de reproducción"""
+        self.setPlaybackReverse(not self._playback_reverse)
     
     # ===== SLOTS DE EVENTOS =====
     @pyqtSlot(str)
     def selectEvent(self, event_id):
         """Seleccionar un evento"""
         self._selected_event_id = event_id
-        # Buscar el evento y mover timeline a su posición
-        for event in self._mission.events:
-            if event['id'] == event_id:
-                self.seekTo(event['timestamp'])
-                break
+        # Mover timeline a la posición del evento
+        event = self._mission.event_index.get(event_id)
+        if event is not None:
+            self.seekTo(event['timestamp'])
         self.eventSelected.emit(event_id)
     
     @pyqtSlot()
@@ -491,17 +651,22 @@ class AnalysisController(QObject):
     @pyqtSlot(str, result='QVariant')
     def getEventById(self, event_id):
         """Obtener un evento por su ID"""
-        for event in self._mission.events:
-            if event['id'] == event_id:
-                return event
-        return None
+        return self._mission.event_index.get(event_id)
     
     @pyqtSlot(result='QVariant')
     def getEventsAtCurrentTime(self):
         """Obtener eventos cercanos al tiempo actual (±10 segundos)"""
-        current = self._current_time
-        return [e for e in self._mission.events 
-                if abs(e['timestamp'] - current) <= 10]
+        return self._mission.event_index.by_time.around(self._current_time, 10)
+    
+    @pyqtSlot(float, float, result='QVariant')
+    def getEventsInTimeRange(self, start, end):
+        """Obtener eventos entre dos tiempos (segundos, inclusivo)"""
+        return self._mission.event_index.by_time.between(start, end)
+    
+    @pyqtSlot(float, float, result='QVariant')
+    def getEventsNearPosition(self, position, radius):
+        """Obtener eventos a menos de `radius` metros de una posición del túnel"""
+        return self._mission.event_index.by_position.around(position, radius)
     
     # ===== SLOTS DE FILTROS =====
     @pyqtSlot(str)
@@ -509,21 +674,29 @@ class AnalysisController(QObject):
         """Establecer filtro por tipo"""
         if filter_type != self._type_filter:
             self._type_filter = filter_type
-            self.filterChanged.emit()
+            self._on_filters_changed()
     
     @pyqtSlot(str)
     def setSeverityFilter(self, severity):
         """Establecer filtro por severidad"""
         if severity != self._severity_filter:
             self._severity_filter = severity
-            self.filterChanged.emit()
+            self._on_filters_changed()
+    
+    @pyqtSlot(str)
+    def setSearchText(self, text):
+        """Establecer búsqueda de texto en título y descripción"""
+        if text != self._search_text:
+            self._search_text = text
+            self._on_filters_changed()
     
     @pyqtSlot()
     def clearFilters(self):
         """Limpiar todos los filtros"""
         self._type_filter = "all"
         self._severity_filter = "all"
-        self.filterChanged.emit()
+        self._search_text = ""
+        self._on_filters_changed()
     
     # ===== SLOTS DE CAPAS =====
     @pyqtSlot(str, bool)
@@ -548,28 +721,37 @@ class AnalysisController(QObject):
     # ===== SLOTS DE DATOS =====
     @pyqtSlot(int, int, result='QVariant')
     def getTelemetryRange(self, start, end):
-        """Obtener rango de telemetría para gráficos"""
-        start = max(0, start)
-        end = min(len(self._mission.telemetry), end)
-        return self._mission.telemetry[start:end]
+        """Obtener rango de telemetría para gráficos (segundos [start, end))"""
+        first, last = self._mission.telemetry.index_range(start, end)
+        return self._mission.telemetry.rows(first, last)
     
     @pyqtSlot(str, result='QVariant')
     def getGasDataForChart(self, gas_type):
-        """Obtener datos de un gas específico para gráficos"""
-        return [{'x': t['timestamp'], 'y': t[gas_type]} 
-                for t in self._mission.telemetry]
-    
-    @pyqtSlot(result='QVariant')
-    def getSparklineData(self):
-        """Obtener últimos 60 puntos para sparklines"""
-        start = max(0, self._current_time - 60)
-        end = self._current_time + 1
-        return self._mission.telemetry[start:end]
-    
-    @pyqtSlot(result='QVariant')
-    def getAllTelemetry(self):
-        """Obtener toda la telemetría"""
-        return self._mission.telemetry
+        """Obtener datos de un gas específico para gráficos (ceros si el canal no existe)"""
+        telemetry = self._mission.telemetry
+        if gas_type not in CHANNEL_NAMES:
+            return [{'x': x, 'y': 0} for x in present('timestamp', telemetry.column('timestamp'))]
+        timestamps, values = telemetry.series(gas_type)
+        return [{'x': x, 'y': y}
+                for x, y in zip(present('timestamp', timestamps), present(gas_type, values))]
+    
+    @pyqtSlot(str, float, float, int, result='QVariant')
+    def getChannelDownsampled(self, channel, t0, t1, pixel_width):
+        """Serie reducida de un canal para un gráfico de `pixel_width` píxeles"""
+        return self._mission.telemetry.downsample(channel, t0, t1, pixel_width)
+    
+    @pyqtSlot(str, float, float, int, result='QVariant')
+    def getChannelOverview(self, channel, t0, t1, pixel_width):
+        """Envolvente mín/máx/media de un canal desde la pirámide (O(píxeles))"""
+        telemetry = self._mission.telemetry
+        start, end = telemetry.index_range(t0, t1)
+        starts, mins, maxs, means = self._mission.pyramid.query(channel, start, end, pixel_width)
+        return {
+            'x': present('timestamp', telemetry.column('timestamp')[starts]),
+            'min': present(channel, mins),
+            'max': present(channel, maxs),
+            'mean': present(channel, means)
+        }
     
     # ===== SLOTS DE REPORTES =====
     @pyqtSlot(result=str)
@@ -611,10 +793,10 @@ Por tipo:
 CONCENTRACIONES DE GAS
 ──────────────────────
 Metano (CH4):
-  Promedio: {stats['avg_ch4']}% LEL | Máximo: {stats['max_ch4']}% LEL
+  Promedio: {stats['avg_ch4']}% LEL | P95: {stats['p95_ch4']}% LEL | Máximo: {stats['max_ch4']}% LEL
 
 Monóxido de Carbono (CO):
-  Promedio: {stats['avg_co']} ppm | Máximo: {stats['max_co']} ppm
+  Promedio: {stats['avg_co']} ppm | P95: {stats['p95_co']} ppm | Máximo: {stats['max_co']} ppm
 
 Oxígeno (O2):
   Promedio: {stats['avg_o2']}% | Mínimo: {stats['min_o2']}%
@@ -681,15 +863,11 @@ Batería: {stats['battery_start']}% → {stats['battery_end']}%
         print(f"\n✓ {len(crack_events)} fotos guardadas en: grietas_mision_{self._mission.mission_id}/")
         print("  Ubicación: /home/usuario/Descargas/")
     
-    @pyqtSlot(result='QVariant')
-    def getAllTelemetry(self):
-        """Obtener toda la telemetría para gráficos completos"""
-        return self._mission.telemetry
-    
     # ===== UTILIDADES =====
-    @pyqtSlot(int, result=str)
+    @pyqtSlot(float, result=str)
     def formatTime(self, seconds):
         """Formatear segundos a MM:SS"""
+        seconds = int(seconds)
         minutes = seconds // 60
         secs = seconds % 60
         return f"{minutes:02d}:{secs:02d}"
@@ -750,9 +928,32 @@ Batería: {stats['battery_start']}% → {stats['battery_end']}%
         return labels.get(severity, 'Desconocido')
 
 
+def parse_args(argv):
+    """Argumentos de línea de comandos (los restantes se entregan a Qt)"""
+    parser = argparse.ArgumentParser(description="Análisis de datos post-misión")
+    parser.add_argument('mission', nargs='?', help="registro de misión .uavlog o de vuelo .fdr a abrir")
+    parser.add_argument('--export-simulated', metavar='RUTA',
+                        help="guardar una misión simulada en RUTA y salir")
+    parser.add_argument('--rate', type=float, default=1.0,
+                        help="frecuencia de muestreo de la misión simulada (Hz)")
+    parser.add_argument('--duration', type=int, default=SIMULATED_MISSION_INFO['total_time'],
+                        help="duración de la misión simulada (s)")
+    return parser.parse_known_args(argv[1:])
+
+
 def main():
+    args, qt_args = parse_args(sys.argv)
+    
+    if args.export_simulated:
+        mission = MissionData({'total_time': args.duration}, sample_rate=args.rate)
+        mission.save(args.export_simulated)
+        print(f"✓ Misión simulada guardada: {args.export_simulated}")
+        return
+    
+    mission = MissionData.load(args.mission) if args.mission else None
+    
     # Configurar aplicación
-    app = QApplication(sys.argv)
+    app = QApplication([sys.argv[0]] + qt_args)
     app.setApplicationName("DroneMineTunnel - Análisis de Datos")
     app.setOrganizationName("Tesis UAV Mining")
     
@@ -760,7 +961,7 @@ def main():
     engine = QQmlApplicationEngine()
     
     # Crear y registrar el controlador
-    controller = AnalysisController()
+    controller = AnalysisController(mission)
     engine.rootContext().setContextProperty("analysisController", controller)
     
     # Cargar el archivo QML principal
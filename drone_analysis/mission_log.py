@@ -0,0 +1,117 @@
+"""
+Formato binario de registro de misión (.uavlog)
+
+Disposición del archivo (little-endian):
+
+    Cabecera (HEADER, 64 bytes)
+        magic            8s   b'UAVMLOG\\0'
+        version          u16  FORMAT_VERSION
+        num_channels     u16
+        reserved         u32
+        num_samples      u64
+        sample_rate      f64  Hz nominal
+        meta_offset      u64  JSON UTF-8 con la información de misión
+        meta_length      u64
+        events_offset    u64  tabla de eventos (JSON UTF-8, lista de objetos)
+        events_length    u64
+
+    Directorio de canales (num_channels × CHANNEL_ENTRY, 32 bytes)
+        name             16s  ASCII, relleno con NUL
+        dtype            8s   descriptor NumPy ('<f4', '<f8', '<i2', ...)
+        offset           u64  inicio del bloque de datos del canal
+
+    Bloques de datos
+        Un bloque contiguo por canal de num_samples × itemsize bytes,
+        alineado a DATA_ALIGNMENT. El ancho de cada muestra es fijo, por
+        lo que la muestra i del canal está en offset + i × itemsize.
+
+Al abrir solo se leen la cabecera, el directorio, la información y la tabla
+de eventos; los canales se proyectan en memoria con np.memmap y el sistema
+operativo carga únicamente las páginas que se consultan.
+"""
+
+import json
+import struct
+
+import numpy as np
+
+from telemetry import CHANNEL_DTYPES, CHANNEL_NAMES, TelemetryStore
+
+
+MAGIC = b'UAVMLOG\0'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<8sHHIQdQQQQ')
+CHANNEL_ENTRY = struct.Struct('<16s8sQ')
+DATA_ALIGNMENT = 4096
+
+
+class MissionLogError(ValueError):
+    """Archivo de misión inválido o incompatible"""
+
+
+def _align(offset):
+    return -(-offset // DATA_ALIGNMENT) * DATA_ALIGNMENT
+
+
+def write_mission_log(path, info, telemetry, events, sample_rate=1.0):
+    """Escribe una misión (información, telemetría columnar y eventos) a disco"""
+    meta = json.dumps(info, ensure_ascii=False).encode('utf-8')
+    event_table = json.dumps(events, ensure_ascii=False).encode('utf-8')
+    num_samples = len(telemetry)
+
+    meta_offset = HEADER.size + CHANNEL_ENTRY.size * len(CHANNEL_NAMES)
+    events_offset = meta_offset + len(meta)
+    offset = _align(events_offset + len(event_table))
+
+    directory = []
+    for name in CHANNEL_NAMES:
+        dtype = CHANNEL_DTYPES[name].newbyteorder('<')
+        directory.append((name, dtype, offset))
+        offset = _align(offset + num_samples * dtype.itemsize)
+
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(directory), 0, num_samples,
+                            float(sample_rate), meta_offset, len(meta),
+                            events_offset, len(event_table)))
+        for name, dtype, data_offset in directory:
+            f.write(CHANNEL_ENTRY.pack(name.encode('ascii'), dtype.str.encode('ascii'), data_offset))
+        f.write(meta)
+        f.write(event_table)
+        for name, dtype, data_offset in directory:
+            f.seek(data_offset)
+            np.ascontiguousarray(telemetry.column(name), dtype=dtype).tofile(f)
+        f.truncate(offset)
+
+
+def read_mission_log(path):
+    """Abre un registro de misión; devuelve (info, telemetría, eventos, sample_rate)"""
+    with open(path, 'rb') as f:
+        header = f.read(HEADER.size)
+        if len(header) < HEADER.size:
+            raise MissionLogError(f"Archivo de misión truncado: {path}")
+        (magic, version, num_channels, _, num_samples, sample_rate,
+         meta_offset, meta_length, events_offset, events_length) = HEADER.unpack(header)
+        if magic != MAGIC:
+            raise MissionLogError(f"No es un registro de misión: {path}")
+        if version != FORMAT_VERSION:
+            raise MissionLogError(f"Versión de formato no soportada: {version}")
+
+        directory = []
+        for _ in range(num_channels):
+            name, dtype, data_offset = CHANNEL_ENTRY.unpack(f.read(CHANNEL_ENTRY.size))
+            directory.append((name.rstrip(b'\0').decode('ascii'),
+                              np.dtype(dtype.rstrip(b'\0').decode('ascii')), data_offset))
+
+        f.seek(meta_offset)
+        info = json.loads(f.read(meta_length).decode('utf-8'))
+        f.seek(events_offset)
+        events = json.loads(f.read(events_length).decode('utf-8'))
+
+    columns = {}
+    for name, dtype, data_offset in directory:
+        if num_samples == 0:
+            columns[name] = np.zeros(0, dtype=dtype)
+        else:
+            columns[name] = np.memmap(path, mode='r', dtype=dtype,
+                                      offset=data_offset, shape=(num_samples,))
+    return info, TelemetryStore(columns), events, sample_rate
@@ -0,0 +1,134 @@
+"""
+Modelos de lista (QAbstractListModel) para eventos y telemetría
+
+QML obtiene solo los roles que muestran los delegados visibles, en lugar
+de convertir listas completas de diccionarios en cada acceso. Al cambiar
+los filtros, el modelo de eventos emite inserciones y eliminaciones de
+filas mínimas.
+"""
+
+from PyQt6.QtCore import QAbstractListModel, QModelIndex, Qt, pyqtProperty, pyqtSignal, pyqtSlot
+
+from telemetry import CHANNEL_NAMES, present
+
+
+# Campos de evento expuestos como roles ('id' se publica como 'eventId')
+EVENT_FIELDS = ('id', 'type', 'subtype', 'timestamp', 'position', 'severity', 'title',
+                'description', 'value', 'unit', 'confidence', 'recommendation')
+
+# Sobre este número de tramos cambiados se reinicia el modelo completo
+RESET_THRESHOLD = 64
+
+
+def _runs(indices):
+    """Agrupa índices crecientes en tramos contiguos (inicio, fin)"""
+    runs = []
+    for index in indices:
+        if runs and runs[-1][1] == index:
+            runs[-1][1] = index + 1
+        else:
+            runs.append([index, index + 1])
+    return runs
+
+
+class EventListModel(QAbstractListModel):
+    """Subconjunto ordenado de los eventos de la misión"""
+
+    countChanged = pyqtSignal()
+
+    ROLES = {Qt.ItemDataRole.UserRole + i: field for i, field in enumerate(EVENT_FIELDS, 1)}
+
+    def __init__(self, events, parent=None):
+        super().__init__(parent)
+        self._events = events
+        self._rows = list(range(len(events)))  # posiciones en la lista de la misión
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def roleNames(self):
+        return {role: (b'eventId' if field == 'id' else field.encode()) for role, field in self.ROLES.items()}
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or not 0 <= index.row() < len(self._rows):
+            return None
+        field = self.ROLES.get(role)
+        if field is None:
+            return None
+        return self._events[self._rows[index.row()]].get(field)
+
+    @pyqtProperty(int, notify=countChanged)
+    def count(self):
+        return len(self._rows)
+
+    @pyqtSlot(int, result='QVariant')
+    def get(self, row):
+        """Evento completo de una fila"""
+        if 0 <= row < len(self._rows):
+            return self._events[self._rows[row]]
+        return None
+
+    def set_rows(self, rows):
+        """Actualiza el subconjunto visible emitiendo cambios mínimos
+
+        `rows` son posiciones crecientes en la lista de eventos de la misión.
+        """
+        rows = list(rows)
+        if rows == self._rows:
+            return
+        keep = set(rows)
+        removed = [row for row, event in enumerate(self._rows) if event not in keep]
+        current = set(self._rows)
+        added = [row for row, event in enumerate(rows) if event not in current]
+        removed_runs = _runs(removed)
+        added_runs = _runs(added)
+
+        if len(removed_runs) + len(added_runs) > RESET_THRESHOLD:
+            self.beginResetModel()
+            self._rows = rows
+            self.endResetModel()
+            self.countChanged.emit()
+            return
+
+        # Eliminaciones de atrás hacia adelante para no desplazar índices pendientes
+        for first, last in reversed(removed_runs):
+            self.beginRemoveRows(QModelIndex(), first, last - 1)
+            del self._rows[first:last]
+            self.endRemoveRows()
+
+        # Las inserciones en orden: sus índices ya son los de la lista final
+        for first, last in added_runs:
+            self.beginInsertRows(QModelIndex(), first, last - 1)
+            self._rows[first:first] = rows[first:last]
+            self.endInsertRows()
+
+        self.countChanged.emit()
+
+
+class TelemetryListModel(QAbstractListModel):
+    """Muestras de telemetría; cada canal es un rol leído bajo demanda"""
+
+    ROLES = {Qt.ItemDataRole.UserRole + i: name for i, name in enumerate(CHANNEL_NAMES, 1)}
+
+    def __init__(self, telemetry, parent=None):
+        super().__init__(parent)
+        self._telemetry = telemetry
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._telemetry)
+
+    def roleNames(self):
+        return {role: name.encode() for role, name in self.ROLES.items()}
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        channel = self.ROLES.get(role)
+        if channel is None or not index.isValid():
+            return None
+        row = index.row()
+        if not 0 <= row < len(self._telemetry):
+            return None
+        return present(channel, self._telemetry.column(channel)[row:row + 1])[0]
+
+    @pyqtProperty(int, constant=True)
+    def count(self):
+        return len(self._telemetry)
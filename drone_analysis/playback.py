@@ -0,0 +1,70 @@
+"""
+Reloj de reproducción de misión
+
+El tiempo de misión se deriva de un reloj monotónico (ancla + velocidad ×
+tiempo real transcurrido), no de un contador de ticks: si un frame se
+retrasa, el siguiente salta al instante correcto en lugar de acumular
+atraso. La velocidad puede ser negativa para reproducir hacia atrás.
+"""
+
+import time
+
+
+PLAYBACK_SPEEDS = (1, 2, 5, 10, 20, 50, 100, 200)
+DEFAULT_REFRESH_RATE = 60.0  # Hz, si la pantalla no informa la suya
+
+
+class PlaybackClock:
+    """Tiempo de misión en función del tiempo real transcurrido"""
+
+    def __init__(self, duration, clock=time.monotonic):
+        self.duration = float(duration)
+        self._clock = clock
+        self._anchor_real = None  # None = detenido
+        self._anchor_time = 0.0
+        self._rate = 1.0
+
+    @property
+    def running(self):
+        return self._anchor_real is not None
+
+    @property
+    def rate(self):
+        return self._rate
+
+    def _clamp(self, value):
+        return max(0.0, min(float(value), self.duration))
+
+    def now(self):
+        """Tiempo de misión actual (segundos, limitado a [0, duración])"""
+        if self._anchor_real is None:
+            return self._anchor_time
+        elapsed = self._clock() - self._anchor_real
+        return self._clamp(self._anchor_time + self._rate * elapsed)
+
+    def start(self):
+        if self._anchor_real is None:
+            self._anchor_real = self._clock()
+
+    def stop(self):
+        """Detiene el reloj conservando el tiempo alcanzado"""
+        self._anchor_time = self.now()
+        self._anchor_real = None
+
+    def seek(self, value):
+        """Salta a un tiempo de misión; si está corriendo sigue desde ahí"""
+        self._anchor_time = self._clamp(value)
+        if self._anchor_real is not None:
+            self._anchor_real = self._clock()
+
+    def set_rate(self, rate):
+        """Cambia la velocidad (segundos de misión por segundo real)"""
+        self._anchor_time = self.now()
+        if self._anchor_real is not None:
+            self._anchor_real = self._clock()
+        self._rate = float(rate)
+
+    def at_boundary(self):
+        """True si llegó al final (o al inicio, en reversa)"""
+        t = self.now()
+        return t >= self.duration if self._rate > 0 else t <= 0.0
@@ -0,0 +1,220 @@
+"""
+Pirámide multirresolución de telemetría (mín/máx/media por canal)
+
+El nivel 0 agrupa BASE_BLOCK muestras por nodo y cada nivel siguiente
+combina pares de nodos del anterior, como los mipmaps de una imagen. Una
+consulta sobre cualquier rango elige el nivel cuyo número de nodos se
+acerca al ancho en píxeles, por lo que su costo es O(píxeles) y no
+O(muestras).
+
+El archivo persistido puede llevar además un resumen opaco (un diccionario
+serializable a JSON, p. ej. las estadísticas de la misión) validado contra
+el mismo registro: al reabrir la misión no hace falta recorrerla de nuevo.
+"""
+
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+from flight_log import is_flight_log, recording_segments
+from telemetry import CHANNEL_NAMES
+
+
+PYRAMID_VERSION = 3
+BASE_BLOCK = 16  # muestras por nodo en el nivel 0
+PYRAMID_SUFFIX = '.pyramid.npz'
+
+# El eje temporal no necesita pirámide propia
+PYRAMID_CHANNELS = tuple(name for name in CHANNEL_NAMES if name != 'timestamp')
+
+
+def pyramid_path(mission_path):
+    """Ruta del archivo de pirámide asociado a un registro de misión"""
+    return str(mission_path) + PYRAMID_SUFFIX
+
+
+def source_signature(source_path):
+    """(tamaños, mtimes en ns) de los archivos del registro, en orden
+
+    Una grabación .fdr se valida con todos sus segmentos: un segmento nuevo
+    o reescrito invalida la pirámide aunque el primero no haya cambiado.
+    """
+    files = recording_segments(source_path) if is_flight_log(source_path) else [Path(source_path)]
+    stats = [os.stat(path) for path in files]
+    return (np.array([stat.st_size for stat in stats], dtype=np.int64),
+            np.array([stat.st_mtime_ns for stat in stats], dtype=np.int64))
+
+
+def _node_counts(num_samples, block, first, last):
+    """Muestras cubiertas por los nodos [first, last) de tamaño `block`"""
+    starts = np.arange(first, last, dtype=np.int64) * block
+    return np.minimum(block, num_samples - starts)
+
+
+def _reduce_level(mins, maxs, means, counts):
+    """Combina pares de nodos consecutivos en el nivel siguiente"""
+    if len(mins) % 2:
+        mins = np.append(mins, mins[-1])
+        maxs = np.append(maxs, maxs[-1])
+        means = np.append(means, 0)
+        counts = np.append(counts, 0)
+    pair_counts = counts[0::2] + counts[1::2]
+    pair_means = (means[0::2] * counts[0::2] + means[1::2] * counts[1::2]) / pair_counts
+    return (np.minimum(mins[0::2], mins[1::2]),
+            np.maximum(maxs[0::2], maxs[1::2]),
+            pair_means.astype(np.float32),
+            pair_counts)
+
+
+class TelemetryPyramid:
+    """Niveles mín/máx/media de cada canal de una misión"""
+
+    def __init__(self, telemetry, levels, summary=None):
+        self._telemetry = telemetry
+        self.num_samples = len(telemetry)
+        # levels[canal] -> lista de (mins, maxs, means), nivel 0 primero
+        self._levels = levels
+        self.summary = summary  # resumen persistido junto a los niveles (JSON)
+
+    @classmethod
+    def build(cls, telemetry):
+        """Construye la pirámide recorriendo cada canal una vez"""
+        n = len(telemetry)
+        levels = {}
+        for channel in PYRAMID_CHANNELS:
+            values = np.asarray(telemetry.column(channel), dtype=np.float32)
+            channel_levels = []
+            if n:
+                nodes = -(-n // BASE_BLOCK)
+                padded = np.empty(nodes * BASE_BLOCK, dtype=np.float32)
+                padded[:n] = values
+                padded[n:] = values[-1]
+                blocks = padded.reshape(nodes, BASE_BLOCK)
+                counts = _node_counts(n, BASE_BLOCK, 0, nodes)
+                sums = values.astype(np.float64)
+                sums = np.add.reduceat(sums, np.arange(0, n, BASE_BLOCK))
+                level = (blocks.min(axis=1), blocks.max(axis=1),
+                         (sums / counts).astype(np.float32), counts)
+                channel_levels.append(level[:3])
+                while len(level[0]) > 1:
+                    level = _reduce_level(*level)
+                    channel_levels.append(level[:3])
+            levels[channel] = channel_levels
+        return cls(telemetry, levels)
+
+    @classmethod
+    def load(cls, path, telemetry, source_path):
+        """Carga una pirámide persistida si sigue correspondiendo al registro"""
+        if not os.path.exists(path):
+            return None
+        sizes, mtimes = source_signature(source_path)
+        with np.load(path) as data:
+            if (int(data['version']) != PYRAMID_VERSION
+                    or int(data['num_samples']) != len(telemetry)
+                    or not np.array_equal(data['source_sizes'], sizes)
+                    or not np.array_equal(data['source_mtimes_ns'], mtimes)):
+                return None
+            levels = {}
+            for channel in PYRAMID_CHANNELS:
+                bounds = data[f'{channel}/bounds']
+                parts = [data[f'{channel}/{part}'] for part in ('min', 'max', 'mean')]
+                levels[channel] = [tuple(part[a:b] for part in parts)
+                                   for a, b in zip(bounds[:-1], bounds[1:])]
+            summary = json.loads(str(data['summary'])) if 'summary' in data.files else None
+        return cls(telemetry, levels, summary)
+
+    @classmethod
+    def for_mission_file(cls, telemetry, source_path, summarize=None):
+        """Pirámide de un registro: se lee del disco o se construye y guarda
+
+        `summarize()` calcula el resumen que se guarda con la pirámide; solo
+        se llama si el archivo no existe, no corresponde o no lo tiene.
+        """
+        path = pyramid_path(source_path)
+        try:
+            pyramid = cls.load(path, telemetry, source_path)
+        except (OSError, KeyError, ValueError):
+            pyramid = None
+        stale = pyramid is None
+        if stale:
+            pyramid = cls.build(telemetry)
+        if pyramid.summary is None and summarize is not None:
+            pyramid.summary = summarize()
+            stale = True
+        if stale:
+            try:
+                pyramid.save(path, source_path)
+            except OSError as e:
+                print(f"⚠ No se pudo guardar la pirámide ({e}); se usará solo en memoria")
+        return pyramid
+
+    def save(self, path, source_path):
+        """Guarda la pirámide junto al registro de misión"""
+        sizes, mtimes = source_signature(source_path)
+        arrays = {
+            'version': PYRAMID_VERSION,
+            'num_samples': self.num_samples,
+            'source_sizes': sizes,
+            'source_mtimes_ns': mtimes,
+        }
+        if self.summary is not None:
+            arrays['summary'] = json.dumps(self.summary)
+        # Todos los niveles de un canal se concatenan; `bounds` marca los límites
+        for channel, channel_levels in self._levels.items():
+            sizes = [len(mins) for mins, _, _ in channel_levels]
+            arrays[f'{channel}/bounds'] = np.concatenate([[0], np.cumsum(sizes)]).astype(np.int64)
+            for i, part in enumerate(('min', 'max', 'mean')):
+                arrays[f'{channel}/{part}'] = (np.concatenate([level[i] for level in channel_levels])
+                                               if channel_levels else np.zeros(0, dtype=np.float32))
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, path)
+
+    def query(self, channel, start, end, buckets):
+        """Agrega las muestras [start, end) en `buckets` grupos
+
+        Devuelve (inicios, mins, maxs, means): el índice de la primera muestra
+        de cada grupo y sus estadísticas. Los bordes se redondean al tamaño
+        de nodo del nivel elegido.
+        """
+        start = max(0, int(start))
+        end = min(self.num_samples, int(end))
+        buckets = max(1, int(buckets))
+        channel_levels = self._levels[channel]
+        if end <= start or not channel_levels:
+            empty = np.zeros(0, dtype=np.float32)
+            return np.zeros(0, dtype=np.int64), empty, empty, empty
+
+        # Rango corto: se agregan directamente las muestras (< BASE_BLOCK × buckets)
+        if (end - start) // BASE_BLOCK < buckets:
+            values = np.asarray(self._telemetry.column(channel)[start:end], dtype=np.float32)
+            return self._aggregate(start, 1, values, values, values,
+                                   np.ones(end - start, dtype=np.int64), buckets)
+
+        # Nivel más grueso que aún tiene al menos `buckets` nodos en el rango
+        level = 0
+        block = BASE_BLOCK
+        while (level + 1 < len(channel_levels)
+               and (end - start) // (block * 2) >= buckets):
+            level += 1
+            block *= 2
+
+        first = start // block
+        last = -(-end // block)
+        mins, maxs, means = (part[first:last] for part in channel_levels[level])
+        counts = _node_counts(self.num_samples, block, first, last)
+        return self._aggregate(first * block, block, mins, maxs, means, counts, buckets)
+
+    @staticmethod
+    def _aggregate(origin, block, mins, maxs, means, counts, buckets):
+        """Reduce nodos consecutivos a lo sumo a `buckets` grupos"""
+        nodes = len(mins)
+        edges = np.unique(np.linspace(0, nodes, min(buckets, nodes) + 1).astype(np.int64)[:-1])
+        weighted = np.add.reduceat(means.astype(np.float64) * counts, edges)
+        return (origin + edges * block,
+                np.minimum.reduceat(mins, edges),
+                np.maximum.reduceat(maxs, edges),
+                (weighted / np.add.reduceat(counts, edges)).astype(np.float32))
@@ -215,16 +215,20 @@ ApplicationWindow {
             }
 
             Canvas {
+                id: gasCanvas
                 width: parent.width
                 height: 120
 
-                property var telemetryData: analysisController.getAllTelemetry()
+                // Serie reducida (mín/máx por píxel), cacheada en el controlador
+                property var telemetryData: analysisController.getChannelDownsampled(
+                    gasChartRoot.gasKey, 0, analysisController.totalTime, Math.max(1, Math.round(width - 30)))
 
                 Component.onCompleted: requestPaint()
+                onTelemetryDataChanged: requestPaint()
 
                 Connections {
                     target: analysisController
-                    function onTimelinePositionChanged() { parent.children[1].requestPaint() }
+                    function onTimelinePositionChanged() { gasCanvas.requestPaint() }
                 }
 
                 onPaint: {
@@ -233,7 +237,7 @@ ApplicationWindow {
                     var w = width;
                     var h = height;
                     var data = telemetryData;
-                    if (!data || data.length < 2) return;
+                    if (!data || data.x.length < 2) return;
 
                     var padding = 30;
                     var chartW = w - padding;
@@ -264,9 +268,9 @@ ApplicationWindow {
                     ctx.strokeStyle = gasChartRoot.gasColor;
                     ctx.lineWidth = 2;
                     ctx.beginPath();
-                    for (var k = 0; k < data.length; k++) {
-                        var x = padding + (k / (data.length - 1)) * chartW;
-                        var dataVal = data[k][gasChartRoot.gasKey] || 0;
+                    for (var k = 0; k < data.x.length; k++) {
+                        var x = padding + (data.x[k] / analysisController.totalTime) * chartW;
+                        var dataVal = data.y[k] || 0;
                         var yVal = 10 + chartH - ((dataVal - gasChartRoot.minVal) / (gasChartRoot.maxVal - gasChartRoot.minVal)) * chartH;
                         if (k === 0) ctx.moveTo(x, yVal);
                         else ctx.lineTo(x, yVal);
@@ -789,7 +793,7 @@ ApplicationWindow {
                                 Item { Layout.fillWidth: true }
 
                                 Text {
-                                    text: analysisController.filteredEvents.length + " items"
+                                    text: analysisController.filteredEventsModel.count + " items"
                                     color: App.Theme.textTertiary
                                     font.pixelSize: App.Theme.fontSizeXs
                                 }
@@ -854,21 +858,42 @@ ApplicationWindow {
                                 }
                             }
 
+                            TextField {
+                                id: eventSearchField
+                                Layout.fillWidth: true
+                                Layout.preferredHeight: 26
+                                placeholderText: "Buscar en eventos..."
+                                placeholderTextColor: App.Theme.textTertiary
+                                color: App.Theme.textPrimary
+                                font.pixelSize: 10
+                                leftPadding: 6
+                                text: analysisController.searchText
+
+                                background: Rectangle {
+                                    color: App.Theme.bgTertiary
+                                    radius: App.Theme.radiusS
+                                    border.width: 1
+                                    border.color: eventSearchField.activeFocus ? App.Theme.accentBlue : App.Theme.borderDefault
+                                }
+
+                                onTextEdited: analysisController.setSearchText(text)
+                            }
+
                             ListView {
                                 id: eventsListView
                                 Layout.fillWidth: true
                                 Layout.fillHeight: true
                                 clip: true
                                 spacing: 4
-                                model: analysisController.filteredEvents
+                                model: analysisController.filteredEventsModel
 
                                 delegate: Rectangle {
                                     width: eventsListView.width
                                     height: 56
                                     radius: App.Theme.radiusM
-                                    color: analysisController.selectedEventId === modelData.id ? App.Theme.bgCardHover : (eventItemMouse.containsMouse ? App.Theme.bgTertiary : "transparent")
-                                    border.width: analysisController.selectedEventId === modelData.id ? 1 : 0
-                                    border.color: App.Theme.typeColor(modelData.type)
+                                    color: analysisController.selectedEventId === model.eventId ? App.Theme.bgCardHover : (eventItemMouse.containsMouse ? App.Theme.bgTertiary : "transparent")
+                                    border.width: analysisController.selectedEventId === model.eventId ? 1 : 0
+                                    border.color: App.Theme.typeColor(model.type)
 
                                     RowLayout {
                                         anchors.fill: parent
@@ -879,11 +904,11 @@ ApplicationWindow {
                                             width: 32
                                             height: 32
                                             radius: App.Theme.radiusS
-                                            color: Qt.rgba(App.Theme.typeColor(modelData.type).r, App.Theme.typeColor(modelData.type).g, App.Theme.typeColor(modelData.type).b, 0.2)
+                                            color: Qt.rgba(App.Theme.typeColor(model.type).r, App.Theme.typeColor(model.type).g, App.Theme.typeColor(model.type).b, 0.2)
 
                                             Text {
                                                 anchors.centerIn: parent
-                                                text: App.Theme.typeIcon(modelData.type)
+                                                text: App.Theme.typeIcon(model.type)
                                                 font.pixelSize: 14
                                             }
                                         }
@@ -896,7 +921,7 @@ ApplicationWindow {
                                                 spacing: 4
 
                                                 Text {
-                                                    text: modelData.title
+                                                    text: model.title
                                                     color: App.Theme.textPrimary
                                                     font.pixelSize: 11
                                                     font.weight: Font.Medium
@@ -905,13 +930,13 @@ ApplicationWindow {
                                                 }
 
                                                 StatusBadge {
-                                                    severity: modelData.severity
-                                                    label: analysisController.getSeverityLabel(modelData.severity)
+                                                    severity: model.severity
+                                                    label: analysisController.getSeverityLabel(model.severity)
                                                 }
                                             }
 
                                             Text {
-                                                text: analysisController.formatTime(modelData.timestamp) + " | " + modelData.position.toFixed(1) + "m"
+                                                text: analysisController.formatTime(model.timestamp) + " | " + model.position.toFixed(1) + "m"
                                                 color: App.Theme.textTertiary
                                                 font.family: App.Theme.fontMono
                                                 font.pixelSize: 9
@@ -924,7 +949,7 @@ ApplicationWindow {
                                         anchors.fill: parent
                                         hoverEnabled: true
                                         cursorShape: Qt.PointingHandCursor
-                                        onClicked: analysisController.selectEvent(modelData.id)
+                                        onClicked: analysisController.selectEvent(model.eventId)
                                     }
                                 }
 
@@ -1131,6 +1156,42 @@ ApplicationWindow {
                             Layout.fillWidth: true
                             Layout.preferredHeight: 36
 
+                            // Vista general de CH4 (envolvente mín/máx desde la pirámide)
+                            Canvas {
+                                id: timelineOverview
+                                anchors.fill: parent
+                                opacity: 0.5
+
+                                property var overview: analysisController.getChannelOverview(
+                                    "ch4", 0, analysisController.totalTime, Math.max(1, Math.round(width / 2)))
+
+                                onOverviewChanged: requestPaint()
+
+                                onPaint: {
+                                    var ctx = getContext("2d");
+                                    ctx.reset();
+                                    var data = overview;
+                                    if (!data || data.x.length < 2) return;
+                                    var lo = Math.min.apply(null, data.min);
+                                    var hi = Math.max.apply(null, data.max);
+                                    var range = (hi - lo) || 1;
+                                    ctx.fillStyle = App.Theme.dataCH4;
+                                    ctx.beginPath();
+                                    for (var i = 0; i < data.x.length; i++) {
+                                        var x = (data.x[i] / analysisController.totalTime) * width;
+                                        var y = height - ((data.max[i] - lo) / range) * height;
+                                        if (i === 0) ctx.moveTo(x, y);
+                                        else ctx.lineTo(x, y);
+                                    }
+                                    for (var j = data.x.length - 1; j >= 0; j--) {
+                                        ctx.lineTo((data.x[j] / analysisController.totalTime) * width,
+                                                   height - ((data.min[j] - lo) / range) * height);
+                                    }
+                                    ctx.closePath();
+                                    ctx.fill();
+                                }
+                            }
+
                             Rectangle {
                                 id: timelineTrack
                                 anchors.left: parent.left
@@ -1152,15 +1213,15 @@ ApplicationWindow {
                                 }
 
                                 Repeater {
-                                    model: analysisController.allEvents
+                                    model: analysisController.eventsModel
 
                                     Rectangle {
-                                        x: (modelData.timestamp / analysisController.totalTime) * timelineTrack.width - 3
+                                        x: (model.timestamp / analysisController.totalTime) * timelineTrack.width - 3
                                         y: -3
                                         width: 6
                                         height: 14
                                         radius: 2
-                                        color: App.Theme.severityColor(modelData.severity)
+                                        color: App.Theme.severityColor(model.severity)
                                         opacity: markerMouse.containsMouse ? 1.0 : 0.7
 
                                         MouseArea {
@@ -1169,7 +1230,7 @@ ApplicationWindow {
                                             anchors.margins: -4
                                             hoverEnabled: true
                                             cursorShape: Qt.PointingHandCursor
-                                            onClicked: analysisController.selectEvent(modelData.id)
+                                            onClicked: analysisController.selectEvent(model.eventId)
                                         }
                                     }
                                 }
@@ -1262,11 +1323,21 @@ ApplicationWindow {
                                     anchors.verticalCenter: parent.verticalCenter
                                 }
 
+                                StyledButton {
+                                    text: ""
+                                    icon: "⇄"
+                                    small: true
+                                    height: 22
+                                    primary: analysisController.playbackReverse
+                                    anchors.verticalCenter: parent.verticalCenter
+                                    onClicked: analysisController.togglePlaybackReverse()
+                                }
+
                                 Repeater {
-                                    model: [1, 2, 5, 10]
+                                    model: analysisController.playbackSpeeds
 
                                     Rectangle {
-                                        width: 28
+                                        width: 32
                                         height: 22
                                         radius: App.Theme.radiusS
                                         color: analysisController.playbackSpeed === modelData ? App.Theme.accentBlueDim : (speedMouse.containsMouse ? App.Theme.bgCardHover : App.Theme.bgTertiary)
@@ -1451,14 +1522,7 @@ ApplicationWindow {
                                         lineColor: App.Theme.dataCH4
                                         minValue: 0
                                         maxValue: 2
-                                        data: {
-                                            var sparkData = analysisController.getSparklineData()
-                                            var result = []
-                                            for (var i = 0; i < sparkData.length; i++) {
-                                                result.push(sparkData[i].ch4)
-                                            }
-                                            return result
-                                        }
+                                        data: new Float32Array(analysisController.sparklineWindows.ch4)
                                     }
                                 }
                             }
@@ -1500,14 +1564,7 @@ ApplicationWindow {
                                         lineColor: App.Theme.dataCO
                                         minValue: 0
                                         maxValue: 30
-                                        data: {
-                                            var sparkData = analysisController.getSparklineData()
-                                            var result = []
-                                            for (var i = 0; i < sparkData.length; i++) {
-                                                result.push(sparkData[i].co)
-                                            }
-                                            return result
-                                        }
+                                        data: new Float32Array(analysisController.sparklineWindows.co)
                                     }
                                 }
                             }
@@ -1548,14 +1605,7 @@ ApplicationWindow {
                                         lineColor: App.Theme.accentYellow
                                         minValue: 0
                                         maxValue: 10
-                                        data: {
-                                            var sparkData = analysisController.getSparklineData()
-                                            var result = []
-                                            for (var i = 0; i < sparkData.length; i++) {
-                                                result.push(sparkData[i].h2s)
-                                            }
-                                            return result
-                                        }
+                                        data: new Float32Array(analysisController.sparklineWindows.h2s)
                                     }
                                 }
                             }
@@ -1597,14 +1647,7 @@ ApplicationWindow {
                                         lineColor: App.Theme.dataO2
                                         minValue: 19
                                         maxValue: 22
-                                        data: {
-                                            var sparkData = analysisController.getSparklineData()
-                                            var result = []
-                                            for (var i = 0; i < sparkData.length; i++) {
-                                                result.push(sparkData[i].o2)
-                                            }
-                                            return result
-                                        }
+                                        data: new Float32Array(analysisController.sparklineWindows.o2)
                                     }
                                 }
                             }
@@ -0,0 +1,69 @@
+"""
+Ventanas deslizantes de sparklines
+
+Cada canal mantiene las últimas WINDOW muestras en un arreglo float32
+preasignado. Cuando el cursor avanza o retrocede menos de una ventana, el
+contenido se desplaza y solo se leen las muestras nuevas; un salto mayor
+rellena la ventana completa. QML recibe cada ventana como QByteArray
+(ArrayBuffer en JS), sin diccionarios por muestra.
+"""
+
+import numpy as np
+from PyQt6.QtCore import QByteArray
+
+
+SPARKLINE_CHANNELS = ('ch4', 'co', 'h2s', 'o2')
+SPARKLINE_WINDOW = 61  # muestra actual + 60 anteriores
+
+
+class SparklineWindows:
+    """Ventanas de las últimas muestras de varios canales"""
+
+    def __init__(self, telemetry, channels=SPARKLINE_CHANNELS, window=SPARKLINE_WINDOW):
+        self._telemetry = telemetry
+        self.channels = channels
+        self.window = window
+        self._buffer = np.full((len(channels), window), np.nan, dtype=np.float32)
+        self._index = None
+        self._published = None
+
+    def _fill(self, offset, first, count):
+        """Copia `count` muestras desde `first` a la columna `offset` del buffer"""
+        skip = max(0, -first)
+        if skip:
+            self._buffer[:, offset:offset + skip] = np.nan
+        if count > skip:
+            for row, channel in enumerate(self.channels):
+                column = self._telemetry.column(channel)
+                self._buffer[row, offset + skip:offset + count] = column[first + skip:first + count]
+
+    def move_to(self, index):
+        """Ubica el final de la ventana en la muestra `index`"""
+        if index == self._index:
+            return False
+        window = self.window
+        delta = None if self._index is None else index - self._index
+        if delta is not None and 0 < delta < window:
+            self._buffer[:, :-delta] = self._buffer[:, delta:]
+            self._fill(window - delta, index - delta + 1, delta)
+        elif delta is not None and -window < delta < 0:
+            self._buffer[:, -delta:] = self._buffer[:, :delta]
+            self._fill(0, index - window + 1, -delta)
+        else:
+            self._fill(0, index - window + 1, window)
+        self._index = index
+        self._published = None
+        return True
+
+    def values(self, channel):
+        """Vista de la ventana válida de un canal (sin copia)"""
+        length = min(self._index + 1, self.window) if self._index is not None else 0
+        row = self.channels.index(channel)
+        return self._buffer[row, self.window - length:]
+
+    def published(self):
+        """Ventanas como {canal: QByteArray float32}, recalculadas solo si cambiaron"""
+        if self._published is None:
+            self._published = {channel: QByteArray(self.values(channel).tobytes())
+                               for channel in self.channels}
+        return self._published
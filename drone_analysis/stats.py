@@ -0,0 +1,222 @@
+"""
+Estadísticas de telemetría en una sola pasada
+
+Cada canal mantiene conteo, media y varianza (Welford/Chan), mínimo, máximo
+y un sketch logarítmico de cuantiles (tipo DDSketch, error relativo
+acotado). Los acumuladores se actualizan por bloques a medida que llegan
+muestras y se pueden combinar (`merge`), por lo que una misión grande se
+procesa por trozos, incluso en paralelo, sin volver a recorrerla.
+"""
+
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from telemetry import CHANNEL_NAMES
+
+
+STATS_CHANNELS = tuple(name for name in CHANNEL_NAMES if name != 'timestamp')
+QUANTILES = (0.5, 0.95, 0.99)
+SKETCH_RELATIVE_ACCURACY = 0.01
+STATS_CHUNK_SIZE = 65536
+
+
+class QuantileSketch:
+    """Histograma con bins logarítmicos; cuantiles con error relativo acotado"""
+
+    def __init__(self, relative_accuracy=SKETCH_RELATIVE_ACCURACY, min_value=1e-9):
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.min_value = min_value
+        self.positive = {}
+        self.negative = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def _add_bins(self, store, magnitudes):
+        bins = np.ceil(np.log(magnitudes) / self._log_gamma).astype(np.int64)
+        offset = int(bins.min())
+        counts = np.bincount(bins - offset)
+        for key in np.flatnonzero(counts).tolist():
+            store[key + offset] = store.get(key + offset, 0) + int(counts[key])
+
+    def update(self, values):
+        """Agrega un bloque de valores finitos"""
+        positive = values[values > self.min_value]
+        negative = values[values < -self.min_value]
+        if len(positive):
+            self._add_bins(self.positive, positive)
+        if len(negative):
+            self._add_bins(self.negative, -negative)
+        self.zero_count += len(values) - len(positive) - len(negative)
+        self.count += len(values)
+
+    def merge(self, other):
+        """Combina otro sketch con la misma precisión"""
+        for store, other_store in ((self.positive, other.positive), (self.negative, other.negative)):
+            for key, count in other_store.items():
+                store[key] = store.get(key, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+
+    def _value(self, key):
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def quantile(self, q):
+        """Valor aproximado del cuantil q (0..1)"""
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+            if seen > rank:
+                return -self._value(key)
+        seen += self.zero_count
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank:
+                return self._value(key)
+        return self._value(max(self.positive)) if self.positive else 0.0
+
+
+class RunningStats:
+    """Conteo, media, varianza, extremos y cuantiles de un canal"""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.first = None
+        self.last = None
+        self.sketch = QuantileSketch()
+
+    def update(self, values):
+        """Agrega un bloque de muestras (se ignoran valores no finitos)"""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[np.isfinite(values)]
+        if len(values) == 0:
+            return
+        chunk = RunningStats()
+        chunk.count = len(values)
+        chunk.mean = float(values.mean())
+        chunk.m2 = float(np.square(values - chunk.mean).sum())
+        chunk.min = float(values.min())
+        chunk.max = float(values.max())
+        chunk.first = float(values[0])
+        chunk.last = float(values[-1])
+        chunk.sketch.update(values)
+        self.merge(chunk)
+
+    def merge(self, other):
+        """Combina estadísticas de un bloque posterior (Chan et al.)"""
+        if other.count == 0:
+            return
+        if self.count == 0:
+            self.first = other.first
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self.m2 += other.m2 + delta * delta * self.count * other.count / total
+        self.count = total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.last = other.last
+        self.sketch.merge(other.sketch)
+
+    @property
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+    def summary(self):
+        """Diccionario con las estadísticas del canal"""
+        if self.count == 0:
+            return {'count': 0}
+        result = {
+            'count': self.count,
+            'mean': self.mean,
+            'std': self.std,
+            'min': self.min,
+            'max': self.max,
+        }
+        for q in QUANTILES:
+            result[f'p{round(q * 100)}'] = self.sketch.quantile(q)
+        return result
+
+
+class TelemetryStatsAccumulator:
+    """Estadísticas de todos los canales, actualizables por bloques"""
+
+    def __init__(self, channels=STATS_CHANNELS):
+        self.channels = {channel: RunningStats() for channel in channels}
+        self.samples = 0
+        self.complete_samples = 0  # muestras con todos los canales finitos
+        self.first_timestamp = None
+        self.last_timestamp = None
+
+    def update(self, columns):
+        """Agrega un bloque: dict canal -> arreglo (incluye 'timestamp')"""
+        timestamps = columns['timestamp']
+        if len(timestamps) == 0:
+            return
+        complete = np.ones(len(timestamps), dtype=bool)
+        for channel, stats in self.channels.items():
+            values = np.asarray(columns[channel], dtype=np.float64)
+            complete &= np.isfinite(values)
+            stats.update(values)
+        if self.first_timestamp is None:
+            self.first_timestamp = float(timestamps[0])
+        self.last_timestamp = float(timestamps[-1])
+        self.samples += len(timestamps)
+        self.complete_samples += int(complete.sum())
+
+    def merge(self, other):
+        """Combina el acumulador de un bloque posterior"""
+        for channel, stats in self.channels.items():
+            stats.merge(other.channels[channel])
+        if other.samples == 0:
+            return
+        if self.first_timestamp is None:
+            self.first_timestamp = other.first_timestamp
+        self.last_timestamp = other.last_timestamp
+        self.samples += other.samples
+        self.complete_samples += other.complete_samples
+
+    def __getitem__(self, channel):
+        return self.channels[channel]
+
+    @classmethod
+    def from_store(cls, telemetry, chunk_size=STATS_CHUNK_SIZE, workers=None):
+        """Acumula un almacén completo por bloques, en paralelo si es grande"""
+        chunks = [(start, min(start + chunk_size, len(telemetry)))
+                  for start in range(0, len(telemetry), chunk_size)]
+
+        def accumulate(bounds):
+            start, end = bounds
+            accumulator = cls()
+            accumulator.update({name: telemetry.column(name)[start:end]
+                                for name in ('timestamp',) + tuple(accumulator.channels)})
+            return accumulator
+
+        if workers is None:
+            workers = min(4, os.cpu_count() or 1) if len(chunks) > 4 else 1
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                partials = list(pool.map(accumulate, chunks))
+        else:
+            partials = map(accumulate, chunks)
+
+        result = cls()
+        for partial in partials:
+            result.merge(partial)
+        return result
@@ -0,0 +1,154 @@
+"""
+Almacenamiento columnar de telemetría para el análisis post-misión
+
+Cada canal se guarda en un arreglo NumPy tipado. Las consultas devuelven
+vistas (slices) sobre esos arreglos y solo se construyen diccionarios por
+fila cuando QML pide una muestra concreta.
+"""
+
+from collections import OrderedDict
+
+import numpy as np
+
+
+# Canales de telemetría: (nombre, tipo, decimales de presentación)
+CHANNELS = (
+    ('timestamp', np.float64, 3),
+    ('position', np.float32, 1),
+    ('ch4', np.float32, 2),
+    ('co', np.float32, 1),
+    ('o2', np.float32, 1),
+    ('h2s', np.float32, 2),
+    ('height', np.float32, 2),
+    ('speed', np.float32, 2),
+    ('battery', np.float32, 1),
+    ('slam_quality', np.float32, 0),
+    ('signal_strength', np.int16, None),
+    ('temperature', np.float32, 1),
+)
+
+CHANNEL_NAMES = tuple(name for name, _, _ in CHANNELS)
+CHANNEL_DTYPES = {name: np.dtype(dtype) for name, dtype, _ in CHANNELS}
+CHANNEL_DECIMALS = {name: decimals for name, _, decimals in CHANNELS}
+
+# Número de resultados de downsampling que se mantienen en caché
+DOWNSAMPLE_CACHE_SIZE = 64
+
+
+def present(channel, values):
+    """Convierte un arreglo de un canal a lista de Python redondeada"""
+    decimals = CHANNEL_DECIMALS[channel]
+    if decimals is None:
+        return values.tolist()
+    return np.round(values.astype(np.float64), decimals).tolist()
+
+
+def minmax_indices(values, buckets):
+    """Índices del mínimo y máximo de cada bucket, en orden temporal
+
+    Devuelve como máximo 2 × buckets índices; los picos de cada bucket se
+    conservan siempre, a diferencia de un submuestreo uniforme.
+    """
+    n = len(values)
+    if n <= 2 * buckets:
+        return np.arange(n)
+    size = -(-n // buckets)
+    count = -(-n // size)
+    padded = np.empty(count * size, dtype=values.dtype)
+    padded[:n] = values
+    padded[n:] = values[-1]
+    blocks = padded.reshape(count, size)
+    base = np.arange(count) * size
+    lows = base + blocks.argmin(axis=1)
+    highs = base + blocks.argmax(axis=1)
+    pairs = np.stack([np.minimum(lows, highs), np.maximum(lows, highs)], axis=1)
+    return np.unique(np.minimum(pairs.ravel(), n - 1))
+
+
+class TelemetryStore:
+    """Telemetría en columnas: un arreglo tipado por canal"""
+
+    def __init__(self, columns):
+        missing = [name for name in CHANNEL_NAMES if name not in columns]
+        if missing:
+            raise ValueError(f"Faltan canales de telemetría: {', '.join(missing)}")
+        lengths = {len(columns[name]) for name in CHANNEL_NAMES}
+        if len(lengths) > 1:
+            raise ValueError("Todos los canales deben tener la misma longitud")
+
+        self._columns = {name: columns[name] for name in CHANNEL_NAMES}
+        self._length = lengths.pop() if lengths else 0
+        self._downsample_cache = OrderedDict()
+
+    @classmethod
+    def allocate(cls, num_samples):
+        """Reserva un almacén vacío de `num_samples` muestras"""
+        return cls({name: np.zeros(num_samples, dtype=CHANNEL_DTYPES[name])
+                    for name in CHANNEL_NAMES})
+
+    def __len__(self):
+        return self._length
+
+    @property
+    def duration(self):
+        """Duración cubierta por las muestras (segundos)"""
+        if self._length == 0:
+            return 0.0
+        timestamps = self._columns['timestamp']
+        return float(timestamps[-1] - timestamps[0])
+
+    def column(self, channel):
+        """Arreglo completo de un canal (sin copia)"""
+        if channel not in self._columns:
+            raise KeyError(f"Canal desconocido: {channel}")
+        return self._columns[channel]
+
+    def index_at(self, time):
+        """Índice de la última muestra con timestamp <= time"""
+        if self._length == 0:
+            return -1
+        index = int(np.searchsorted(self._columns['timestamp'], time, side='right')) - 1
+        return max(0, min(index, self._length - 1))
+
+    def index_range(self, t0, t1):
+        """Rango [start, end) de índices con t0 <= timestamp < t1"""
+        timestamps = self._columns['timestamp']
+        start = int(np.searchsorted(timestamps, t0, side='left'))
+        end = int(np.searchsorted(timestamps, t1, side='left'))
+        return start, max(start, end)
+
+    def series(self, channel, start=0, end=None):
+        """Vistas (timestamps, valores) de un canal entre dos índices"""
+        return (self._columns['timestamp'][start:end],
+                self.column(channel)[start:end])
+
+    def row(self, index):
+        """Diccionario con todos los canales de una muestra"""
+        return {name: present(name, self._columns[name][index:index + 1])[0]
+                for name in CHANNEL_NAMES}
+
+    def rows(self, start=0, end=None):
+        """Lista de diccionarios para un rango de índices"""
+        values = [present(name, self._columns[name][start:end]) for name in CHANNEL_NAMES]
+        return [dict(zip(CHANNEL_NAMES, sample)) for sample in zip(*values)]
+
+    def downsample(self, channel, t0, t1, buckets):
+        """Serie min/max de un canal en [t0, t1) con a lo sumo 2 × buckets puntos"""
+        key = (channel, t0, t1, buckets)
+        cached = self._downsample_cache.get(key)
+        if cached is not None:
+            self._downsample_cache.move_to_end(key)
+            return cached
+
+        start, end = self.index_range(t0, t1)
+        timestamps, values = self.series(channel, start, end)
+        indices = minmax_indices(values, max(1, int(buckets)))
+        result = {
+            'x': present('timestamp', timestamps[indices]),
+            'y': present(channel, values[indices]),
+        }
+
+        self._downsample_cache[key] = result
+        if len(self._downsample_cache) > DOWNSAMPLE_CACHE_SIZE:
+            self._downsample_cache.popitem(last=False)
+        return result
@@ -0,0 +1,143 @@
+"""
+Motor de alertas de telemetría basado en tabla
+
+Cada regla define canal(es), comparador, niveles de advertencia y crítico,
+banda de histéresis y tiempo mínimo de permanencia (dwell). La tabla se
+compila a arreglos NumPy y se evalúa en una sola pasada vectorizada sobre
+el vector de estado del frame:
+
+- las reglas '<' se niegan para que todas comparen "mayor que";
+- una regla con varios campos toma el peor valor (máximo tras el signo);
+- para salir de un nivel activo el valor debe retroceder la histéresis;
+- un cambio de nivel se confirma solo si se mantiene `dwell` segundos.
+
+El resultado es un vector de niveles (0 = sin alerta, 1 = advertencia,
+2 = crítico) por regla; la interfaz solo inserta o quita las filas cuyo
+nivel cambió. Los umbrales de gases se pueden cargar desde la
+configuración de detección de la Interfaz 1 (gasAlarm, coAlarm, o2Min...).
+"""
+
+import json
+
+import numpy as np
+
+from wire import STATE_FIELDS
+
+
+LEVEL_NONE = 0
+LEVEL_WARNING = 1
+LEVEL_CRITICAL = 2
+LEVEL_NAMES = {LEVEL_WARNING: 'warning', LEVEL_CRITICAL: 'critical'}
+
+# Tabla por defecto (umbrales históricos de la interfaz); None = nivel no usado
+DEFAULT_RULES = (
+    {'id': 'battery', 'fields': ('battery',), 'comparator': '<',
+     'warning': 30, 'critical': 20, 'hysteresis': 1.0, 'dwell': 1.0,
+     'messages': ("Batería baja < 30%", "Batería crítica < 20%")},
+    {'id': 'latency', 'fields': ('latency',), 'comparator': '>',
+     'warning': 100, 'critical': 150, 'hysteresis': 10.0, 'dwell': 0.5,
+     'messages': ("Latencia alta > 100ms", "Latencia crítica > 150ms")},
+    {'id': 'slam', 'fields': ('slam_confidence',), 'comparator': '<',
+     'warning': 80, 'critical': 70, 'hysteresis': 2.0, 'dwell': 0.5,
+     'messages': ("SLAM degradado", "Localización no confiable")},
+    {'id': 'obstacle_front', 'fields': ('obstacle_front',), 'comparator': '<',
+     'warning': 100, 'critical': 50, 'hysteresis': 5.0, 'dwell': 0.0,
+     'messages': ("Obstáculo frontal cercano", "¡Obstáculo frontal muy cercano!")},
+    {'id': 'motor_temp', 'fields': ('temp_motor1', 'temp_motor2', 'temp_motor3', 'temp_motor4'),
+     'comparator': '>', 'warning': 55, 'critical': 65, 'hysteresis': 1.0, 'dwell': 1.0,
+     'messages': ("Temperatura motores alta", "Temperatura motores crítica")},
+    {'id': 'ch4', 'fields': ('ch4',), 'comparator': '>',
+     'warning': None, 'critical': 1.0, 'hysteresis': 0.05, 'dwell': 0.3,
+     'messages': ("Nivel CH4 elevado", "¡Nivel CH4 peligroso!")},
+    {'id': 'co', 'fields': ('co',), 'comparator': '>',
+     'warning': None, 'critical': 25, 'hysteresis': 1.0, 'dwell': 0.3,
+     'messages': ("Nivel CO elevado", "¡Nivel CO peligroso!")},
+    {'id': 'h2s', 'fields': ('h2s',), 'comparator': '>',
+     'warning': None, 'critical': 10, 'hysteresis': 0.5, 'dwell': 0.3,
+     'messages': ("Nivel H2S elevado", "¡Nivel H2S peligroso!")},
+    {'id': 'o2', 'fields': ('o2',), 'comparator': '<',
+     'warning': 19.5, 'critical': None, 'hysteresis': 0.1, 'dwell': 0.3,
+     'messages': ("Nivel O2 bajo", "¡Nivel O2 crítico!")},
+)
+
+# Parámetros de MissionController._detectionConfig -> (regla, nivel)
+DETECTION_CONFIG_KEYS = {
+    'gasPreAlarm': ('ch4', 'warning'),
+    'gasAlarm': ('ch4', 'critical'),
+    'coPreAlarm': ('co', 'warning'),
+    'coAlarm': ('co', 'critical'),
+    'o2Min': ('o2', 'warning'),
+}
+
+
+def rules_from_detection_config(config, rules=DEFAULT_RULES):
+    """Copia de la tabla con los umbrales de gases de la configuración de detección"""
+    by_id = {rule['id']: dict(rule) for rule in rules}
+    for key, (rule_id, level) in DETECTION_CONFIG_KEYS.items():
+        if config.get(key) is not None:
+            by_id[rule_id][level] = float(config[key])
+    return tuple(by_id[rule['id']] for rule in rules)
+
+
+def load_detection_config(path):
+    """Lee un JSON con la configuración de detección (o {'detectionConfig': {...}})"""
+    with open(path, encoding='utf-8') as f:
+        config = json.load(f)
+    return config.get('detectionConfig', config)
+
+
+class AlertEngine:
+    """Tabla de reglas compilada y evaluada en una sola pasada"""
+
+    def __init__(self, rules=DEFAULT_RULES):
+        self.rules = tuple(rules)
+        n = len(self.rules)
+        field_index, field_sign, starts = [], [], []
+        sign = np.empty(n)
+        for i, rule in enumerate(self.rules):
+            if rule['comparator'] not in ('<', '>'):
+                raise ValueError(f"Comparador no soportado en '{rule['id']}': {rule['comparator']}")
+            sign[i] = -1.0 if rule['comparator'] == '<' else 1.0
+            starts.append(len(field_index))
+            for field in rule['fields']:
+                field_index.append(STATE_FIELDS.index(field))
+                field_sign.append(sign[i])
+
+        def level(name):
+            return np.array([np.nan if rule[name] is None else rule[name] for rule in self.rules])
+
+        self._field_index = np.array(field_index)
+        self._field_sign = np.array(field_sign)
+        self._starts = np.array(starts)
+        self._warning = sign * level('warning')    # NaN: el nivel nunca se activa
+        self._critical = sign * level('critical')
+        self._hysteresis = np.array([rule['hysteresis'] for rule in self.rules], dtype=np.float64)
+        self._dwell = np.array([rule['dwell'] for rule in self.rules], dtype=np.float64)
+
+        self.levels = np.zeros(n, dtype=np.int8)  # niveles confirmados (no se modifica in situ)
+        self._pending = np.zeros(n, dtype=np.int8)
+        self._pending_since = np.zeros(n)
+
+    def update(self, vector, now):
+        """Evalúa un vector de estado; True si cambió algún nivel confirmado"""
+        value = np.maximum.reduceat(vector[self._field_index] * self._field_sign, self._starts)
+        # La histéresis relaja el umbral de los niveles ya activos
+        critical = self._critical - self._hysteresis * (self.levels >= LEVEL_CRITICAL)
+        warning = self._warning - self._hysteresis * (self.levels >= LEVEL_WARNING)
+        target = np.where(value > critical, LEVEL_CRITICAL,
+                          np.where(value > warning, LEVEL_WARNING, LEVEL_NONE)).astype(np.int8)
+
+        moved = target != self._pending
+        self._pending_since[moved] = now
+        self._pending = target
+        commit = (target != self.levels) & (now - self._pending_since >= self._dwell)
+        if not commit.any():
+            return False
+        self.levels = np.where(commit, target, self.levels).astype(np.int8)
+        return True
+
+    def active(self, levels=None):
+        """Alertas activas como lista de dicts {type, message} (orden de la tabla)"""
+        levels = self.levels if levels is None else levels
+        return [{'type': LEVEL_NAMES[int(level)], 'message': self.rules[i]['messages'][int(level) - 1]}
+                for i, level in enumerate(levels) if level]
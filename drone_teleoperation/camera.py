@@ -0,0 +1,338 @@
+"""
+Canal de video de la cámara del dron
+
+Un hilo decodifica frames de una fuente (generador sintético o archivo de
+imagen local, fijo o animado) directamente en un conjunto fijo de buffers
+preasignados. Cada buffer es un arreglo NumPy envuelto por una QImage sobre
+la misma memoria: el proveedor de imágenes de QML (image://camera/<n>)
+entrega esa QImage sin copiarla y el scenegraph la sube como textura.
+
+Siempre se muestra el frame más reciente: si la interfaz no tomó el frame
+anterior cuando llega uno nuevo, el anterior se descarta (y se cuenta). Un
+buffer en pantalla o retenido por una captura (foto, evento marcado) no se
+reutiliza hasta liberarse, de modo que capturar no copia ni bloquea: el
+JPEG se escribe en un hilo aparte y luego se libera el buffer.
+
+Latencia glass-to-glass estimada: desde el inicio de la decodificación
+del frame hasta el intercambio de buffers de la ventana que lo muestra
+(más medio refresco de pantalla), o hasta su entrega a QML si la ventana
+no informa intercambios.
+"""
+
+import queue
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+from PyQt6 import sip
+from PyQt6.QtCore import QRect, QSize
+from PyQt6.QtGui import QImage, QImageReader, QPainter
+from PyQt6.QtQuick import QQuickImageProvider
+
+
+CAMERA_SIZE = (1280, 720)
+CAMERA_FPS = 30.0
+POOL_BUFFERS = 6         # decodificando, último publicado, en pantalla y capturas
+SCANOUT_DELAY = 0.008    # s: medio refresco de una pantalla de 60 Hz
+LATENCY_SMOOTHING = 0.1  # peso de cada muestra en el promedio exponencial
+JPEG_QUALITY = 90
+
+
+class FramePool:
+    """Buffers de frame preasignados y su estado (cualquier hilo)"""
+
+    def __init__(self, width, height, count=POOL_BUFFERS):
+        self.width = width
+        self.height = height
+        self.arrays = [np.zeros((height, width), dtype=np.uint32) for _ in range(count)]
+        # QImage escribible sobre la memoria del arreglo (0xffRRGGBB): sin copia
+        # (con un buffer de solo lectura QPainter haría una copia al pintar)
+        self.images = [QImage(sip.voidptr(array.ctypes.data), width, height, width * 4,
+                              QImage.Format.Format_RGB32) for array in self.arrays]
+        self.captured = [0.0] * count  # time.monotonic() al comenzar la decodificación
+        self.seq = [0] * count
+        self._pins = [0] * count       # escritura en curso o capturas pendientes
+        self._latest = None            # publicado y aún no tomado por la interfaz
+        self._shown = None             # en pantalla
+        self._lock = threading.Lock()
+        self.stale = 0                 # publicados y reemplazados sin mostrarse
+
+    def acquire(self):
+        """Buffer libre para decodificar; None si todos están ocupados"""
+        with self._lock:
+            for index, pins in enumerate(self._pins):
+                if pins == 0 and index != self._latest and index != self._shown:
+                    self._pins[index] = 1
+                    return index
+        return None
+
+    def publish(self, index):
+        """Publica un frame decodificado; True si la interfaz debe ser despertada"""
+        with self._lock:
+            self._pins[index] -= 1
+            previous, self._latest = self._latest, index
+            if previous is not None:
+                self.stale += 1
+            return previous is None
+
+    def take(self):
+        """El frame más reciente pasa a pantalla; None si no hay uno nuevo"""
+        with self._lock:
+            index, self._latest = self._latest, None
+            if index is not None:
+                self._shown = index
+            return index
+
+    def shown(self):
+        return self._shown
+
+    def pin_shown(self):
+        """Retiene el frame en pantalla (para capturarlo); None si no hay"""
+        with self._lock:
+            index = self._shown
+            if index is not None:
+                self._pins[index] += 1
+            return index
+
+    def unpin(self, index):
+        with self._lock:
+            self._pins[index] -= 1
+
+
+# ===== FUENTES =====
+# decode_into(arreglo, imagen) escribe un frame en el buffer (ambos comparten memoria)
+
+class SyntheticFrames:
+    """Patrón de prueba en movimiento generado con NumPy"""
+
+    def __init__(self, width, height, fps=CAMERA_FPS):
+        self.fps = fps
+        y, x = np.mgrid[0:height, 0:width]
+        red = (x * 255 // max(1, width - 1)).astype(np.uint32)
+        blue = (y * 255 // max(1, height - 1)).astype(np.uint32)
+        self._base = 0xFF000000 | (red << 16) | (blue // 2 << 8) | blue
+        self._bar = max(8, width // 40)
+        self._count = 0
+
+    def decode_into(self, array, image):
+        array[:] = self._base
+        width = array.shape[1]
+        start = (self._count * 4 * self._bar // 10) % (width - self._bar)
+        array[:, start:start + self._bar] = 0xFFFFFFFF
+        # Bloque con el número de frame en binario (para comprobar el orden)
+        for bit in range(16):
+            if self._count >> bit & 1:
+                array[8:24, 8 + bit * 16:8 + bit * 16 + 12] = 0xFF00FF00
+        self._count += 1
+
+
+class ImageFileFrames:
+    """Frames de un archivo de imagen (fijo, GIF animado u otro multi-frame)"""
+
+    def __init__(self, path, width, height, fps=CAMERA_FPS):
+        self.path = str(path)
+        self.fps = fps
+        self._target = QRect(0, 0, width, height)
+        self._reader = None
+        self._still = None
+        reader = QImageReader(self.path)
+        if not reader.canRead():
+            raise ValueError(f"No se puede leer el video de prueba: {self.path}")
+        if reader.supportsAnimation() and reader.imageCount() != 1:
+            self._reader = reader
+
+    def _render(self, image, target):
+        painter = QPainter(target)
+        painter.drawImage(self._target, image)
+        painter.end()
+
+    def decode_into(self, array, image):
+        if self._reader is None:
+            if self._still is None:
+                # Imagen fija: se decodifica y escala una vez; después solo se copia
+                self._render(QImageReader(self.path).read(), image)
+                self._still = array.copy()
+            else:
+                np.copyto(array, self._still)
+            return
+        frame = self._reader.read()
+        if frame.isNull():
+            self._reader = QImageReader(self.path)  # fin de la animación: se repite
+            frame = self._reader.read()
+        self._render(frame, image)
+
+
+def open_camera(spec, size=CAMERA_SIZE, fps=CAMERA_FPS):
+    """Fuente de video: 'synthetic', una ruta de imagen o None / 'none'"""
+    if spec in (None, '', 'none'):
+        return None
+    width, height = size
+    if spec == 'synthetic':
+        return SyntheticFrames(width, height, fps)
+    return ImageFileFrames(spec, width, height, fps)
+
+
+# ===== HILOS =====
+
+class CameraWorker(threading.Thread):
+    """Decodifica a la frecuencia de la fuente y publica el último frame"""
+
+    def __init__(self, source, pool, notify=None, clips=None):
+        super().__init__(name="camera-decode", daemon=True)
+        self.source = source
+        self.pool = pool
+        self.clips = clips  # miniaturas para las ventanas de eventos (event_clips.py)
+        self._notify = notify  # se llama desde este hilo (p. ej. emit de una señal Qt)
+        self._running = threading.Event()
+        self.decoded = 0
+        self.no_buffer = 0  # frames omitidos por no haber buffer libre
+        self.fps = 0.0
+
+    def run(self):
+        self._running.set()
+        pool = self.pool
+        period = 1.0 / self.source.fps
+        deadline = time.monotonic()
+        window_start, window_frames = deadline, 0
+        seq = 0
+        while self._running.is_set():
+            deadline += period
+            wait = deadline - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            elif wait < -period:
+                deadline = time.monotonic()  # atraso: sin ráfagas para recuperar
+
+            index = pool.acquire()
+            if index is None:
+                self.no_buffer += 1
+                continue
+            started = time.monotonic()
+            self.source.decode_into(pool.arrays[index], pool.images[index])
+            seq += 1
+            pool.captured[index] = started
+            pool.seq[index] = seq
+            if self.clips is not None:
+                self.clips.add_frame(pool.arrays[index], started)
+            self.decoded += 1
+            window_frames += 1
+            if pool.publish(index) and self._notify is not None:
+                self._notify()
+
+            now = time.monotonic()
+            if now - window_start >= 1.0:
+                self.fps = window_frames / (now - window_start)
+                window_start, window_frames = now, 0
+
+    def stop(self, timeout=1.0):
+        self._running.clear()
+        if self.is_alive():
+            self.join(timeout)
+
+
+class FrameWriter(threading.Thread):
+    """Escribe capturas JPEG de buffers retenidos y los libera"""
+
+    def __init__(self, pool, directory):
+        super().__init__(name="camera-writer", daemon=True)
+        self.pool = pool
+        self.directory = Path(directory)
+        self._queue = queue.SimpleQueue()
+        self.written = 0
+
+    def capture(self, prefix):
+        """Retiene el frame en pantalla y encola su escritura; devuelve el nombre o None"""
+        index = self.pool.pin_shown()
+        if index is None:
+            return None
+        name = f"{prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')[:-3]}.jpg"
+        self._queue.put((index, name))
+        return name
+
+    def run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            index, name = item
+            try:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                if self.pool.images[index].save(str(self.directory / name), 'JPG', JPEG_QUALITY):
+                    self.written += 1
+                else:
+                    print(f"⚠ No se pudo guardar la captura {name}")
+            finally:
+                self.pool.unpin(index)
+
+    def stop(self, timeout=5.0):
+        """Termina de escribir las capturas pendientes"""
+        self._queue.put(None)
+        if self.is_alive():
+            self.join(timeout)
+
+
+class CameraPipeline:
+    """Fuente + buffers + hilos de decodificación y de capturas"""
+
+    def __init__(self, source, capture_dir, size=CAMERA_SIZE, notify=None, clips=None):
+        self.pool = FramePool(*size)
+        self.worker = CameraWorker(source, self.pool, notify, clips)
+        self.writer = FrameWriter(self.pool, capture_dir)
+        self.latency = 0.0          # s, glass-to-glass estimada (promedio exponencial)
+        self._awaiting = None       # captura del frame entregado y aún no presentado
+        self._swaps = False
+
+    def start(self):
+        self.worker.start()
+        self.writer.start()
+        return self
+
+    def stop(self):
+        self.worker.stop()
+        self.writer.stop()
+
+    @property
+    def dropped(self):
+        return self.pool.stale + self.worker.no_buffer
+
+    def _add_latency(self, sample):
+        self.latency = sample if not self.latency else \
+            self.latency + LATENCY_SMOOTHING * (sample - self.latency)
+
+    def take(self):
+        """Pasa a pantalla el último frame (hilo de Qt); su número o None"""
+        index = self.pool.take()
+        if index is None:
+            return None
+        if self._swaps:
+            self._awaiting = self.pool.captured[index]
+        else:
+            self._add_latency(time.monotonic() - self.pool.captured[index])
+        return self.pool.seq[index]
+
+    def frame_presented(self):
+        """QQuickWindow.frameSwapped (hilo de render, conexión directa)"""
+        self._swaps = True
+        captured, self._awaiting = self._awaiting, None
+        if captured is not None:
+            self._add_latency(time.monotonic() - captured + SCANOUT_DELAY)
+
+    def capture(self, prefix):
+        return self.writer.capture(prefix)
+
+
+class CameraImageProvider(QQuickImageProvider):
+    """image://camera/<n>: el frame en pantalla, sin copias"""
+
+    def __init__(self, pool):
+        super().__init__(QQuickImageProvider.ImageType.Image)
+        self._pool = pool
+        self._empty = QImage(1, 1, QImage.Format.Format_RGB32)
+        self._empty.fill(0)
+
+    def requestImage(self, image_id, requested_size):
+        index = self._pool.shown()
+        image = self._empty if index is None else self._pool.images[index]
+        return image, QSize(image.width(), image.height())
@@ -0,0 +1,331 @@
+"""
+Lazo de comandos de movimiento a frecuencia fija
+
+Los joysticks virtuales y el teclado solo escriben la posición de los
+mandos (StickState). Un hilo dedicado la muestrea a frecuencia fija
+(50 Hz por defecto), aplica la sensibilidad y el modo precisión, limita
+la magnitud y la tasa de cambio de cada eje y envía un único comando por
+ciclo. Así la frecuencia de comandos y el paso de integración ya no
+dependen de la repetición de teclas del sistema ni de la frecuencia de
+eventos del puntero: varios eventos dentro de un ciclo se funden en uno.
+
+Las escrituras del teclado llevan un plazo de vigencia (KEYBOARD_LEASE):
+la interfaz las renueva mientras hay teclas pulsadas y, si dejan de
+llegar (una liberación perdida, la ventana sin foco), el lazo trata los
+mandos como soltados en lugar de repetir el último comando.
+
+Comando enviado: vx, vy, vz (m/s) y velocidad de guiñada (°/s). En tierra
+el lazo no envía nada; los heartbeats del enlace los envía el vigilante
+(watchdog.py).
+
+La parada de emergencia queda retenida en el lazo: configure() no la
+borra (un slot de la interfaz en cola no reactiva el movimiento) y solo
+rearm() la levanta. La consulta del estado de vuelo y el envío de cada
+ciclo ocurren bajo el mismo cerrojo que la parada, así que ningún
+comando de movimiento sale después de que emergency_stop() retorna.
+
+Medición de deriva del reloj y latencia agregada por el lazo:
+    python command_loop.py --bench
+"""
+
+import argparse
+import random
+import threading
+import time
+
+import numpy as np
+
+
+COMMAND_RATE_HZ = 50.0
+
+# Factores de la sensibilidad y del modo precisión
+SENSITIVITY_FACTORS = {'soft': 0.6, 'normal': 1.0, 'aggressive': 1.4}
+PRECISION_FACTOR = 0.5
+
+# Por eje del comando (vx, vy, vz, guiñada): escala del mando a plena
+# deflexión, magnitud máxima y tasa de cambio máxima por segundo
+COMMAND_SCALE = (1.0, 1.0, 1.0, 45.0)
+COMMAND_LIMITS = (1.5, 1.5, 1.0, 60.0)
+SLEW_LIMITS = (3.0, 3.0, 2.0, 180.0)
+
+TIMING_SAMPLES = 4096
+
+# Vigencia de una escritura del teclado sin renovar (la interfaz la renueva
+# cada KEYBOARD_REFRESH_MS mientras hay teclas pulsadas)
+KEYBOARD_LEASE = 0.3
+KEYBOARD_REFRESH_MS = 100
+
+
+class StickState:
+    """Última posición de los mandos (escribe el hilo de Qt, lee el lazo)
+
+    Los ejes se reemplazan como una tupla completa: la lectura desde el
+    lazo siempre ve un estado coherente, sin bloqueos.
+    """
+
+    def __init__(self):
+        self._sample = (0, 0.0, (0.0, 0.0, 0.0, 0.0), None)  # versión, instante, ejes, vencimiento
+
+    def set(self, throttle=None, yaw=None, pitch=None, roll=None, lease=None):
+        """Actualiza los ejes indicados (el resto conserva su valor)
+
+        Con `lease` (s) la posición vence si no se vuelve a escribir dentro
+        de ese plazo; sin él no vence nunca.
+        """
+        version, _, axes, _ = self._sample
+        new = (throttle, yaw, pitch, roll)
+        axes = tuple(old if value is None else max(-1.0, min(1.0, value))
+                     for old, value in zip(axes, new))
+        now = time.monotonic()
+        self._sample = (version + 1, now, axes, None if lease is None else now + lease)
+
+    def release(self):
+        """Mandos al centro"""
+        self.set(0.0, 0.0, 0.0, 0.0)
+
+    def sample(self):
+        """(versión, instante de la última escritura, (throttle, yaw, pitch, roll), vencimiento)"""
+        return self._sample
+
+
+class CommandTiming:
+    """Muestras recientes de retraso de cada ciclo y latencia mando -> envío"""
+
+    def __init__(self, size=TIMING_SAMPLES):
+        self.lateness = np.zeros(size)  # s de atraso del despertar respecto del plazo
+        self.latency = np.zeros(size)   # s desde la escritura del mando hasta el envío
+        self._cycles = 0
+        self._inputs = 0
+        self.overruns = 0   # ciclos saltados por atraso mayor a un periodo
+        self.coalesced = 0  # escrituras de mandos fundidas con otra en el mismo ciclo
+        self.expired = 0    # posiciones del teclado vencidas sin renovar
+
+    def add_cycle(self, lateness):
+        self.lateness[self._cycles % len(self.lateness)] = lateness
+        self._cycles += 1
+
+    def add_input(self, latency):
+        self.latency[self._inputs % len(self.latency)] = latency
+        self._inputs += 1
+
+    @staticmethod
+    def _summary(samples, count):
+        window = samples[:min(count, len(samples))] * 1000.0
+        if not len(window):
+            return {'p50': 0.0, 'p99': 0.0, 'max': 0.0}
+        p50, p99 = np.percentile(window, (50, 99))
+        return {'p50': float(p50), 'p99': float(p99), 'max': float(window.max())}
+
+    def summary(self):
+        """Resumen en ms de las muestras recientes"""
+        return {
+            'cycles': self._cycles,
+            'inputs': self._inputs,
+            'overruns': self.overruns,
+            'coalesced': self.coalesced,
+            'expired': self.expired,
+            'lateness_ms': self._summary(self.lateness, self._cycles),
+            'latency_ms': self._summary(self.latency, self._inputs),
+        }
+
+
+def shape_command(axes, sensitivity='normal', precision=False):
+    """Mandos (throttle, yaw, pitch, roll) -> comando objetivo (vx, vy, vz, guiñada)"""
+    throttle, yaw, pitch, roll = axes
+    factor = SENSITIVITY_FACTORS.get(sensitivity, 1.0) * (PRECISION_FACTOR if precision else 1.0)
+    target = (pitch, roll, throttle, yaw)
+    return tuple(max(-limit, min(limit, value * factor * scale))
+                 for value, scale, limit in zip(target, COMMAND_SCALE, COMMAND_LIMITS))
+
+
+class CommandLoop(threading.Thread):
+    """Hilo que publica un comando de movimiento por ciclo mientras se vuela"""
+
+    def __init__(self, source, sticks=None, rate_hz=COMMAND_RATE_HZ, recorder=None):
+        super().__init__(name="command-loop", daemon=True)
+        self.source = source
+        self.sticks = sticks or StickState()
+        self.period = 1.0 / rate_hz
+        self.recorder = recorder
+        self.timing = CommandTiming()
+        self.sent = 0
+        self._config = (False, True, 'normal', False)  # en vuelo, altitud fija, sensibilidad, precisión
+        self._command = (0.0, 0.0, 0.0, 0.0)
+        self._reset = False
+        self._estopped = False
+        self._send_lock = threading.Lock()  # consulta de vuelo + envío frente a la parada
+        self._running = threading.Event()
+
+    def configure(self, flying, altitude_hold, sensitivity, precision):
+        """Estado de vuelo y de modelado del comando (desde el hilo de Qt)"""
+        self._config = (flying, altitude_hold, sensitivity, precision)
+
+    @property
+    def flying(self):
+        return self._config[0] and not self._estopped
+
+    @property
+    def estopped(self):
+        return self._estopped
+
+    @property
+    def altitude_hold(self):
+        return self._config[1]
+
+    def hold(self):
+        """Centra los mandos y descarta la rampa: el próximo comando es nulo"""
+        self.sticks.release()
+        self._reset = True
+
+    def disengage(self):
+        """Deja de enviar movimiento hasta la próxima configuración (cualquier hilo)"""
+        self._config = (False,) + self._config[1:]
+        self.hold()
+
+    def emergency_stop(self):
+        """Parada retenida (cualquier hilo): al retornar ya no sale ningún movimiento"""
+        with self._send_lock:
+            # Un ciclo que ya leyó "en vuelo" termina su envío antes de tomar el cerrojo
+            self._estopped = True
+            self._config = (False,) + self._config[1:]
+        self.hold()
+
+    def rearm(self):
+        """Levanta la parada retenida (armado explícito del operador)"""
+        self._estopped = False
+
+    def _step(self, axes):
+        """Aplica el límite de tasa de cambio hacia el comando objetivo"""
+        _, _, sensitivity, precision = self._config
+        target = shape_command(axes, sensitivity, precision)
+        if self._reset:
+            self._reset = False
+            self._command = (0.0, 0.0, 0.0, 0.0)
+        self._command = tuple(current + max(-slew * self.period, min(slew * self.period, goal - current))
+                              for current, goal, slew in zip(self._command, target, SLEW_LIMITS))
+        return self._command
+
+    def run(self):
+        self._running.set()
+        timing = self.timing
+        last_version = self.sticks.sample()[0]
+        expired = False
+        deadline = time.monotonic()
+        while self._running.is_set():
+            # Plazos absolutos: el error de cada sleep no se acumula
+            deadline += self.period
+            wait = deadline - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            now = time.monotonic()
+            late = now - deadline
+            if late > self.period:
+                # Atraso mayor a un ciclo: se realinea en vez de ráfagas de comandos
+                timing.overruns += int(late // self.period)
+                deadline = now
+            timing.add_cycle(max(0.0, late))
+
+            version, written, axes, expires = self.sticks.sample()
+            fresh = version != last_version
+            if fresh:
+                timing.coalesced += version - last_version - 1
+                last_version = version
+                expired = False
+                if self.recorder is not None:
+                    self.recorder.record_movement(*axes)
+            if expires is not None and now > expires:
+                # Entrada sin renovar: mandos soltados, no el último comando
+                if not expired:
+                    expired = True
+                    timing.expired += 1
+                    if self.recorder is not None:
+                        self.recorder.record_movement(0.0, 0.0, 0.0, 0.0)
+                axes = (0.0, 0.0, 0.0, 0.0)
+            with self._send_lock:
+                flying, altitude_hold = self._config[:2]
+                if not flying or self._estopped:
+                    self._command = (0.0, 0.0, 0.0, 0.0)
+                    continue
+                vx, vy, vz, yaw_rate = self._step(axes)
+                self.source.send_movement(vx, vy, vz, yaw_rate, altitude_hold)
+            self.sent += 1
+            if fresh:
+                timing.add_input(time.monotonic() - written)
+
+    def stop(self, timeout=1.0):
+        self._running.clear()
+        if self.is_alive():
+            self.join(timeout)
+
+
+# ===== MEDICIÓN =====
+
+class _NullSource:
+    def __init__(self):
+        self.commands = 0
+        self.last = (0.0, 0.0, 0.0, 0.0)
+
+    def send_movement(self, vx, vy, vz, yaw_rate, altitude_hold=True):
+        self.commands += 1
+        self.last = (vx, vy, vz, yaw_rate)
+
+
+def _lease_check(rate_hz):
+    """Tecla mantenida cuya liberación se pierde: el comando debe volver a cero"""
+    source = _NullSource()
+    loop = CommandLoop(source, rate_hz=rate_hz)
+    loop.configure(True, True, 'normal', False)
+    loop.start()
+    loop.sticks.set(1.0, 0.0, 0.0, 0.0, lease=KEYBOARD_LEASE)
+    pressed = time.monotonic()
+    released = None
+    while time.monotonic() - pressed < KEYBOARD_LEASE * 4:
+        time.sleep(loop.period / 2)
+        if released is None and source.last[2] == 0.0 and time.monotonic() - pressed > loop.period * 2:
+            released = time.monotonic() - pressed
+    loop.stop()
+    if released is not None and source.last == (0.0, 0.0, 0.0, 0.0):
+        print(f"  ✓ tecla sin renovar: comando nulo a los {released * 1000:.0f} ms "
+              f"(vigencia {KEYBOARD_LEASE * 1000:.0f} ms)")
+    else:
+        print(f"  ⚠ tecla sin renovar: el comando sigue en {source.last}")
+
+
+def _bench(duration, rate_hz, input_hz):
+    """Mandos escritos a `input_hz` con intervalos irregulares; mide el lazo"""
+    loop = CommandLoop(_NullSource(), rate_hz=rate_hz)
+    loop.configure(True, True, 'normal', False)
+    loop.start()
+    rng = random.Random(1)
+    end = time.monotonic() + duration
+    while time.monotonic() < end:
+        loop.sticks.set(throttle=rng.uniform(-1, 1), pitch=rng.uniform(-1, 1))
+        time.sleep(rng.expovariate(input_hz))
+    loop.stop()
+    summary = loop.timing.summary()
+    expected = duration * rate_hz
+    print(f"Lazo {rate_hz:.0f} Hz, mandos ~{input_hz:.0f} eventos/s durante {duration:.0f} s")
+    print(f"  comandos enviados  {loop.sent} (esperados ~{expected:.0f}), saltos {summary['overruns']}")
+    print(f"  eventos de mandos  {summary['inputs'] + summary['coalesced']}, fundidos {summary['coalesced']}")
+    for key, label in (('lateness_ms', 'atraso del ciclo'), ('latency_ms', 'latencia mando->envío')):
+        s = summary[key]
+        print(f"  {label:22s} p50 {s['p50']:.3f} ms  p99 {s['p99']:.3f} ms  máx {s['max']:.3f} ms")
+    _lease_check(rate_hz)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lazo de comandos a frecuencia fija")
+    parser.add_argument('--bench', action='store_true', help="medir deriva y latencia del lazo")
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--rate', type=float, default=COMMAND_RATE_HZ)
+    parser.add_argument('--input-rate', type=float, default=120.0,
+                        help="eventos de mandos por segundo (repetición de teclas / arrastre)")
+    args = parser.parse_args()
+    if args.bench:
+        _bench(args.duration, args.rate, args.input_rate)
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
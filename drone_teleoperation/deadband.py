@@ -0,0 +1,91 @@
+"""
+Notificaciones de telemetría por grupo con banda muerta
+
+Cada campo tiene una resolución (banda muerta): el valor se cuantiza con
+floor(valor / banda) y un grupo solo se notifica cuando cambia el valor
+cuantizado de alguno de sus campos. Las bandas por defecto coinciden con
+lo que muestra la interfaz (toFixed(0) -> 0.5, toFixed(1) -> 0.05, ...),
+de modo que tanto el redondeo del texto como los umbrales de color
+enteros caen en bordes de la cuantización.
+"""
+
+import numpy as np
+
+from wire import STATE_FIELDS
+
+
+# Grupo de notificación de cada campo del frame
+FIELD_GROUPS = {
+    'battery': 'battery',
+    'signal_strength': 'link', 'latency': 'link', 'slam_confidence': 'link',
+    'x': 'attitude', 'y': 'attitude', 'z': 'attitude',
+    'vx': 'attitude', 'vy': 'attitude', 'vz': 'attitude',
+    'roll': 'attitude', 'pitch': 'attitude', 'yaw': 'attitude',
+    'obstacle_front': 'obstacles', 'obstacle_back': 'obstacles', 'obstacle_left': 'obstacles',
+    'obstacle_right': 'obstacles', 'obstacle_top': 'obstacles', 'obstacle_bottom': 'obstacles',
+    'temp_motor1': 'thermal', 'temp_motor2': 'thermal', 'temp_motor3': 'thermal',
+    'temp_motor4': 'thermal', 'temp_controller': 'thermal', 'temp_battery': 'thermal',
+    'ch4': 'gases', 'co': 'gases', 'o2': 'gases', 'h2s': 'gases',
+}
+
+GROUPS = ('link', 'attitude', 'obstacles', 'thermal', 'gases', 'battery')
+
+DEFAULT_DEADBANDS = {
+    'battery': 0.5,                  # toFixed(0)
+    'signal_strength': 1.0,          # entero
+    'latency': 1.0,                  # entero
+    'slam_confidence': 0.5,          # toFixed(0)
+    'x': 0.005, 'y': 0.005, 'z': 0.005,  # toFixed(2)
+    'vx': 0.01, 'vy': 0.01, 'vz': 0.01,
+    'roll': 0.05, 'pitch': 0.05, 'yaw': 0.05,  # toFixed(1)
+    'obstacle_front': 1.0, 'obstacle_back': 1.0, 'obstacle_left': 1.0,  # cm
+    'obstacle_right': 1.0, 'obstacle_top': 1.0, 'obstacle_bottom': 1.0,
+    'temp_motor1': 0.5, 'temp_motor2': 0.5, 'temp_motor3': 0.5,  # toFixed(0)
+    'temp_motor4': 0.5, 'temp_controller': 0.5, 'temp_battery': 0.5,
+    'ch4': 0.005,                    # toFixed(2)
+    'co': 0.05, 'o2': 0.05, 'h2s': 0.05,  # toFixed(1)
+}
+
+
+class DeadbandFilter:
+    """Decide qué grupos notificar para cada vector de estado"""
+
+    def __init__(self, deadbands=None):
+        bands = dict(DEFAULT_DEADBANDS)
+        bands.update(deadbands or {})
+        self._bands = np.array([bands[name] for name in STATE_FIELDS], dtype=np.float64)
+        self._groups = [(group, np.array([i for i, name in enumerate(STATE_FIELDS)
+                                          if FIELD_GROUPS[name] == group]))
+                        for group in GROUPS]
+        self._last = None
+        self.emitted = dict.fromkeys(GROUPS, 0)
+        self.updates = 0
+
+    def set_deadband(self, name, value):
+        """Cambia la banda de un campo; el próximo vector notifica su grupo"""
+        index = STATE_FIELDS.index(name)
+        self._bands[index] = max(float(value), 1e-9)
+        if self._last is not None:
+            self._last[index] = np.nan
+
+    def deadband(self, name):
+        return float(self._bands[STATE_FIELDS.index(name)])
+
+    def reset(self):
+        """Olvida el último vector: el próximo notifica todos los grupos"""
+        self._last = None
+
+    def update(self, values):
+        """Grupos cuyo valor visible cambió (`values` alineado con STATE_FIELDS)"""
+        quantized = np.floor(values / self._bands)
+        self.updates += 1
+        if self._last is None:
+            self._last = quantized
+            changed_groups = list(GROUPS)
+        else:
+            changed = quantized != self._last
+            self._last = quantized
+            changed_groups = [group for group, indices in self._groups if changed[indices].any()]
+        for group in changed_groups:
+            self.emitted[group] += 1
+        return changed_groups
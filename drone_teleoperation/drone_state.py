@@ -0,0 +1,108 @@
+"""
+Estado del dron con disposición fija
+
+La telemetría vive en un frame del protocolo (wire.py): 29 campos float32
+con desplazamiento fijo sobre un único buffer de 132 bytes. Cargar el
+snapshot del hilo de ingesta, tomar una copia, comparar con el frame
+anterior (DeadbandFilter) o entregar los bytes al registrador son una
+sola copia o comparación del buffer, sin diccionarios ni atributos
+sueltos por campo.
+
+Los campos de telemetría se leen y escriben por nombre como atributos
+(`state.battery`, `state.ch4`) y por grupos contiguos con los tramos
+POSITION, VELOCITY, ORIENTATION y GASES sobre `state.vector`. El resto del
+estado (modos, cámara, controles, misión) son atributos en __slots__.
+"""
+
+from simulator import INITIAL_TELEMETRY
+from wire import STATE_FIELDS, new_frame, state_vector
+
+
+def _span(first, last):
+    """Tramo de campos contiguos del frame, de `first` a `last` inclusive"""
+    return slice(STATE_FIELDS.index(first), STATE_FIELDS.index(last) + 1)
+
+
+POSITION = _span('x', 'z')
+VELOCITY = _span('vx', 'vz')
+ORIENTATION = _span('roll', 'yaw')
+GASES = _span('ch4', 'h2s')
+
+
+class DroneState:
+    """Estado del dron en tiempo real (hilo de Qt)"""
+
+    __slots__ = (
+        'frame', 'vector',
+        # Estado de vuelo
+        '_is_connected', '_is_armed', '_is_flying', '_flight_mode',
+        # Modos asistidos
+        '_altitude_hold', '_speed_limiter', '_auto_brake', '_collision_avoidance',
+        # Cámara
+        '_camera_recording', '_camera_profile', '_exposure_lock', '_camera_tilt',
+        # Controles
+        '_control_mode', '_sensitivity', '_precision_mode',
+        # Misión
+        '_mission_time', '_distance_traveled', '_events_marked',
+    )
+
+    def __init__(self):
+        # Telemetría: frame del protocolo + vista float32 de sus campos
+        self.frame = new_frame()
+        self.vector = state_vector(self.frame)
+        self.vector[:] = [INITIAL_TELEMETRY[name] for name in STATE_FIELDS]
+
+        # Estado de vuelo
+        self._is_connected = True
+        self._is_armed = False
+        self._is_flying = False
+        self._flight_mode = "MANUAL"  # MANUAL, ASSISTED, AUTO
+
+        # Modos asistidos
+        self._altitude_hold = True
+        self._speed_limiter = True
+        self._auto_brake = True
+        self._collision_avoidance = True
+
+        # Cámara
+        self._camera_recording = False
+        self._camera_profile = "normal"  # low_light, high_clarity, anti_noise, normal
+        self._exposure_lock = False
+        self._camera_tilt = 0  # -90 a +30 grados
+
+        # Controles
+        self._control_mode = "keyboard"  # keyboard, joystick
+        self._sensitivity = "normal"  # soft, normal, aggressive
+        self._precision_mode = False
+
+        # Misión
+        self._mission_time = 0  # segundos
+        self._distance_traveled = 0.0
+        self._events_marked = []
+
+    def load(self, frame):
+        """Reemplaza la telemetría con un frame recibido (una copia de bytes)"""
+        self.frame.copy_from(frame)
+
+    def snapshot(self):
+        """Copia independiente de la telemetría actual (RecordBuffer)"""
+        return self.frame.copy()
+
+    def fields(self, span):
+        """Campos de un tramo como diccionario {nombre: valor}"""
+        return dict(zip(STATE_FIELDS[span], self.vector[span].tolist()))
+
+
+def _telemetry_property(index):
+    def getter(self):
+        return float(self.vector[index])
+
+    def setter(self, value):
+        self.vector[index] = value
+
+    return property(getter, setter, doc=f"Campo '{STATE_FIELDS[index]}' del frame de estado")
+
+
+for _index, _name in enumerate(STATE_FIELDS):
+    setattr(DroneState, _name, _telemetry_property(_index))
+del _index, _name
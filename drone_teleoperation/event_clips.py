@@ -0,0 +1,290 @@
+"""
+Ventanas de telemetría y video alrededor de los eventos marcados
+
+Los hilos de ingesta y de video escriben continuamente en anillos de
+tamaño fijo preasignados (SampleRing): cada frame de telemetría completo y
+una miniatura de la cámara a baja frecuencia, con su instante de
+recepción. Marcar un evento solo anota el instante y encola el pedido
+(O(1), sin copias ni E/S en el hilo de Qt).
+
+Un hilo escritor espera a que transcurran los segundos posteriores al
+evento, ubica por búsqueda binaria las muestras de la ventana
+[evento - PRE, evento + POST] y copia solo esas (no el anillo completo)
+directamente a un archivo .npz comprimido. Los anillos no se bloquean: después de
+copiar se verifica que el productor no haya sobrescrito la ventana y se
+descartan (y cuentan) las muestras que sí lo fueron. Varios eventos
+seguidos comparten los anillos; cada uno copia únicamente su ventana.
+
+Contenido del .npz (tiempos en s relativos al evento):
+
+    event            JSON del evento marcado
+    fields           nombres de los campos de estado (wire.py)
+    telemetry        frames de estado (FRAME_DTYPE)
+    telemetry_t      instante de cada frame
+    frames           miniaturas 0xffRRGGBB (n × alto × ancho, uint32)
+    frames_t         instante de cada miniatura
+
+Medición de marcado en ráfaga:
+    python event_clips.py --bench
+"""
+
+import argparse
+import bisect
+import heapq
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from wire import FRAME_DTYPE, STATE_FIELDS
+
+
+PRE_EVENT_SECONDS = 10.0
+POST_EVENT_SECONDS = 5.0
+TELEMETRY_CAPACITY = 16384  # ~32 s a 500 Hz
+THUMBNAIL_STEP = 4          # 1280×720 -> 320×180
+THUMBNAIL_RATE = 5.0        # miniaturas por segundo
+RING_HEADROOM = 2.0         # capacidad / (PRE + POST): margen para el escritor
+
+
+class SampleRing:
+    """Anillo preasignado de muestras con marca de tiempo
+
+    Un único productor escribe; cualquier hilo puede leer una ventana. El
+    contador `written` solo avanza después de escribir la muestra, y el
+    lector lo vuelve a consultar tras copiar para detectar sobrescrituras.
+    """
+
+    def __init__(self, capacity, shape=(), dtype=np.float32):
+        self.capacity = capacity
+        self.data = np.zeros((capacity,) + tuple(shape), dtype=dtype)
+        self.times = np.zeros(capacity)
+        self.written = 0
+
+    def append(self, t, value):
+        """Copia `value` (arreglo o registro) en el siguiente lugar del anillo"""
+        slot = self.written % self.capacity
+        self.data[slot] = value
+        self.times[slot] = t
+        self.written += 1
+
+    def _time_at(self, count):
+        return self.times[count % self.capacity]
+
+    def span(self, start, end):
+        """Contadores [lo, hi) de las muestras con instante en [start, end]"""
+        written = self.written
+        counts = range(max(0, written - self.capacity + 1), written)
+        lo = bisect.bisect_left(counts, start, key=self._time_at)
+        hi = bisect.bisect_right(counts, end, key=self._time_at)
+        return counts.start + lo, counts.start + hi
+
+    def copy(self, lo, hi):
+        """(instantes, datos, perdidas) de las muestras [lo, hi)
+
+        Solo se copian las muestras pedidas; las que el productor alcanzó a
+        sobrescribir durante la copia se descartan y se informan.
+        """
+        slots = np.arange(lo, hi) % self.capacity
+        times = self.times[slots]
+        data = self.data[slots]
+        # La muestra `written` puede estar escribiéndose: su lugar es el de written - capacity
+        valid = max(lo, self.written + 1 - self.capacity)
+        lost = min(hi, valid) - lo
+        return times[lost:], data[lost:], lost
+
+
+class EventClips:
+    """Anillos de telemetría y miniaturas + hilo que persiste las ventanas"""
+
+    def __init__(self, directory, frame_size=None, pre=PRE_EVENT_SECONDS, post=POST_EVENT_SECONDS,
+                 telemetry_capacity=TELEMETRY_CAPACITY):
+        self.directory = Path(directory) if directory is not None else None  # None: no guarda
+        self.pre = pre
+        self.post = post
+        self.telemetry = SampleRing(telemetry_capacity, (), FRAME_DTYPE)
+        self.frames = None
+        self._thumbnail_period = 1.0 / THUMBNAIL_RATE
+        self._next_thumbnail = 0.0
+        if frame_size is not None:
+            width, height = frame_size
+            capacity = int((pre + post) * THUMBNAIL_RATE * RING_HEADROOM) + 1
+            self.frames = SampleRing(capacity, (-(-height // THUMBNAIL_STEP), -(-width // THUMBNAIL_STEP)),
+                                     np.uint32)
+        self.saved = []
+        self.lost = 0  # muestras sobrescritas antes de persistirse
+        self._pending = []  # heap de (instante de guardado, orden, evento, instante, nombre)
+        self._order = 0
+        self._wake = threading.Condition()
+        self._thread = None
+
+    # ===== PRODUCTORES (hilos de ingesta y de video) =====
+
+    def add_telemetry(self, record, received):
+        """Frame de estado (registro FRAME_DTYPE) recibido en `received`"""
+        self.telemetry.append(received, record)
+
+    def add_frame(self, array, captured):
+        """Frame de la cámara; se guarda una miniatura cada 1/THUMBNAIL_RATE s"""
+        if self.frames is None or captured < self._next_thumbnail:
+            return
+        self._next_thumbnail = max(self._next_thumbnail + self._thumbnail_period, captured)
+        self.frames.append(captured, array[::THUMBNAIL_STEP, ::THUMBNAIL_STEP])
+
+    # ===== MARCADO (hilo de Qt) =====
+
+    def mark(self, event, prefix="EVT"):
+        """Encola la ventana del evento; devuelve el nombre del archivo o None"""
+        if self._thread is None:
+            return None
+        now = time.monotonic()
+        name = f"{prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')[:-3]}.npz"
+        with self._wake:
+            self._order += 1
+            heapq.heappush(self._pending, (now + self.post, self._order, dict(event), now, name))
+            self._wake.notify()
+        return name
+
+    # ===== CICLO DE VIDA =====
+
+    def start(self):
+        if self.directory is None:
+            return self
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="event-clips", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=5.0):
+        """Guarda de inmediato las ventanas pendientes (con lo registrado hasta ahora)"""
+        if self._thread is None:
+            return
+        thread, self._thread = self._thread, None
+        with self._wake:
+            self._running = False
+            self._wake.notify()
+        thread.join(timeout)
+
+    # ===== HILO ESCRITOR =====
+
+    def _run(self):
+        while True:
+            with self._wake:
+                while self._running and not (self._pending and self._pending[0][0] <= time.monotonic()):
+                    self._wake.wait(self._pending[0][0] - time.monotonic() if self._pending else None)
+                if not self._pending:
+                    return
+                _, _, event, marked, name = heapq.heappop(self._pending)
+            try:
+                self._save(event, marked, name)
+            except OSError as e:
+                print(f"⚠ No se pudo guardar la ventana del evento {name}: {e}")
+
+    def _window(self, ring, marked):
+        if ring is None:
+            return np.zeros(0), None
+        lo, hi = ring.span(marked - self.pre, marked + self.post)
+        times, data, lost = ring.copy(lo, hi)
+        self.lost += lost
+        return times - marked, data
+
+    def _save(self, event, marked, name):
+        telemetry_t, telemetry = self._window(self.telemetry, marked)
+        frames_t, frames = self._window(self.frames, marked)
+        if frames is None:
+            frames = np.zeros((0, 0, 0), dtype=np.uint32)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / name
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            np.savez_compressed(f, event=np.array(json.dumps(event, default=str)), fields=np.array(STATE_FIELDS),
+                     telemetry=telemetry, telemetry_t=telemetry_t, frames=frames, frames_t=frames_t)
+        os.replace(tmp_path, path)
+        self.saved.append(path)
+
+
+def load_clip(path):
+    """Lee una ventana guardada: dict con el evento y los arreglos del .npz"""
+    with np.load(path) as data:
+        clip = {key: data[key] for key in data.files}
+    clip['event'] = json.loads(str(clip['event']))
+    return clip
+
+
+# ===== MEDICIÓN =====
+
+def _bench(args):
+    """Telemetría y video sintéticos; eventos marcados en ráfaga"""
+    from wire import new_frame, state_vector
+
+    directory = Path(tempfile.mkdtemp(prefix="event_clips_"))
+    clips = EventClips(directory, frame_size=(1280, 720), pre=args.pre, post=args.post).start()
+    running = threading.Event()
+    running.set()
+
+    def telemetry():
+        frame = new_frame()
+        vector = state_vector(frame)
+        period = 1.0 / args.rate
+        while running.is_set():
+            vector[:] = np.random.random(len(vector))
+            clips.add_telemetry(frame.record, time.monotonic())
+            time.sleep(period)
+
+    def video():
+        image = np.zeros((720, 1280), dtype=np.uint32)
+        while running.is_set():
+            image[:] = int(time.monotonic() * 1000) & 0xFFFFFF
+            clips.add_frame(image, time.monotonic())
+            time.sleep(1 / 30)
+
+    producers = [threading.Thread(target=target, daemon=True) for target in (telemetry, video)]
+    for thread in producers:
+        thread.start()
+    time.sleep(args.pre)
+    mark_times = []
+    for i in range(args.events):
+        started = time.perf_counter()
+        clips.mark({'type': 'gas', 'index': i})
+        mark_times.append(time.perf_counter() - started)
+        time.sleep(0.05)
+    time.sleep(args.post + 1.0)
+    running.clear()
+    clips.stop()
+
+    ring_bytes = clips.telemetry.data.nbytes + clips.frames.data.nbytes
+    sizes = [path.stat().st_size for path in clips.saved]
+    first = load_clip(clips.saved[0]) if clips.saved else None
+    print(f"{args.events} eventos marcados cada 50 ms, ventana -{args.pre:.0f} s / +{args.post:.0f} s, "
+          f"telemetría {args.rate:.0f} Hz")
+    print(f"  mark()            p50 {np.median(mark_times) * 1e6:.0f} µs  máx {max(mark_times) * 1e6:.0f} µs")
+    print(f"  anillos           {ring_bytes / 1e6:.1f} MB preasignados")
+    if first is not None:
+        print(f"  por evento        {len(first['telemetry'])} frames de estado, {len(first['frames'])} miniaturas, "
+              f"{np.mean(sizes) / 1e6:.1f} MB")
+    print(f"  guardados         {len(clips.saved)} en {directory}, muestras perdidas {clips.lost}")
+    ok = len(clips.saved) == args.events and clips.lost == 0
+    print(f"{'✓' if ok else '⚠'} Ventanas completas")
+    return 0 if ok else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ventanas de telemetría y video de eventos marcados")
+    parser.add_argument('--bench', action='store_true', help="marcar eventos en ráfaga con datos sintéticos")
+    parser.add_argument('--events', type=int, default=20)
+    parser.add_argument('--rate', type=float, default=200.0, help="frames de telemetría por segundo")
+    parser.add_argument('--pre', type=float, default=PRE_EVENT_SECONDS)
+    parser.add_argument('--post', type=float, default=POST_EVENT_SECONDS)
+    args = parser.parse_args()
+    if args.bench:
+        raise SystemExit(_bench(args))
+    parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
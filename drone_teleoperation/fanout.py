@@ -0,0 +1,561 @@
+"""
+Difusión de telemetría a observadores remotos (solo lectura)
+
+Un hilo publica por TCP el estado del dron enfocado a muchos suscriptores
+(supervisores en superficie, prevención de riesgos) sin pasar por el hilo
+de Qt. El hilo de ingesta solo entrega la referencia al snapshot (O(1));
+la codificación y los envíos ocurren en el hilo del publicador, con
+sockets no bloqueantes y un selector.
+
+Cada mensaje lleva solo los campos que cambiaron más que su banda muerta
+(deadband.py) respecto de lo que ese suscriptor ya recibió:
+
+    cabecera   '<2sBBId'  magic 'UF', tipo (1 completo, 2 delta),
+                          cantidad de campos, seq del frame, timestamp
+    campos     cantidad × '<Bf'  índice en STATE_FIELDS (wire.py), valor
+
+El primer mensaje de cada suscriptor es completo. Los suscriptores al día
+comparten el mismo estado conocido, así que el delta se codifica una vez
+por grupo y no una vez por cliente.
+
+Contrapresión: cada suscriptor tiene como máximo un mensaje en curso y un
+buffer de envío del sistema reducido. Mientras el mensaje no termina de
+salir, los frames nuevos para ese cliente se descartan (y se cuentan); al
+desocuparse recibe un único delta desde lo que conoce hasta el último
+frame. Un cliente lento ve menos frames, nunca frames atrasados, y la
+memoria por cliente está acotada.
+
+Observar un publicador y prueba de carga con 100 suscriptores (interfaz a
+10 Hz y luego una ráfaga con todos los campos cambiando, que llena los
+buffers de los clientes que no leen y ejercita la contrapresión):
+    python fanout.py --watch 127.0.0.1:14600
+    python fanout.py --load-test --clients 100
+"""
+
+import argparse
+import json
+import selectors
+import socket
+import struct
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+
+from deadband import DEFAULT_DEADBANDS
+from wire import STATE_FIELDS, new_frame, state_vector
+
+
+FANOUT_PORT = 14600
+FANOUT_MAGIC = b'UF'
+KIND_FULL = 1
+KIND_DELTA = 2
+MESSAGE_HEADER = struct.Struct('<2sBBId')
+FIELD_DTYPE = np.dtype([('index', 'u1'), ('value', '<f4')])  # 5 bytes, sin relleno
+CLIENT_SEND_BUFFER = 4096  # bytes de SO_SNDBUF por suscriptor (el sistema lo duplica)
+ALL_FIELDS = np.arange(len(STATE_FIELDS))
+FULL_MESSAGE_SIZE = MESSAGE_HEADER.size + len(STATE_FIELDS) * FIELD_DTYPE.itemsize
+
+
+def encode_message(known, vector, bands, seq, timestamp):
+    """(mensaje, nuevo estado conocido) para un cliente que conoce `known`
+
+    `known` None produce un mensaje completo. Si ningún campo supera su
+    banda muerta devuelve (None, known). Con `bands` None el delta es exacto
+    y el nuevo estado conocido es el mismo arreglo `vector`.
+    """
+    if known is None:
+        kind, indices = KIND_FULL, ALL_FIELDS
+    else:
+        if bands is None:
+            changed = known != vector
+        else:
+            # ~(d < banda) también selecciona los valores NaN
+            changed = ~(np.abs(vector - known) < bands)
+        kind, indices = KIND_DELTA, np.flatnonzero(changed)
+        if not len(indices):
+            return None, (vector if bands is None else known)
+    fields = np.empty(len(indices), dtype=FIELD_DTYPE)
+    fields['index'] = indices
+    fields['value'] = vector[indices]
+    message = MESSAGE_HEADER.pack(FANOUT_MAGIC, kind, len(indices), seq, timestamp) + fields.tobytes()
+    if bands is None:
+        return message, vector
+    updated = vector.copy() if known is None else known.copy()
+    updated[indices] = fields['value']
+    return message, updated
+
+
+class _Subscriber:
+    __slots__ = ('sock', 'peer', 'known', 'pending', 'dropped', 'messages')
+
+    def __init__(self, sock, peer):
+        self.sock = sock
+        self.peer = peer
+        self.known = None     # valores que el cliente tiene (float32, no se modifica en el lugar)
+        self.pending = None   # resto del mensaje en curso (memoryview)
+        self.dropped = 0      # frames descartados por contrapresión
+        self.messages = 0
+
+
+class TelemetryPublisher(threading.Thread):
+    """Servidor TCP que difunde el último frame a los suscriptores"""
+
+    def __init__(self, host='127.0.0.1', port=FANOUT_PORT, deadbands=None):
+        super().__init__(name="telemetry-fanout", daemon=True)
+        bands = dict(DEFAULT_DEADBANDS)
+        bands.update(deadbands or {})
+        self.bands = np.array([bands[name] for name in STATE_FIELDS], dtype=np.float32)
+        self._server = socket.create_server((host, port))
+        self._server.setblocking(False)
+        self.address = self._server.getsockname()
+        self._wake_reader, self._wake_writer = socket.socketpair()
+        self._wake_reader.setblocking(False)
+        self._wake_writer.setblocking(False)
+        self._wake_pending = False
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self._server, selectors.EVENT_READ)
+        self._selector.register(self._wake_reader, selectors.EVENT_READ)
+        self._clients = {}
+        self._latest = (0, None)  # seq del publicador, frame (RecordBuffer)
+        self._reference = None    # valores que tiene un cliente al día (no se modifica en el lugar)
+        self._reference_stamp = (0, 0.0)
+        self._running = threading.Event()
+        self.messages = 0
+        self.bytes_sent = 0
+        self.dropped = 0
+        self.encoded = 0  # mensajes codificados (uno por grupo de clientes al día)
+
+    # ===== PRODUCTOR (hilo de ingesta) =====
+
+    def offer(self, frame):
+        """Nuevo frame para difundir; `frame` no debe modificarse después"""
+        self._latest = (self._latest[0] + 1, frame)
+        if not self._wake_pending:
+            self._wake_pending = True
+            try:
+                self._wake_writer.send(b'\0')
+            except OSError:
+                pass
+
+    @property
+    def subscribers(self):
+        return len(self._clients)
+
+    # ===== HILO DEL PUBLICADOR =====
+
+    def run(self):
+        self._running.set()
+        while self._running.is_set():
+            for key, events in self._selector.select(timeout=0.5):
+                target = key.fileobj
+                if target is self._server:
+                    self._accept()
+                elif target is self._wake_reader:
+                    try:
+                        self._wake_reader.recv(256)
+                    except OSError:
+                        pass
+                    # Limpiar antes de leer: un frame concurrente vuelve a despertar
+                    self._wake_pending = False
+                    self._broadcast()
+                else:
+                    client = key.data
+                    if events & selectors.EVENT_READ and not self._discard_input(client):
+                        continue
+                    if events & selectors.EVENT_WRITE:
+                        self._flush(client)
+        for client in list(self._clients.values()):
+            self._close(client)
+        self._selector.close()
+        self._server.close()
+        self._wake_reader.close()
+        self._wake_writer.close()
+
+    def _accept(self):
+        try:
+            sock, peer = self._server.accept()
+        except OSError:
+            return
+        sock.setblocking(False)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, CLIENT_SEND_BUFFER)
+        client = _Subscriber(sock, peer)
+        self._clients[sock] = client
+        self._selector.register(sock, selectors.EVENT_READ, client)
+        self._catch_up(client)
+
+    def _discard_input(self, client):
+        """Los suscriptores son de solo lectura; False si el cliente se desconectó"""
+        try:
+            if client.sock.recv(1024):
+                return True
+        except BlockingIOError:
+            return True
+        except OSError:
+            pass
+        self._close(client)
+        return False
+
+    def _close(self, client):
+        self._clients.pop(client.sock, None)
+        try:
+            self._selector.unregister(client.sock)
+        except (KeyError, ValueError):
+            pass
+        client.sock.close()
+
+    def _send(self, client, message):
+        """Envía sin bloquear; lo que no entra queda como mensaje en curso"""
+        try:
+            sent = client.sock.send(message)
+        except BlockingIOError:
+            sent = 0
+        except OSError:
+            self._close(client)
+            return
+        client.messages += 1
+        self.messages += 1
+        self.bytes_sent += sent
+        if sent < len(message):
+            client.pending = memoryview(message)[sent:]
+            self._selector.modify(client.sock, selectors.EVENT_READ | selectors.EVENT_WRITE, client)
+
+    def _flush(self, client):
+        try:
+            sent = client.sock.send(client.pending)
+        except BlockingIOError:
+            return
+        except OSError:
+            self._close(client)
+            return
+        self.bytes_sent += sent
+        client.pending = client.pending[sent:]
+        if not len(client.pending):
+            client.pending = None
+            self._selector.modify(client.sock, selectors.EVENT_READ, client)
+            self._catch_up(client)
+
+    def _catch_up(self, client):
+        """Un solo mensaje desde lo que conoce el cliente hasta la referencia"""
+        if self._reference is None:
+            return
+        message, client.known = encode_message(client.known, self._reference, None, *self._reference_stamp)
+        self.encoded += 1
+        if message is not None:
+            self._send(client, message)
+
+    def _broadcast(self):
+        seq, frame = self._latest
+        if frame is None:
+            return
+        timestamp = float(frame['timestamp'])
+        previous = self._reference
+        message, self._reference = encode_message(previous, state_vector(frame), self.bands, seq, timestamp)
+        self.encoded += 1
+        if self._reference is previous:
+            return  # ningún campo superó su banda muerta
+        self._reference_stamp = (seq, timestamp)
+        # Los clientes al día comparten `message`; los que se pusieron al día con
+        # una referencia anterior comparten un delta exacto por cada una
+        groups = {id(previous): message}
+        for client in list(self._clients.values()):
+            if client.pending is not None:
+                client.dropped += 1
+                self.dropped += 1
+                continue
+            key = id(client.known)
+            if key not in groups:
+                groups[key] = encode_message(client.known, self._reference, None, seq, timestamp)[0]
+                self.encoded += 1
+            client.known = self._reference
+            if groups[key] is not None:
+                self._send(client, groups[key])
+
+    def stop(self, timeout=1.0):
+        self._running.clear()
+        try:
+            self._wake_writer.send(b'\0')
+        except OSError:
+            pass
+        if self.is_alive():
+            self.join(timeout)
+
+
+class TelemetrySubscriber:
+    """Cliente de solo lectura: reconstruye el vector de estado del publicador"""
+
+    def __init__(self, host='127.0.0.1', port=FANOUT_PORT, receive_buffer=None):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        if receive_buffer:
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, receive_buffer)
+        self.sock.connect((host, port))
+        self.values = np.full(len(STATE_FIELDS), np.nan, dtype=np.float32)
+        self.seq = None
+        self.timestamp = 0.0
+        self.messages = 0
+        self.fields = 0
+        self._buffer = bytearray()
+
+    def fileno(self):
+        return self.sock.fileno()
+
+    def __getitem__(self, name):
+        return float(self.values[STATE_FIELDS.index(name)])
+
+    def feed(self, data):
+        """Aplica los mensajes completos de `data`; devuelve cuántos había"""
+        buffer = self._buffer
+        buffer += data
+        count = 0
+        offset = 0
+        while len(buffer) - offset >= MESSAGE_HEADER.size:
+            magic, kind, fields, seq, timestamp = MESSAGE_HEADER.unpack_from(buffer, offset)
+            if magic != FANOUT_MAGIC or kind not in (KIND_FULL, KIND_DELTA):
+                raise ValueError("Flujo de difusión inválido")
+            end = offset + MESSAGE_HEADER.size + fields * FIELD_DTYPE.itemsize
+            if len(buffer) < end:
+                break
+            # Copia del mensaje: una vista sobre el bytearray impediría recortarlo
+            records = np.frombuffer(bytes(buffer[offset + MESSAGE_HEADER.size:end]), FIELD_DTYPE)
+            self.values[records['index']] = records['value']
+            self.seq, self.timestamp = seq, timestamp
+            self.fields += fields
+            count += 1
+            offset = end
+        del buffer[:offset]
+        self.messages += count
+        return count
+
+    def read(self, timeout=None):
+        """Recibe y aplica lo disponible; False si el publicador cerró la conexión"""
+        self.sock.settimeout(timeout)
+        try:
+            data = self.sock.recv(65536)
+        except socket.timeout:
+            return True
+        if not data:
+            return False
+        self.feed(data)
+        return True
+
+    def close(self):
+        self.sock.close()
+
+
+def parse_address(text, default_host='127.0.0.1'):
+    """'host:puerto' o 'puerto' -> (host, puerto)"""
+    host, _, port = text.rpartition(':')
+    return host or default_host, int(port)
+
+
+# ===== OBSERVADOR Y PRUEBA DE CARGA =====
+
+def _watch(address):
+    subscriber = TelemetrySubscriber(*address)
+    print(f"✓ Observando {address[0]}:{address[1]}")
+    next_report = time.monotonic()
+    while subscriber.read(0.5):
+        if time.monotonic() >= next_report and subscriber.seq is not None:
+            print(f"  seq {subscriber.seq}  pos ({subscriber['x']:.2f}, {subscriber['y']:.2f}, {subscriber['z']:.2f})"
+                  f"  bat {subscriber['battery']:.0f}%  CH4 {subscriber['ch4']:.2f}%  "
+                  f"{subscriber.messages} mensajes, {subscriber.fields / max(1, subscriber.messages):.1f} campos/mensaje")
+            next_report += 1.0
+    print("⚠ El publicador cerró la conexión")
+
+
+def _subscribers(args):
+    """Proceso hijo de la prueba de carga: N clientes, algunos que no leen"""
+    address = parse_address(args.address)
+    selector = selectors.DefaultSelector()
+    clients = []
+    for i in range(args.clients):
+        slow = i < args.slow
+        # Los lentos no leen: con buffers chicos el publicador debe contenerlos
+        client = TelemetrySubscriber(*address, receive_buffer=2048 if slow else None)
+        clients.append((client, slow))
+        if not slow:
+            client.sock.setblocking(False)
+            selector.register(client.sock, selectors.EVENT_READ, client)
+    print(json.dumps({'connected': len(clients)}), flush=True)
+    end = time.monotonic() + args.duration
+    while time.monotonic() < end:
+        for key, _ in selector.select(timeout=0.1):
+            try:
+                data = key.data.sock.recv(65536)
+            except BlockingIOError:
+                continue
+            key.data.feed(data)
+    fast = [client.messages for client, slow in clients if not slow]
+    for client, _ in clients:
+        client.close()
+    print(json.dumps({'fast_min': min(fast, default=0), 'fast_max': max(fast, default=0)}), flush=True)
+
+
+def _start_subscribers(args, address, duration):
+    """Proceso hijo con los suscriptores; vuelve cuando todos están conectados"""
+    command = [sys.executable, __file__, '--subscribers', '--address', f"{address[0]}:{address[1]}",
+               '--clients', str(args.clients), '--slow', str(args.slow), '--duration', str(duration)]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    process.stdout.readline()  # todos conectados
+    return process
+
+
+def _backpressure_test(args):
+    """Ráfaga con todos los campos cambiando: los que no leen deben descartar con memoria acotada"""
+    publisher = TelemetryPublisher('127.0.0.1', 0)
+    publisher.start()
+    process = _start_subscribers(args, publisher.address, args.burst_duration + 1.0)
+    while publisher.subscribers < args.clients:
+        time.sleep(0.01)
+    clients = list(publisher._clients.values())
+    rng = np.random.default_rng(1)
+    period = 1.0 / args.burst_rate
+    largest = 0
+    frames = 0
+    deadline = time.monotonic()
+    end = deadline + args.burst_duration
+    while deadline < end:
+        frame = new_frame()  # el publicador retiene el frame ofrecido: uno nuevo por vez
+        frame['seq'] = frames
+        frame['timestamp'] = deadline
+        state_vector(frame)[:] = rng.uniform(0.0, 1000.0, len(STATE_FIELDS))
+        publisher.offer(frame)
+        frames += 1
+        largest = max([largest] + [len(c.pending) for c in clients if c.pending is not None])
+        deadline += period
+        time.sleep(max(0.0, deadline - time.monotonic()))
+    time.sleep(0.2)
+    publisher.stop()
+    client_stats = json.loads(process.communicate()[0].strip().splitlines()[-1])
+    # Los primeros en conectarse son los que no leen
+    slow_drops = [client.dropped for client in clients[:args.slow]]
+    print(f"\nContrapresión: ráfaga de {frames} frames a {args.burst_rate:.0f} Hz con todos los campos cambiando")
+    print(f"  {publisher.dropped} frames descartados; {sum(1 for d in slow_drops if d)}/{args.slow} clientes "
+          f"que no leen con descartes ({min(slow_drops, default=0)}-{max(slow_drops, default=0)} cada uno)")
+    print(f"  mensaje en curso más grande {largest} B por cliente (cota: un frame completo, {FULL_MESSAGE_SIZE} B)")
+    print(f"  clientes al día: {client_stats['fast_min']}-{client_stats['fast_max']} mensajes recibidos")
+    ok = publisher.dropped > 0 and all(slow_drops) and largest <= FULL_MESSAGE_SIZE
+    print(f"{'✓' if ok else '⚠'} Los clientes que no leen descartan frames con memoria acotada")
+    return ok
+
+
+def _load_test(args):
+    """Interfaz completa (QML offscreen) a 10 Hz, sin y con N suscriptores"""
+    import os
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from pathlib import Path
+    from PyQt6.QtCore import QTimer, QUrl, qInstallMessageHandler
+    from PyQt6.QtQml import QQmlApplicationEngine
+    from PyQt6.QtWidgets import QApplication
+
+    import main
+    from telemetry_worker import open_source
+
+    class MeasuredController(main.TeleoperationController):
+        applied = []  # (instante de aplicación, latencia recepción -> interfaz)
+
+        def _apply_latest_snapshot(self):
+            _, snapshot = self._worker.latest.slots[self._focus]
+            super()._apply_latest_snapshot()
+            if snapshot is not None:
+                now = time.monotonic()
+                self.applied.append((now, now - snapshot.received))
+
+    qInstallMessageHandler(lambda *a: None)
+    app = QApplication([sys.argv[0]])
+    engine = QQmlApplicationEngine()
+    publisher = TelemetryPublisher('127.0.0.1', 0)
+    publisher.start()
+    controller = MeasuredController(open_source('sim', rate_hz=args.rate), publisher=publisher)
+    engine.rootContext().setContextProperty("teleop", controller)
+    engine.load(QUrl.fromLocalFile(str(Path(__file__).parent / "qml" / "Main.qml")))
+    controller.arm()
+    controller.takeoff()
+    controller.setPitchRoll(0.5, 0.2)
+
+    results = {}
+    state = {}
+
+    def window(name):
+        MeasuredController.applied.clear()
+        state.update(name=name, start=time.monotonic(), messages=publisher.messages,
+                     bytes=publisher.bytes_sent, dropped=publisher.dropped, encoded=publisher.encoded)
+        QTimer.singleShot(int(args.duration * 1000), close_window)
+
+    def close_window():
+        applied = np.array(MeasuredController.applied)
+        intervals = np.diff(applied[:, 0]) * 1000.0
+        elapsed = time.monotonic() - state['start']
+        messages = publisher.messages - state['messages']
+        results[state['name']] = {
+            'updates': len(applied) / elapsed,
+            'interval_p50': float(np.percentile(intervals, 50)),
+            'interval_p99': float(np.percentile(intervals, 99)),
+            'latency_p50': float(np.percentile(applied[:, 1], 50) * 1000.0),
+            'latency_p99': float(np.percentile(applied[:, 1], 99) * 1000.0),
+            'messages': messages / elapsed,
+            'bytes_per_message': (publisher.bytes_sent - state['bytes']) / max(1, messages),
+            'encoded': (publisher.encoded - state['encoded']) / elapsed,
+            'dropped': publisher.dropped - state['dropped'],
+            'subscribers': publisher.subscribers,
+        }
+        if state['name'] == 'base':
+            start_subscribers()
+        else:
+            app.quit()
+
+    def start_subscribers():
+        state['process'] = _start_subscribers(args, publisher.address, args.duration + 2.0)
+        QTimer.singleShot(500, lambda: window('load'))
+
+    QTimer.singleShot(1000, lambda: window('base'))
+    app.exec()
+    controller.shutdown()
+    client_stats = json.loads(state['process'].communicate()[0].strip().splitlines()[-1])
+
+    print(f"Interfaz a {args.rate:.0f} Hz con QML (offscreen), {args.duration:.0f} s por ventana")
+    print(f"{'':14s} {'act/s':>6} {'intervalo p50/p99':>18} {'latencia p50/p99':>17} {'msj/s':>7} {'B/msj':>6}")
+    for name, label in (('base', 'sin observ.'), ('load', f"{args.clients} observ.")):
+        r = results[name]
+        print(f"{label:14s} {r['updates']:6.1f} {r['interval_p50']:7.1f}/{r['interval_p99']:6.1f} ms "
+              f"{r['latency_p50']:6.2f}/{r['latency_p99']:6.2f} ms {r['messages']:7.0f} {r['bytes_per_message']:6.1f}")
+    load = results['load']
+    print(f"  frame completo {FULL_MESSAGE_SIZE} B; "
+          f"codificaciones {load['encoded']:.0f}/s para {load['subscribers']} suscriptores")
+    print(f"  {args.slow} clientes que no leen: {load['dropped']} frames descartados por contrapresión")
+    print(f"  clientes al día: {client_stats['fast_min']}-{client_stats['fast_max']} mensajes recibidos")
+    base = results['base']
+    ok = (abs(load['updates'] - base['updates']) <= 0.5 and load['interval_p99'] <= base['interval_p99'] + 10.0)
+    print(f"{'✓' if ok else '⚠'} El lazo de {args.rate:.0f} Hz de la interfaz no se ve afectado")
+    backpressure = _backpressure_test(args)
+    return 0 if ok and backpressure else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Difusión de telemetría a observadores")
+    parser.add_argument('--watch', metavar='HOST:PUERTO', help="observar un publicador")
+    parser.add_argument('--load-test', action='store_true', help="interfaz a 10 Hz con N suscriptores")
+    parser.add_argument('--clients', type=int, default=100)
+    parser.add_argument('--slow', type=int, default=10, help="suscriptores que no leen")
+    parser.add_argument('--rate', type=float, default=10.0, help="frecuencia de telemetría (Hz)")
+    parser.add_argument('--duration', type=float, default=15.0, help="segundos por ventana de medición")
+    parser.add_argument('--burst-rate', type=float, default=500.0, help="frames por segundo de la ráfaga")
+    parser.add_argument('--burst-duration', type=float, default=3.0, help="segundos de la ráfaga")
+    parser.add_argument('--subscribers', action='store_true', help=argparse.SUPPRESS)  # proceso hijo
+    parser.add_argument('--address', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.subscribers:
+        _subscribers(args)
+    elif args.load_test:
+        sys.exit(_load_test(args))
+    elif args.watch:
+        _watch(parse_address(args.watch))
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
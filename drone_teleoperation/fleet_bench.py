@@ -0,0 +1,131 @@
+"""
+Benchmark del modo flota: CPU y latencia de la interfaz con N drones
+
+Cada caso corre en un proceso aparte con la interfaz QML completa (sin
+ventana visible, plataforma offscreen) y N simuladores en proceso leídos
+por el hilo de ingesta compartido:
+
+    CPU %         tiempo de CPU del proceso / tiempo transcurrido
+    UI p50/p99    recepción del frame del dron enfocado -> interfaz
+                  actualizada (señales y bindings QML ya evaluados)
+    resumen       costo en el hilo de Qt de cada actualización del
+                  modelo de la flota (4 Hz)
+
+Uso:
+    python fleet_bench.py                     # 1, 8 y 32 drones a 50 Hz
+    python fleet_bench.py --drones 1 4 16 --rate 100 --duration 10
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+
+DEFAULT_DRONES = (1, 8, 32)
+
+
+def _run_case(drones, rate, duration):
+    """Un caso en este proceso; devuelve las mediciones como dict"""
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt6.QtCore import QTimer, QUrl, qInstallMessageHandler
+    from PyQt6.QtQml import QQmlApplicationEngine
+    from PyQt6.QtWidgets import QApplication
+
+    import main
+    from telemetry_worker import open_source
+
+    class MeasuredController(main.TeleoperationController):
+        ui_latency = []
+        refresh_cost = []
+
+        def _apply_latest_snapshot(self):
+            _, snapshot = self._worker.latest.slots[self._focus]
+            super()._apply_latest_snapshot()
+            if snapshot is not None:
+                self.ui_latency.append(time.monotonic() - snapshot.received)
+
+        def _refresh_fleet(self):
+            started = time.perf_counter()
+            super()._refresh_fleet()
+            self.refresh_cost.append(time.perf_counter() - started)
+
+    qInstallMessageHandler(lambda *args: None)
+    app = QApplication([sys.argv[0]])
+    engine = QQmlApplicationEngine()
+    fleet = [(f"UAV-{i + 1}", open_source('sim', rate)) for i in range(drones)]
+    controller = MeasuredController(fleet=fleet)
+    engine.rootContext().setContextProperty("teleop", controller)
+    engine.load(QUrl.fromLocalFile(str(Path(__file__).parent / "qml" / "Main.qml")))
+
+    # Se descarta el arranque (carga del QML y primeros frames)
+    warmup = 1.0
+    marks = {}
+
+    def begin():
+        MeasuredController.ui_latency.clear()
+        MeasuredController.refresh_cost.clear()
+        controller._worker.frames = 0
+        marks['cpu'], marks['wall'] = time.process_time(), time.monotonic()
+
+    def finish():
+        marks['cpu'] = time.process_time() - marks['cpu']
+        marks['wall'] = time.monotonic() - marks['wall']
+        app.quit()
+
+    QTimer.singleShot(int(warmup * 1000), begin)
+    QTimer.singleShot(int((warmup + duration) * 1000), finish)
+    app.exec()
+    frames = controller._worker.frames
+    controller.shutdown()
+
+    latency = np.array(MeasuredController.ui_latency or [0.0]) * 1000.0
+    refresh = np.array(MeasuredController.refresh_cost or [0.0]) * 1000.0
+    return {
+        'drones': drones,
+        'rate': rate,
+        'cpu': marks['cpu'] / marks['wall'] * 100.0,
+        'frames': frames / marks['wall'],
+        'ui_p50': float(np.percentile(latency, 50)),
+        'ui_p99': float(np.percentile(latency, 99)),
+        'refresh': float(np.median(refresh)) if drones > 1 else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del modo flota")
+    parser.add_argument('--drones', type=int, nargs='+', default=list(DEFAULT_DRONES))
+    parser.add_argument('--rate', type=float, default=50.0, help="frames por segundo de cada dron")
+    parser.add_argument('--duration', type=float, default=5.0, help="segundos medidos por caso")
+    parser.add_argument('--case', action='store_true', help=argparse.SUPPRESS)  # proceso hijo
+    args = parser.parse_args()
+
+    if args.case:
+        print(json.dumps(_run_case(args.drones[0], args.rate, args.duration)))
+        return
+
+    results = []
+    for drones in args.drones:
+        command = [sys.executable, __file__, '--case', '--drones', str(drones),
+                   '--rate', str(args.rate), '--duration', str(args.duration)]
+        output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    print(f"Flota con simuladores en proceso a {args.rate:.0f} Hz por dron, {args.duration:.0f} s por caso")
+    print(f"{'drones':>7} {'frames/s':>9} {'CPU %':>7} {'UI p50':>8} {'UI p99':>8} {'resumen':>8}")
+    for r in results:
+        print(f"{r['drones']:7d} {r['frames']:9.0f} {r['cpu']:7.1f} {r['ui_p50']:6.2f}ms {r['ui_p99']:6.2f}ms "
+              f"{r['refresh']:6.2f}ms")
+    if len(results) > 1:
+        # Costo marginal: pendiente de CPU % contra número de drones
+        slope, base = np.polyfit([r['drones'] for r in results], [r['cpu'] for r in results], 1)
+        print(f"✓ Costo marginal ~{slope:.2f} % de CPU por dron (base {base:.1f} %)")
+
+
+if __name__ == "__main__":
+    main()
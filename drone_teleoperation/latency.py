@@ -0,0 +1,274 @@
+"""
+Latencia de ida y vuelta del enlace de comandos
+
+Cada comando lleva número de secuencia y marca de tiempo (reloj monotónico
+de la interfaz); el dron responde con un acuse ('UA') que repite ambos. La
+latencia es el tiempo entre el envío y la llegada del acuse, sin depender
+del reloj del dron.
+
+Las muestras se acumulan en histogramas log-lineales al estilo HDR
+(resolución relativa < 1,6 % entre 1 µs y ~16 s, memoria fija) agrupados en
+ranuras de una ventana deslizante: la ventana suma las ranuras vigentes y
+al avanzar resta la que vence, sin recorrer muestras. Los percentiles
+salen de la suma acumulada de ~1.200 contadores.
+
+Los comandos sin acuse se guardan en orden de envío; cada acuse retira
+su comando y los anteriores (los acuses perdidos o desordenados se
+cuentan). Si los acuses dejan de llegar, el tiempo desde el comando más
+antiguo todavía pendiente se reporta como cota inferior de la latencia,
+para que un enlace caído no se vea como latencia cero; un acuse tardío
+de un comando viejo no oculta que los posteriores siguen sin respuesta.
+
+Comprobación contra el simulador con retardo y jitter inyectados:
+    python latency.py --check --delay 40 --jitter 20 [--tcp]
+"""
+
+import argparse
+import subprocess
+import sys
+import threading
+import time
+from collections import deque, namedtuple
+from pathlib import Path
+
+import numpy as np
+
+
+SUB_BUCKET_BITS = 7
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS  # 128: error relativo < 1/64
+HALF_BUCKETS = SUB_BUCKETS // 2
+MAX_VALUE_US = 1 << 24              # ~16,8 s; valores mayores se saturan
+
+LATENCY_WINDOW = 10.0  # s
+WINDOW_SLOTS = 10
+ACK_TIMEOUT = 0.5      # s sin acuse antes de reportar el enlace detenido
+MAX_OUTSTANDING = 1024 # comandos sin acuse recordados (se conserva el más antiguo)
+
+LatencyStats = namedtuple('LatencyStats', 'p50 p95 p99 max count')  # ms, muestras
+NO_LATENCY = LatencyStats(0.0, 0.0, 0.0, 0.0, 0)
+
+
+def bucket_index(value_us):
+    """Índice del contador para un valor entero en µs"""
+    if value_us < SUB_BUCKETS:
+        return value_us
+    shift = value_us.bit_length() - SUB_BUCKET_BITS
+    return shift * HALF_BUCKETS + (value_us >> shift)
+
+
+def _bucket_bounds(size):
+    """Mayor valor equivalente de cada contador (µs), como en HDR"""
+    index = np.arange(size)
+    shift = np.maximum(index // HALF_BUCKETS - 1, 0)
+    lower = np.where(index < SUB_BUCKETS, index, (index - shift * HALF_BUCKETS) << shift)
+    return lower + (1 << shift) - 1
+
+
+class LatencyHistogram:
+    """Contadores log-lineales de latencias en µs"""
+
+    SIZE = bucket_index(MAX_VALUE_US - 1) + 1
+    UPPER_US = _bucket_bounds(SIZE)
+
+    def __init__(self):
+        self.counts = np.zeros(self.SIZE, dtype=np.int64)
+        self.total = 0
+        self.max_us = 0
+
+    def record(self, value_us):
+        value_us = min(max(int(value_us), 0), MAX_VALUE_US - 1)
+        self.counts[bucket_index(value_us)] += 1
+        self.total += 1
+        if value_us > self.max_us:
+            self.max_us = value_us
+
+    def add(self, other):
+        self.counts += other.counts
+        self.total += other.total
+        self.max_us = max(self.max_us, other.max_us)
+
+    def subtract(self, other):
+        self.counts -= other.counts
+        self.total -= other.total
+
+    def reset(self):
+        self.counts[:] = 0
+        self.total = 0
+        self.max_us = 0
+
+    def percentiles(self, percents):
+        """Valores (µs) bajo los que cae cada percentil de las muestras"""
+        if not self.total:
+            return [0] * len(percents)
+        cumulative = np.cumsum(self.counts)
+        ranks = np.maximum(np.ceil(np.asarray(percents) / 100.0 * self.total), 1)
+        index = np.searchsorted(cumulative, ranks)
+        return np.minimum(self.UPPER_US[index], self.max_us).tolist()
+
+
+class SlidingLatencyWindow:
+    """Histograma de los últimos `window` segundos en ranuras que vencen"""
+
+    def __init__(self, window=LATENCY_WINDOW, slots=WINDOW_SLOTS):
+        self.slot_length = window / slots
+        self._slots = [LatencyHistogram() for _ in range(slots)]
+        self.total = LatencyHistogram()
+        self._slot = None  # número absoluto de la ranura actual
+
+    def _advance(self, now):
+        slot = int(now // self.slot_length)
+        if self._slot is None:
+            self._slot = slot
+            return
+        if slot <= self._slot:
+            return
+        # Vencen las ranuras que se reutilizan (como máximo todas)
+        for absolute in range(self._slot + 1, slot + 1)[-len(self._slots):]:
+            expired = self._slots[absolute % len(self._slots)]
+            if expired.total:
+                self.total.subtract(expired)
+                expired.reset()
+        self._slot = slot
+        self.total.max_us = max(h.max_us for h in self._slots)
+
+    def record(self, value_us, now):
+        self._advance(now)
+        self._slots[self._slot % len(self._slots)].record(value_us)
+        self.total.record(value_us)
+
+    def stats(self, now):
+        self._advance(now)
+        total = self.total
+        if not total.total:
+            return NO_LATENCY
+        p50, p95, p99 = total.percentiles((50, 95, 99))
+        return LatencyStats(p50 / 1000.0, p95 / 1000.0, p99 / 1000.0, total.max_us / 1000.0, total.total)
+
+
+class LatencyMonitor:
+    """Registro de comandos enviados y acuses recibidos (cualquier hilo)"""
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self._lock = threading.Lock()
+        self._window = SlidingLatencyWindow(window)
+        self._outstanding = deque()  # marcas de los comandos sin acuse, en orden de envío
+        self.acks = 0
+        self.lost = 0  # comandos cuyo acuse no llegó antes que el de uno posterior (perdido o desordenado)
+        self.last_sent = 0.0  # time.monotonic() del último comando (heartbeats, watchdog.py)
+
+    def sent(self, timestamp):
+        """Comando enviado con marca `timestamp` (time.monotonic())"""
+        self.last_sent = timestamp
+        with self._lock:
+            if len(self._outstanding) < MAX_OUTSTANDING:
+                self._outstanding.append(timestamp)
+
+    def acked(self, timestamp, received=None):
+        """Acuse del comando con marca `timestamp`"""
+        received = time.monotonic() if received is None else received
+        rtt = received - timestamp
+        if rtt < 0:
+            return  # marca de otra sesión de la interfaz
+        with self._lock:
+            self._window.record(rtt * 1e6, received)
+            self.acks += 1
+            # Retira el comando y los anteriores; los que seguían pendientes perdieron su acuse
+            outstanding = self._outstanding
+            while outstanding and outstanding[0] < timestamp:
+                outstanding.popleft()
+                self.lost += 1
+            if outstanding and outstanding[0] == timestamp:
+                outstanding.popleft()
+
+    def waiting(self, now=None):
+        """Segundos desde el comando más antiguo sin acuse (0 si no hay ninguno)"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            since = self._outstanding[0] if self._outstanding else None
+        return 0.0 if since is None else max(0.0, now - since)
+
+    def stats(self, now=None):
+        """Percentiles y máximo (ms) de la ventana deslizante"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            stats = self._window.stats(now)
+            waiting_since = self._outstanding[0] if self._outstanding else None
+        if waiting_since is not None and now - waiting_since > ACK_TIMEOUT:
+            stalled = (now - waiting_since) * 1000.0
+            stats = LatencyStats(max(stats.p50, stalled), max(stats.p95, stalled),
+                                 max(stats.p99, stalled), max(stats.max, stalled), stats.count)
+        return stats
+
+
+# ===== COMPROBACIÓN CONTRA EL SIMULADOR =====
+
+def _check_partial_loss():
+    """Acuses perdidos salvo uno tardío de un comando viejo: la espera debe seguir creciendo"""
+    monitor = LatencyMonitor()
+    start = 1000.0
+    for i in range(50):  # 1 s de comandos a 50 Hz
+        monitor.sent(start + i * 0.02)
+    monitor.acked(start + 0.02, start + 0.08)  # solo llega el acuse del segundo comando
+    now = start + 1.0
+    waiting = monitor.waiting(now)
+    ok = abs(waiting - 0.96) < 1e-6 and monitor.lost == 1
+    print(f"{'✓' if ok else '⚠'} Pérdida parcial de acuses: espera {waiting * 1000:.0f} ms "
+          f"desde el primer comando pendiente, {monitor.lost} acuse perdido")
+    return ok
+
+
+def _check(args):
+    from telemetry_worker import open_source
+    from wire import new_frame
+
+    here = Path(__file__).parent
+    command = [sys.executable, str(here / 'simulator.py'), '--rate', str(args.rate),
+               '--port', str(args.port), '--delay', str(args.delay), '--jitter', str(args.jitter)]
+    if args.tcp:
+        command.append('--tcp')
+    simulator = subprocess.Popen(command, stdout=subprocess.DEVNULL)
+    try:
+        time.sleep(0.5)
+        scheme = 'tcp' if args.tcp else 'udp'
+        source = open_source(f"{scheme}://127.0.0.1:{args.port}")
+        state = new_frame()
+        end = time.monotonic() + args.duration
+        next_ping = time.monotonic()
+        while time.monotonic() < end:
+            source.read_into(state, 0.005)
+            if time.monotonic() >= next_ping:
+                source.ping()
+                next_ping += 1.0 / args.ping_rate
+        stats = source.latency.stats()
+        source.close()
+    finally:
+        simulator.kill()
+    expected = (args.delay, args.delay + args.jitter)
+    print(f"Retardo inyectado {args.delay:.0f} ms + U(0, {args.jitter:.0f}) ms, "
+          f"{scheme.upper()}, {stats.count} acuses")
+    print(f"  p50 {stats.p50:.2f} ms  p95 {stats.p95:.2f} ms  p99 {stats.p99:.2f} ms  máx {stats.max:.2f} ms")
+    # El máximo puede incluir demoras del planificador del sistema; se evalúan p50 y p99
+    inside = expected[0] <= stats.p50 <= expected[1] + 2 and stats.p99 <= expected[1] + 5
+    print(f"{'✓' if inside else '⚠'} Esperado entre {expected[0]:.0f} y {expected[1]:.0f} ms (+ enlace local)")
+    partial = _check_partial_loss()
+    return 0 if inside and partial else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latencia de ida y vuelta de comandos")
+    parser.add_argument('--check', action='store_true', help="medir contra el simulador con retardo inyectado")
+    parser.add_argument('--delay', type=float, default=40.0, help="retardo base de los acuses (ms)")
+    parser.add_argument('--jitter', type=float, default=20.0, help="jitter uniforme agregado (ms)")
+    parser.add_argument('--tcp', action='store_true')
+    parser.add_argument('--port', type=int, default=14580)
+    parser.add_argument('--rate', type=float, default=50.0, help="frames por segundo del simulador")
+    parser.add_argument('--ping-rate', type=float, default=50.0)
+    parser.add_argument('--duration', type=float, default=5.0)
+    args = parser.parse_args()
+    if args.check:
+        sys.exit(_check(args))
+    parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
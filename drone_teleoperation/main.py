@@ -9,13 +9,31 @@ Interfaz #2: Teleoperación del Dron
 import sys
 import math
 import random
+import argparse
 
 from pathlib import Path
 from datetime import datetime
 
 from PyQt6.QtWidgets import QApplication
 from PyQt6.QtQml import QQmlApplicationEngine, qmlRegisterType
-from PyQt6.QtCore import QObject, pyqtSignal, pyqtSlot, pyqtProperty, QTimer, QUrl, QtMsgType, qInstallMessageHandler
+from PyQt6.QtCore import QObject, pyqtSignal, pyqtSlot, pyqtProperty, QTimer, QUrl, QtMsgType, Qt, qInstallMessageHandler
+
+from alerts import AlertEngine, DEFAULT_RULES, load_detection_config, rules_from_detection_config
+from camera import CAMERA_SIZE, CameraImageProvider, CameraPipeline, open_camera
+from command_loop import KEYBOARD_LEASE, KEYBOARD_REFRESH_MS, CommandLoop
+from deadband import DeadbandFilter
+from drone_state import POSITION, GASES, VELOCITY, DroneState
+from event_clips import POST_EVENT_SECONDS, PRE_EVENT_SECONDS, EventClips
+from fanout import TelemetryPublisher, parse_address
+from latency import NO_LATENCY
+from models import AlertListModel, FleetModel
+from occupancy import MapTexture, OccupancyGrid, OccupancyImageProvider
+from recorder import FlightRecorder
+from telemetry_views import VIEW_CLASSES
+from telemetry_worker import DroneFeed, TelemetryWorker, open_source
+from watchdog import (DEFAULT_RISK_BEHAVIOR, GUI_HEARTBEAT_MS, LINK_TIMEOUT, RISK_BEHAVIORS,
+                      EmergencyChannel, LinkWatchdog)
+from wire import STATE_FIELDS, state_vector
 
 
 # Handler para capturar mensajes de Qt/QML
@@ -32,73 +50,18 @@ def qt_message_handler(mode, context, message):
         print(f"[DEBUG] {message}")
 
 
-class DroneState(QObject):
-    """Estado del dron en tiempo real"""
-    
-    def __init__(self):
-        super().__init__()
-        
-        # Estado de vuelo
-        self._is_connected = True
-        self._is_armed = False
-        self._is_flying = False
-        self._flight_mode = "MANUAL"  # MANUAL, ASSISTED, AUTO
-        
-        # Posición y orientación
-        self._position = {"x": 0.0, "y": 0.0, "z": 1.5}
-        self._velocity = {"vx": 0.0, "vy": 0.0, "vz": 0.0}
-        self._orientation = {"roll": 0.0, "pitch": 0.0, "yaw": 45.0}
-        
-        # Telemetría crítica
-        self._battery = 87.0
-        self._signal_strength = 92
-        self._latency = 45  # ms
-        self._slam_confidence = 94.0
-        self._gps_satellites = 0  # En túnel no hay GPS
-        
-        # Distancias a obstáculos (cm)
-        self._obstacle_front = 245
-        self._obstacle_back = 380
-        self._obstacle_left = 120
-        self._obstacle_right = 185
-        self._obstacle_top = 95
-        self._obstacle_bottom = 150
-        
-        # Temperaturas
-        self._temp_motor1 = 42.0
-        self._temp_motor2 = 44.0
-        self._temp_motor3 = 43.0
-        self._temp_motor4 = 45.0
-        self._temp_controller = 38.0
-        self._temp_battery = 32.0
-        
-        # Sensores de gas
-        self._ch4 = 0.35
-        self._co = 4.2
-        self._o2 = 20.8
-        self._h2s = 2.5
-        
-        # Modos asistidos
-        self._altitude_hold = True
-        self._speed_limiter = True
-        self._auto_brake = True
-        self._collision_avoidance = True
-        
-        # Cámara
-        self._camera_recording = False
-        self._camera_profile = "normal"  # low_light, high_clarity, anti_noise, normal
-        self._exposure_lock = False
-        self._camera_tilt = 0  # -90 a +30 grados
-        
-        # Controles
-        self._control_mode = "keyboard"  # keyboard, joystick
-        self._sensitivity = "normal"  # soft, normal, aggressive
-        self._precision_mode = False
-        
-        # Misión
-        self._mission_time = 0  # segundos
-        self._distance_traveled = 0.0
-        self._events_marked = []
+FLEET_REFRESH_MS = 250  # resumen de la vista general de la flota (4 Hz)
+MAP_REFRESH_MS = 200    # repintado del mapa de ocupación (5 Hz como máximo)
+
+
+class DroneSession:
+    """Un dron de la flota: enlace, estado de la interfaz y motor de alertas"""
+
+    def __init__(self, name, source, alert_rules=DEFAULT_RULES):
+        self.name = name
+        self.source = source
+        self.state = DroneState()
+        self.feed = DroneFeed(source, AlertEngine(alert_rules))
 
 
 class TeleoperationController(QObject):
@@ -106,117 +69,208 @@ class TeleoperationController(QObject):
     
     # Señales
     stateChanged = pyqtSignal()
-    telemetryUpdated = pyqtSignal()
+    # Telemetría por grupo: solo se emiten cuando cambia un valor visible
+    linkChanged = pyqtSignal()
+    attitudeChanged = pyqtSignal()
+    obstaclesChanged = pyqtSignal()
+    thermalChanged = pyqtSignal()
+    gasesChanged = pyqtSignal()
+    batteryChanged = pyqtSignal()
+    focusChanged = pyqtSignal()  # otro dron de la flota pasa a primer plano
+    _snapshotReady = pyqtSignal()  # emitida desde el hilo de ingesta (conexión en cola)
+    cameraFrameChanged = pyqtSignal()
+    cameraStatsChanged = pyqtSignal()  # 1 Hz
+    _cameraFrameReady = pyqtSignal()  # emitida desde el hilo de video (conexión en cola)
+    _watchdogEvent = pyqtSignal(str, int)  # evento, dron; emitida desde el vigilante (en cola)
+    mapChanged = pyqtSignal()  # nuevo mapa de ocupación pintado (<= 5 Hz)
     alertTriggered = pyqtSignal(str, str)  # tipo, mensaje
     eventMarked = pyqtSignal(str)  # tipo de evento
     emergencyActivated = pyqtSignal(str)  # tipo de emergencia
     
-    def __init__(self):
+    def __init__(self, source=None, alert_rules=DEFAULT_RULES, recorder=None, camera=None,
+                 capture_dir=Path(__file__).parent / "captures", clips=None, fleet=None,
+                 publisher=None, risk_behavior=DEFAULT_RISK_BEHAVIOR, link_timeout=LINK_TIMEOUT,
+                 estop_port=None, occupancy=None):
         super().__init__()
-        self._state = DroneState()
-        self._alerts = []
-        self._events = []
+        # Flota: [(nombre, fuente)]; por defecto un solo dron. Las propiedades y
+        # slots de la interfaz operan sobre el dron enfocado.
+        if fleet is None:
+            fleet = [("UAV-1", source or open_source('sim', rate_hz=10))]  # 10 Hz
+        self._drones = [DroneSession(name, drone_source, alert_rules) for name, drone_source in fleet]
+        self._focus = 0
+        self._state = self._drones[0].state
+        self._source = self._drones[0].source
+        self._alerts = AlertListModel(self._drones[0].feed.alert_engine.rules, self)
+        self._fleet = FleetModel([drone.name for drone in self._drones], self)
+        
+        # Ingesta de telemetría en un hilo propio; la interfaz solo toma el último snapshot
+        self._snapshot_seq = 0
+        self._latency_stats = NO_LATENCY
+        self._deadbands = DeadbandFilter()
+        self._group_signals = {
+            'link': self.linkChanged,
+            'attitude': self.attitudeChanged,
+            'obstacles': self.obstaclesChanged,
+            'thermal': self.thermalChanged,
+            'gases': self.gasesChanged,
+            'battery': self.batteryChanged,
+        }
+        # Vistas QML de grupos: se actualizan una vez por cambio visible del grupo
+        self._views = {name: cls(self) for name, cls in VIEW_CLASSES.items()}
+        self._group_views = {
+            'attitude': (self._views['position'], self._views['velocity'], self._views['orientation']),
+            'obstacles': (self._views['obstacles'],),
+            'thermal': (self._views['temperatures'],),
+            'gases': (self._views['gases'],),
+        }
+        self._snapshotReady.connect(self._apply_latest_snapshot)
+        # Registrador de vuelo: sin directorio configurado no escribe nada
+        self._recorder = recorder or FlightRecorder(None)
+        # Ventanas antes/después de cada evento marcado: sin directorio no guarda nada
+        self._clips = clips or EventClips(None)
+        # Mapa local de ocupación del dron enfocado (OccupancyGrid); sin grilla no hay mapa
+        self._occupancy = occupancy
+        # Un solo hilo de ingesta para todos los drones; solo el enfocado despierta a la interfaz
+        self._worker = TelemetryWorker([drone.feed for drone in self._drones],
+                                       notify=self._snapshotReady.emit,
+                                       recorder=self._recorder, clips=self._clips,
+                                       publisher=publisher, occupancy=occupancy)
+        # Difusión a observadores remotos (opcional): se detiene con el controlador
+        self._publisher = publisher
+        self._worker.start()
+        # Lazo de comandos: los mandos se muestrean y envían a frecuencia fija
+        self._commands = CommandLoop(self._source, recorder=self._recorder)
+        self._commands.start()
+        # Emergencias y vigilancia del enlace: se envían sin esperar al bucle de eventos de Qt
+        self._risk_behavior = risk_behavior
+        self._emergency = EmergencyChannel(self._commands, self._recorder)
+        self._watchdog = LinkWatchdog(self._worker, self._emergency, risk_behavior, link_timeout,
+                                      notify=self._watchdogEvent.emit, estop_port=estop_port)
+        self._watchdogEvent.connect(self._on_watchdog_event)
+        self._watchdog.start()
+        self._gui_heartbeat = QTimer()
+        self._gui_heartbeat.timeout.connect(self._watchdog.gui_alive)
+        self._gui_heartbeat.start(GUI_HEARTBEAT_MS)
+        
+        # Video: decodificación en un hilo; QML muestra siempre el último frame
+        self._camera = None
+        self._camera_frame = 0
+        if camera is not None:
+            self._camera = CameraPipeline(camera, capture_dir, notify=self._cameraFrameReady.emit,
+                                          clips=self._clips)
+            self._cameraFrameReady.connect(self._show_latest_frame)
+            self._camera.start()
+            self._camera_stats_timer = QTimer()
+            self._camera_stats_timer.timeout.connect(self.cameraStatsChanged)
+            self._camera_stats_timer.start(1000)
+        
+        # Mapa: la ingesta lo actualiza en cada frame; se repinta a frecuencia acotada
+        self._map_frame = 0
+        self._map_version = None
+        self._map_clearance = 0.0
+        if occupancy is not None:
+            self._map_texture = MapTexture(occupancy.size)
+            self._map_timer = QTimer()
+            self._map_timer.timeout.connect(self._refresh_map)
+            self._map_timer.start(MAP_REFRESH_MS)
         
-        # Timer para simular telemetría en tiempo real
-        self._telemetry_timer = QTimer()
-        self._telemetry_timer.timeout.connect(self._update_telemetry)
-        self._telemetry_timer.start(100)  # 10 Hz
+        # Resumen de la flota a frecuencia fija, independiente de la tasa de frames
+        if len(self._drones) > 1:
+            self._fleet_timer = QTimer()
+            self._fleet_timer.timeout.connect(self._refresh_fleet)
+            self._fleet_timer.start(FLEET_REFRESH_MS)
         
         # Timer para tiempo de misión
         self._mission_timer = QTimer()
         self._mission_timer.timeout.connect(self._update_mission_time)
         self._mission_timer.start(1000)  # 1 Hz
     
-    def _update_telemetry(self):
-        """Actualizar telemetría simulada"""
-        # Simular pequeñas variaciones
-        self._state._battery = max(0, self._state._battery - 0.001)
-        self._state._signal_strength = max(0, min(100, self._state._signal_strength + random.uniform(-2, 2)))
-        self._state._latency = max(20, min(200, self._state._latency + random.uniform(-5, 5)))
-        self._state._slam_confidence = max(60, min(100, self._state._slam_confidence + random.uniform(-1, 1)))
-        
-        # Variaciones de temperatura
-        self._state._temp_motor1 = max(30, min(70, self._state._temp_motor1 + random.uniform(-0.5, 0.5)))
-        self._state._temp_motor2 = max(30, min(70, self._state._temp_motor2 + random.uniform(-0.5, 0.5)))
-        self._state._temp_motor3 = max(30, min(70, self._state._temp_motor3 + random.uniform(-0.5, 0.5)))
-        self._state._temp_motor4 = max(30, min(70, self._state._temp_motor4 + random.uniform(-0.5, 0.5)))
-        
-        # Variaciones de distancia a obstáculos
-        self._state._obstacle_front = max(30, min(500, self._state._obstacle_front + random.uniform(-10, 10)))
-        self._state._obstacle_left = max(30, min(300, self._state._obstacle_left + random.uniform(-5, 5)))
-        self._state._obstacle_right = max(30, min(300, self._state._obstacle_right + random.uniform(-5, 5)))
-        
-        # Gases
-        self._state._ch4 = max(0, min(5, self._state._ch4 + random.uniform(-0.05, 0.05)))
-        self._state._co = max(0, min(50, self._state._co + random.uniform(-0.2, 0.2)))
-        self._state._o2 = max(18, min(22, self._state._o2 + random.uniform(-0.1, 0.1)))
-        self._state._h2s = max(0, min(20, self._state._h2s + random.uniform(-0.3, 0.3)))
-        
-        # Orientación (simular pequeños movimientos)
-        if self._state._is_flying:
-            self._state._orientation["roll"] = max(-15, min(15, self._state._orientation["roll"] + random.uniform(-1, 1)))
-            self._state._orientation["pitch"] = max(-15, min(15, self._state._orientation["pitch"] + random.uniform(-1, 1)))
-        
-        # Verificar alertas
-        self._check_alerts()
-        
-        self.telemetryUpdated.emit()
+    def _apply_latest_snapshot(self):
+        """Copiar al estado el snapshot más reciente publicado por el hilo de ingesta"""
+        seq, snapshot = self._worker.latest.take()
+        if snapshot is None or seq == self._snapshot_seq:
+            return
+        self._snapshot_seq = seq
+        # Una copia del frame completo; los campos se leen por nombre desde el estado
+        self._state.load(snapshot.values)
+        vector = self._state.vector
+        for alert in self._alerts.set_levels(snapshot.alerts):
+            self.alertTriggered.emit(alert['type'], alert['message'])
+        groups = self._deadbands.update(vector)
+        for group in groups:
+            for view in self._group_views.get(group, ()):
+                view.update(vector)
+            self._group_signals[group].emit()
+        # Percentiles de latencia: se recalculan en el hilo de ingesta ~2 veces por segundo
+        if snapshot.latency != self._latency_stats:
+            self._latency_stats = snapshot.latency
+            if 'link' not in groups:
+                self.linkChanged.emit()
+    
+    def _refresh_fleet(self):
+        """Copiar al modelo de la flota el último snapshot de cada dron"""
+        for row, (drone, (_, snapshot)) in enumerate(zip(self._drones, self._worker.latest.slots)):
+            if snapshot is not None:
+                self._fleet.stage(row, state_vector(snapshot.values), int(snapshot.alerts.max(initial=0)),
+                                  drone.state._is_armed, drone.state._is_flying)
+        self._fleet.commit()
+    
+    def _show_latest_frame(self):
+        """Pasar a pantalla el frame más reciente del hilo de video"""
+        seq = self._camera.take()
+        if seq is not None:
+            self._camera_frame = seq
+            self.cameraFrameChanged.emit()
+    
+    def _refresh_map(self):
+        """Pintar el mapa de ocupación si la ingesta lo modificó"""
+        version = self._occupancy.version
+        if version == self._map_version:
+            return
+        self._map_version = version
+        self._occupancy.render(self._map_texture.array)
+        self._map_clearance = self._occupancy.clearance(0.0)
+        self._map_frame += 1
+        self.mapChanged.emit()
+    
+    def occupancy_image_provider(self):
+        """Proveedor image://occupancy para el motor QML (None sin mapa)"""
+        return OccupancyImageProvider(self._map_texture) if self._occupancy is not None else None
+    
+    def camera_image_provider(self):
+        """Proveedor image://camera para el motor QML (None sin video)"""
+        return CameraImageProvider(self._camera.pool) if self._camera is not None else None
+    
+    def frame_presented(self):
+        """QQuickWindow.frameSwapped (hilo de render): cierra la medición glass-to-glass"""
+        if self._camera is not None:
+            self._camera.frame_presented()
+    
+    def _sync_command_loop(self):
+        """Copiar al lazo de comandos el estado de vuelo y el modelado de mandos"""
+        self._commands.configure(self._state._is_flying, self._state._altitude_hold,
+                                 self._state._sensitivity, self._state._precision_mode)
+    
+    def shutdown(self):
+        """Detener el vigilante, el lazo de comandos, el video, la ingesta, la difusión y los registros"""
+        self._watchdog.stop()
+        self._commands.stop()
+        if self._camera is not None:
+            self._camera.stop()
+        self._worker.stop()
+        if self._publisher is not None:
+            self._publisher.stop()
+        self._clips.stop()
+        self._recorder.stop()
     
     def _update_mission_time(self):
-        """Actualizar tiempo de misión"""
-        if self._state._is_flying:
-            self._state._mission_time += 1
-            self._state._distance_traveled += random.uniform(0.1, 0.5)
+        """Actualizar tiempo de misión de cada dron en vuelo"""
+        for drone in self._drones:
+            if drone.state._is_flying:
+                drone.state._mission_time += 1
+                drone.state._distance_traveled += random.uniform(0.1, 0.5)
         self.stateChanged.emit()
     
-    def _check_alerts(self):
-        """Verificar condiciones de alerta"""
-        new_alerts = []
-        
-        # Batería baja
-        if self._state._battery < 20:
-            new_alerts.append({"type": "critical", "message": "Batería crítica < 20%"})
-        elif self._state._battery < 30:
-            new_alerts.append({"type": "warning", "message": "Batería baja < 30%"})
-        
-        # Latencia alta
-        if self._state._latency > 150:
-            new_alerts.append({"type": "critical", "message": "Latencia crítica > 150ms"})
-        elif self._state._latency > 100:
-            new_alerts.append({"type": "warning", "message": "Latencia alta > 100ms"})
-        
-        # SLAM bajo
-        if self._state._slam_confidence < 70:
-            new_alerts.append({"type": "critical", "message": "Localización no confiable"})
-        elif self._state._slam_confidence < 80:
-            new_alerts.append({"type": "warning", "message": "SLAM degradado"})
-        
-        # Obstáculos cercanos
-        if self._state._obstacle_front < 50:
-            new_alerts.append({"type": "critical", "message": "¡Obstáculo frontal muy cercano!"})
-        elif self._state._obstacle_front < 100:
-            new_alerts.append({"type": "warning", "message": "Obstáculo frontal cercano"})
-        
-        # Temperatura alta
-        max_temp = max(self._state._temp_motor1, self._state._temp_motor2, 
-                       self._state._temp_motor3, self._state._temp_motor4)
-        if max_temp > 65:
-            new_alerts.append({"type": "critical", "message": "Temperatura motores crítica"})
-        elif max_temp > 55:
-            new_alerts.append({"type": "warning", "message": "Temperatura motores alta"})
-        
-        # Gas peligroso
-        if self._state._ch4 > 1.0:
-            new_alerts.append({"type": "critical", "message": "¡Nivel CH4 peligroso!"})
-        if self._state._co > 25:
-            new_alerts.append({"type": "critical", "message": "¡Nivel CO peligroso!"})
-        if self._state._h2s > 10:
-            new_alerts.append({"type": "critical", "message": "¡Nivel H2S peligroso!"})
-        if self._state._o2 < 19.5:
-            new_alerts.append({"type": "warning", "message": "Nivel O2 bajo"})
-        
-        self._alerts = new_alerts
-    
     # ===== PROPIEDADES QML =====
     
     @pyqtProperty(bool, notify=stateChanged)
@@ -235,73 +289,78 @@ class TeleoperationController(QObject):
     def flightMode(self):
         return self._state._flight_mode
     
-    @pyqtProperty(float, notify=telemetryUpdated)
+    @pyqtProperty(float, notify=batteryChanged)
     def battery(self):
-        return self._state._battery
+        return self._state.battery
     
-    @pyqtProperty(int, notify=telemetryUpdated)
+    @pyqtProperty(int, notify=linkChanged)
     def signalStrength(self):
-        return int(self._state._signal_strength)
+        return int(self._state.signal_strength)
     
-    @pyqtProperty(int, notify=telemetryUpdated)
+    @pyqtProperty(int, notify=linkChanged)
     def latency(self):
-        return int(self._state._latency)
+        return int(self._state.latency)
+    
+    # Latencia de ida y vuelta comando -> acuse (ms), ventana deslizante de 10 s;
+    # `latency` es el p95 (alimenta la regla de alertas 'latency')
+    
+    @pyqtProperty(float, notify=linkChanged)
+    def latencyP50(self):
+        return self._latency_stats.p50
+    
+    @pyqtProperty(float, notify=linkChanged)
+    def latencyP95(self):
+        return self._latency_stats.p95
+    
+    @pyqtProperty(float, notify=linkChanged)
+    def latencyP99(self):
+        return self._latency_stats.p99
     
-    @pyqtProperty(str, notify=telemetryUpdated)
+    @pyqtProperty(float, notify=linkChanged)
+    def latencyMax(self):
+        return self._latency_stats.max
+    
+    @pyqtProperty(str, notify=linkChanged)
     def latencyLevel(self):
-        if self._state._latency < 50:
+        if self._state.latency < 50:
             return "low"
-        elif self._state._latency < 100:
+        elif self._state.latency < 100:
             return "medium"
         else:
             return "high"
     
-    @pyqtProperty(float, notify=telemetryUpdated)
+    @pyqtProperty(float, notify=linkChanged)
     def slamConfidence(self):
-        return self._state._slam_confidence
+        return self._state.slam_confidence
+    
+    @pyqtProperty(int, constant=True)
+    def keyboardRefreshMs(self):
+        """Periodo con el que el teclado renueva los mandos mantenidos"""
+        return KEYBOARD_REFRESH_MS
     
-    @pyqtProperty('QVariant', notify=telemetryUpdated)
+    @pyqtProperty(QObject, constant=True)
     def position(self):
-        return self._state._position
+        return self._views['position']
     
-    @pyqtProperty('QVariant', notify=telemetryUpdated)
+    @pyqtProperty(QObject, constant=True)
     def velocity(self):
-        return self._state._velocity
+        return self._views['velocity']
     
-    @pyqtProperty('QVariant', notify=telemetryUpdated)
+    @pyqtProperty(QObject, constant=True)
     def orientation(self):
-        return self._state._orientation
+        return self._views['orientation']
     
-    @pyqtProperty('QVariant', notify=telemetryUpdated)
+    @pyqtProperty(QObject, constant=True)
     def obstacles(self):
-        return {
-            "front": self._state._obstacle_front,
-            "back": self._state._obstacle_back,
-            "left": self._state._obstacle_left,
-            "right": self._state._obstacle_right,
-            "top": self._state._obstacle_top,
-            "bottom": self._state._obstacle_bottom
-        }
+        return self._views['obstacles']
     
-    @pyqtProperty('QVariant', notify=telemetryUpdated)
+    @pyqtProperty(QObject, constant=True)
     def temperatures(self):
-        return {
-            "motor1": self._state._temp_motor1,
-            "motor2": self._state._temp_motor2,
-            "motor3": self._state._temp_motor3,
-            "motor4": self._state._temp_motor4,
-            "controller": self._state._temp_controller,
-            "battery": self._state._temp_battery
-        }
+        return self._views['temperatures']
     
-    @pyqtProperty('QVariant', notify=telemetryUpdated)
+    @pyqtProperty(QObject, constant=True)
     def gases(self):
-        return {
-            "ch4": self._state._ch4,
-            "co": self._state._co,
-            "o2": self._state._o2,
-            "h2s": self._state._h2s
-        }
+        return self._views['gases']
     
     @pyqtProperty(bool, notify=stateChanged)
     def altitudeHold(self):
@@ -335,6 +394,51 @@ class TeleoperationController(QObject):
     def cameraTilt(self):
         return self._state._camera_tilt
     
+    # ===== PROPIEDADES - VIDEO =====
+    
+    @pyqtProperty(bool, constant=True)
+    def hasVideo(self):
+        return self._camera is not None
+    
+    @pyqtProperty(int, notify=cameraFrameChanged)
+    def cameraFrame(self):
+        """Número del frame en pantalla (image://camera/<n>)"""
+        return self._camera_frame
+    
+    @pyqtProperty(float, notify=cameraStatsChanged)
+    def cameraFps(self):
+        return self._camera.worker.fps if self._camera is not None else 0.0
+    
+    @pyqtProperty(int, notify=cameraStatsChanged)
+    def cameraDropped(self):
+        return self._camera.dropped if self._camera is not None else 0
+    
+    @pyqtProperty(float, notify=cameraStatsChanged)
+    def cameraLatency(self):
+        """Latencia glass-to-glass estimada (ms)"""
+        return self._camera.latency * 1000.0 if self._camera is not None else 0.0
+    
+    # ===== PROPIEDADES - MAPA DE OCUPACIÓN =====
+    
+    @pyqtProperty(bool, constant=True)
+    def hasMap(self):
+        return self._occupancy is not None
+    
+    @pyqtProperty(int, notify=mapChanged)
+    def mapFrame(self):
+        """Número del mapa pintado (image://occupancy/<n>)"""
+        return self._map_frame
+    
+    @pyqtProperty(float, constant=True)
+    def mapExtent(self):
+        """Lado de la ventana del mapa (m)"""
+        return self._occupancy.size * self._occupancy.resolution if self._occupancy is not None else 0.0
+    
+    @pyqtProperty(float, notify=mapChanged)
+    def mapClearance(self):
+        """Distancia libre al frente según la evidencia acumulada (m)"""
+        return self._map_clearance
+    
     @pyqtProperty(str, notify=stateChanged)
     def controlMode(self):
         return self._state._control_mode
@@ -355,7 +459,7 @@ class TeleoperationController(QObject):
     def distanceTraveled(self):
         return self._state._distance_traveled
     
-    @pyqtProperty('QVariant', notify=stateChanged)
+    @pyqtProperty(QObject, constant=True)
     def alerts(self):
         return self._alerts
     
@@ -363,11 +467,60 @@ class TeleoperationController(QObject):
     def markedEvents(self):
         return self._state._events_marked
     
+    # ===== PROPIEDADES - FLOTA =====
+    
+    @pyqtProperty(int, constant=True)
+    def droneCount(self):
+        return len(self._drones)
+    
+    @pyqtProperty(QObject, constant=True)
+    def fleet(self):
+        """Resumen por dron para la vista general (FleetModel)"""
+        return self._fleet
+    
+    @pyqtProperty(int, notify=focusChanged)
+    def focusedDrone(self):
+        return self._focus
+    
+    @pyqtProperty(str, notify=focusChanged)
+    def droneName(self):
+        return self._drones[self._focus].name
+    
+    @pyqtSlot(int)
+    def focusDrone(self, index):
+        """Pasar a primer plano otro dron de la flota"""
+        if not 0 <= index < len(self._drones) or index == self._focus:
+            return
+        drone = self._drones[index]
+        self._recorder.record_command('focusDrone', drone.name)
+        # Los mandos quedan al centro; el lazo pasa al enlace del nuevo dron antes
+        # de tomar su estado de vuelo (nunca el estado de uno con el enlace del otro)
+        self._commands.hold()
+        self._focus = index
+        self._state = drone.state
+        self._source = drone.source
+        self._commands.source = drone.source
+        self._sync_command_loop()
+        self._worker.set_focus(index)
+        self._fleet.set_focus(index)
+        if self._occupancy is not None:
+            self._occupancy.reset()  # el mapa es del dron enfocado
+        # Todo se vuelve a notificar con el último snapshot del nuevo dron
+        self._snapshot_seq = None
+        self._latency_stats = NO_LATENCY
+        self._deadbands.reset()
+        self._apply_latest_snapshot()
+        print(f"✓ Dron enfocado: {drone.name}")
+        self.focusChanged.emit()
+        self.stateChanged.emit()
+    
     # ===== SLOTS - CONTROL DE VUELO =====
     
     @pyqtSlot()
     def arm(self):
-        """Armar el dron"""
+        """Armar el dron (también levanta una parada de emergencia retenida)"""
+        self._recorder.record_command('arm')
+        self._commands.rearm()
         if not self._state._is_armed:
             self._state._is_armed = True
             print("✓ Dron ARMADO")
@@ -376,6 +529,7 @@ class TeleoperationController(QObject):
     @pyqtSlot()
     def disarm(self):
         """Desarmar el dron"""
+        self._recorder.record_command('disarm')
         if self._state._is_armed and not self._state._is_flying:
             self._state._is_armed = False
             print("✓ Dron DESARMADO")
@@ -384,24 +538,31 @@ class TeleoperationController(QObject):
     @pyqtSlot()
     def takeoff(self):
         """Despegar"""
+        self._recorder.record_command('takeoff')
         if self._state._is_armed and not self._state._is_flying:
             self._state._is_flying = True
-            self._state._position["z"] = 1.5
+            self._source.set_flying(True)
+            self._sync_command_loop()
+            self._state.z = 1.5
             print("✓ DESPEGUE iniciado")
             self.stateChanged.emit()
     
     @pyqtSlot()
     def land(self):
         """Aterrizar"""
+        self._recorder.record_command('land')
         if self._state._is_flying:
             self._state._is_flying = False
-            self._state._position["z"] = 0.0
+            self._source.set_flying(False)
+            self._sync_command_loop()
+            self._state.z = 0.0
             print("✓ ATERRIZAJE iniciado")
             self.stateChanged.emit()
     
     @pyqtSlot(str)
     def setFlightMode(self, mode):
         """Cambiar modo de vuelo"""
+        self._recorder.record_command('setFlightMode', mode)
         if mode in ["MANUAL", "ASSISTED", "AUTO"]:
             self._state._flight_mode = mode
             print(f"✓ Modo de vuelo: {mode}")
@@ -412,64 +573,131 @@ class TeleoperationController(QObject):
     @pyqtSlot()
     def emergencyStop(self):
         """Parada de emergencia"""
+        # El comando sale primero; el estado de la interfaz se actualiza después
+        self._emergency.emergency_stop('gui')
+        self._show_emergency_stop(self._state)
+    
+    def _show_emergency_stop(self, state):
+        """Estado de la interfaz tras una parada ya enviada (slot, vigilante o E-STOP externo)"""
         print("="*60)
         print("🚨 EMERGENCY STOP ACTIVADO")
         print("="*60)
-        self._state._is_flying = False
-        self._state._is_armed = False
-        self._state._velocity = {"vx": 0, "vy": 0, "vz": 0}
+        state._is_flying = False
+        state._is_armed = False
+        state.vector[VELOCITY] = 0.0
+        self._sync_command_loop()
         self.emergencyActivated.emit("E-STOP")
         self.stateChanged.emit()
     
     @pyqtSlot()
     def hover(self):
         """Mantener posición (hover)"""
+        # Comando nulo inmediato; el lazo sigue desde cero sin rampa
+        self._emergency.hover('gui')
+        self._show_hover(self._state)
+    
+    def _show_hover(self, state):
         print("✓ HOVER - Manteniendo posición")
-        self._state._velocity = {"vx": 0, "vy": 0, "vz": 0}
+        state.vector[VELOCITY] = 0.0
         self.emergencyActivated.emit("HOVER")
         self.stateChanged.emit()
     
     @pyqtSlot()
     def returnToHome(self):
         """Retorno al punto de inicio"""
+        self._emergency.return_home('gui')
+        self._show_return_home(self._state)
+    
+    def _show_return_home(self, state):
         print("✓ RTH - Retornando al inicio")
-        self._state._flight_mode = "AUTO"
+        state._flight_mode = "AUTO"
         self.emergencyActivated.emit("RTH")
         self.stateChanged.emit()
     
     @pyqtSlot()
     def safeMode(self):
         """Activar modo seguro"""
+        self._emergency.safe_mode('gui')
+        self._show_safe_mode(self._state)
+    
+    def _show_safe_mode(self, state):
         print("✓ MODO SEGURO activado")
-        self._state._flight_mode = "ASSISTED"
-        self._state._altitude_hold = True
-        self._state._collision_avoidance = True
-        self._state._speed_limiter = True
+        state._flight_mode = "ASSISTED"
+        state._altitude_hold = True
+        state._collision_avoidance = True
+        state._speed_limiter = True
+        self._sync_command_loop()
         self.emergencyActivated.emit("SAFE_MODE")
         self.stateChanged.emit()
     
+    def _on_watchdog_event(self, event, index):
+        """Eventos del vigilante: los comandos ya se enviaron, solo se actualiza la interfaz"""
+        drone = self._drones[index]
+        if event in ('E-STOP', 'HOVER', 'RTH', 'SAFE_MODE'):
+            print(f"🚨 {event} externo ({drone.name})")
+        if event == 'E-STOP':
+            self._show_emergency_stop(drone.state)
+        elif event == 'HOVER':
+            self._show_hover(drone.state)
+        elif event == 'RTH':
+            self._show_return_home(drone.state)
+        elif event == 'SAFE_MODE':
+            self._show_safe_mode(drone.state)
+        elif event == 'link_lost':
+            drone.state._is_connected = False
+            failsafe = index == self._focus and drone.state._is_flying
+            print(f"⚠ Enlace perdido con {drone.name}"
+                  + (f": {self._risk_behavior}" if failsafe and self._risk_behavior != 'alert_only' else ""))
+            self.alertTriggered.emit('critical', f"Enlace perdido con {drone.name}")
+            if failsafe:
+                self._show_failsafe()
+            self.linkChanged.emit()
+            self.stateChanged.emit()
+        elif event == 'link_restored':
+            print(f"✓ Enlace restablecido con {drone.name}")
+            drone.state._is_connected = True
+            self.linkChanged.emit()
+            self.stateChanged.emit()
+        elif event == 'gui_stalled':
+            print("⚠ Interfaz detenida en vuelo: mandos al centro")
+    
+    def _show_failsafe(self):
+        """Parte de la interfaz del riskBehavior ante la pérdida de enlace"""
+        behavior = self._risk_behavior
+        if behavior == 'return_base':
+            self._show_return_home(self._state)
+        elif behavior == 'hover':
+            self._show_hover(self._state)
+        elif behavior == 'mark_continue':
+            self.markEvent("link_loss")
+    
     # ===== SLOTS - MODOS ASISTIDOS =====
     
     @pyqtSlot(bool)
     def setAltitudeHold(self, enabled):
+        self._recorder.record_command('setAltitudeHold', enabled)
         self._state._altitude_hold = enabled
+        self._sync_command_loop()
         print(f"✓ Altitude Hold: {'ON' if enabled else 'OFF'}")
         self.stateChanged.emit()
     
     @pyqtSlot(bool)
     def setSpeedLimiter(self, enabled):
+        self._recorder.record_command('setSpeedLimiter', enabled)
         self._state._speed_limiter = enabled
         print(f"✓ Speed Limiter: {'ON' if enabled else 'OFF'}")
         self.stateChanged.emit()
     
     @pyqtSlot(bool)
     def setAutoBrake(self, enabled):
+        self._recorder.record_command('setAutoBrake', enabled)
         self._state._auto_brake = enabled
         print(f"✓ Auto Brake: {'ON' if enabled else 'OFF'}")
         self.stateChanged.emit()
     
     @pyqtSlot(bool)
     def setCollisionAvoidance(self, enabled):
+        self._recorder.record_command('setCollisionAvoidance', enabled)
         self._state._collision_avoidance = enabled
         print(f"✓ Collision Avoidance: {'ON' if enabled else 'OFF'}")
         self.stateChanged.emit()
@@ -478,6 +706,7 @@ class TeleoperationController(QObject):
     
     @pyqtSlot()
     def toggleRecording(self):
+        self._recorder.record_command('toggleRecording')
         self._state._camera_recording = not self._state._camera_recording
         status = "INICIADA" if self._state._camera_recording else "DETENIDA"
         print(f"✓ Grabación {status}")
@@ -485,6 +714,7 @@ class TeleoperationController(QObject):
     
     @pyqtSlot(str)
     def setCameraProfile(self, profile):
+        self._recorder.record_command('setCameraProfile', profile)
         if profile in ["low_light", "high_clarity", "anti_noise", "normal"]:
             self._state._camera_profile = profile
             print(f"✓ Perfil de cámara: {profile}")
@@ -492,20 +722,26 @@ class TeleoperationController(QObject):
     
     @pyqtSlot(bool)
     def setExposureLock(self, locked):
+        self._recorder.record_command('setExposureLock', locked)
         self._state._exposure_lock = locked
         print(f"✓ Bloqueo de exposición: {'ON' if locked else 'OFF'}")
         self.stateChanged.emit()
     
     @pyqtSlot(int)
     def setCameraTilt(self, angle):
+        self._recorder.record_command('setCameraTilt', angle)
         self._state._camera_tilt = max(-90, min(30, angle))
         print(f"✓ Inclinación cámara: {self._state._camera_tilt}°")
         self.stateChanged.emit()
     
     @pyqtSlot()
     def capturePhoto(self):
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        print(f"📸 Foto capturada: IMG_{timestamp}.jpg")
+        self._recorder.record_command('capturePhoto')
+        # El frame en pantalla queda retenido y se escribe en el hilo de capturas
+        name = self._camera.capture("IMG") if self._camera is not None else None
+        if name is None:
+            name = f"IMG_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jpg"
+        print(f"📸 Foto capturada: {name}")
         self.stateChanged.emit()
     
     @pyqtSlot(str)
@@ -514,19 +750,22 @@ class TeleoperationController(QObject):
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         event = {
             "type": event_type,
+            "drone": self._drones[self._focus].name,
             "timestamp": timestamp,
-            "position": self._state._position.copy(),
-            "gases": {
-                "ch4": self._state._ch4,
-                "co": self._state._co,
-                "o2": self._state._o2
-            },
-            "frame": f"FRAME_{len(self._state._events_marked)+1:04d}.jpg"
+            "position": self._state.fields(POSITION),
+            "gases": self._state.fields(GASES),
+            "frame": (self._camera.capture(f"EVT_{event_type}") if self._camera is not None else None)
+                     or f"FRAME_{len(self._state._events_marked)+1:04d}.jpg"
         }
+        # Telemetría y video de los segundos previos y posteriores: se guardan en otro hilo
+        event["clip"] = self._clips.mark(event, f"EVT_{event_type}")
         self._state._events_marked.append(event)
+        self._recorder.record_event(event)
         print(f"🎯 EVENTO MARCADO: {event_type}")
         print(f"   Posición: ({event['position']['x']:.1f}, {event['position']['y']:.1f}, {event['position']['z']:.1f})")
         print(f"   Gases: CH4={event['gases']['ch4']:.2f}%, CO={event['gases']['co']:.1f}ppm, O2={event['gases']['o2']:.1f}%")
+        if event["clip"]:
+            print(f"   Ventana: {event['clip']} (-{self._clips.pre:.0f} s / +{self._clips.post:.0f} s)")
         self.eventMarked.emit(event_type)
         self.stateChanged.emit()
     
@@ -534,6 +773,7 @@ class TeleoperationController(QObject):
     
     @pyqtSlot(str)
     def setControlMode(self, mode):
+        self._recorder.record_command('setControlMode', mode)
         if mode in ["keyboard", "joystick"]:
             self._state._control_mode = mode
             print(f"✓ Modo de control: {mode}")
@@ -541,41 +781,47 @@ class TeleoperationController(QObject):
     
     @pyqtSlot(str)
     def setSensitivity(self, level):
+        self._recorder.record_command('setSensitivity', level)
         if level in ["soft", "normal", "aggressive"]:
             self._state._sensitivity = level
+            self._sync_command_loop()
             print(f"✓ Sensibilidad: {level}")
             self.stateChanged.emit()
     
     @pyqtSlot(bool)
     def setPrecisionMode(self, enabled):
+        self._recorder.record_command('setPrecisionMode', enabled)
         self._state._precision_mode = enabled
+        self._sync_command_loop()
         print(f"✓ Modo precisión: {'ON' if enabled else 'OFF'}")
         self.stateChanged.emit()
     
+    @pyqtSlot(str, float)
+    def setDeadband(self, field, value):
+        """Cambiar la banda muerta de un campo de telemetría"""
+        if field in STATE_FIELDS:
+            self._deadbands.set_deadband(field, value)
+            print(f"✓ Banda muerta {field}: {value}")
+    
     # ===== SLOTS - MOVIMIENTO =====
     
+    # Los slots solo actualizan los mandos; el lazo de comandos los muestrea,
+    # aplica sensibilidad y límites y envía un comando por ciclo
+    
     @pyqtSlot(float, float, float, float)
     def sendMovement(self, throttle, yaw, pitch, roll):
-        """Enviar comando de movimiento"""
-        if self._state._is_flying:
-            # Aplicar sensibilidad
-            factor = 0.5 if self._state._precision_mode else 1.0
-            if self._state._sensitivity == "soft":
-                factor *= 0.6
-            elif self._state._sensitivity == "aggressive":
-                factor *= 1.4
-            
-            # Simular movimiento
-            self._state._velocity["vx"] = pitch * factor
-            self._state._velocity["vy"] = roll * factor
-            self._state._velocity["vz"] = throttle * factor
-            
-            self._state._position["x"] += self._state._velocity["vx"] * 0.1
-            self._state._position["y"] += self._state._velocity["vy"] * 0.1
-            if not self._state._altitude_hold:
-                self._state._position["z"] += self._state._velocity["vz"] * 0.1
-            
-            self._state._orientation["yaw"] += yaw * factor * 5
+        """Teclado: posición de todos los mandos (-1..1); vence si no se renueva"""
+        self._commands.sticks.set(throttle, yaw, pitch, roll, lease=KEYBOARD_LEASE)
+    
+    @pyqtSlot(float, float)
+    def setThrottleYaw(self, throttle, yaw):
+        """Joystick izquierdo"""
+        self._commands.sticks.set(throttle=throttle, yaw=yaw)
+    
+    @pyqtSlot(float, float)
+    def setPitchRoll(self, pitch, roll):
+        """Joystick derecho"""
+        self._commands.sticks.set(pitch=pitch, roll=roll)
     
     # ===== UTILIDADES =====
     
@@ -587,18 +833,101 @@ class TeleoperationController(QObject):
         return f"{mins:02d}:{secs:02d}"
 
 
+def parse_args(argv):
+    """Argumentos de línea de comandos (los restantes se entregan a Qt)"""
+    parser = argparse.ArgumentParser(description="Interfaz de teleoperación")
+    parser.add_argument('--detection-config', metavar='RUTA',
+                        help="JSON con la configuración de detección de la Interfaz 1 (gasAlarm, coAlarm, o2Min...)")
+    parser.add_argument('--link', action='append',
+                        help="fuente de telemetría: sim, udp://host:puerto o tcp://host:puerto "
+                             "(repetir para una flota; por defecto sim)")
+    parser.add_argument('--fleet', type=int, default=1, metavar='N',
+                        help="drones simulados en proceso si no se indica --link")
+    parser.add_argument('--rate', type=float, default=10.0,
+                        help="frecuencia del simulador en proceso (Hz)")
+    parser.add_argument('--sim-delay', type=float, default=0.0, metavar='MS',
+                        help="retardo de los acuses del simulador en proceso (ms)")
+    parser.add_argument('--sim-jitter', type=float, default=0.0, metavar='MS',
+                        help="jitter uniforme de los acuses del simulador en proceso (ms)")
+    parser.add_argument('--record-dir', default=str(Path(__file__).parent / "recordings"),
+                        help="directorio del registrador de vuelo (.fdr)")
+    parser.add_argument('--no-record', action='store_true',
+                        help="no grabar el vuelo")
+    parser.add_argument('--camera', default=str(Path(__file__).parent / "qml" / "imagen_socavon.png"),
+                        help="video de la cámara: 'synthetic', una imagen (fija o animada) o 'none'")
+    parser.add_argument('--capture-dir', default=str(Path(__file__).parent / "captures"),
+                        help="directorio de fotos y frames de eventos marcados")
+    parser.add_argument('--pre-event', type=float, default=PRE_EVENT_SECONDS, metavar='S',
+                        help="segundos de telemetría y video guardados antes de cada evento marcado")
+    parser.add_argument('--post-event', type=float, default=POST_EVENT_SECONDS, metavar='S',
+                        help="segundos guardados después de cada evento marcado")
+    parser.add_argument('--no-event-clips', action='store_true',
+                        help="no guardar ventanas de telemetría y video de los eventos")
+    parser.add_argument('--risk-behavior', choices=RISK_BEHAVIORS, default=DEFAULT_RISK_BEHAVIOR,
+                        help="acción ante la pérdida de enlace en vuelo (riskBehavior de la Interfaz 1)")
+    parser.add_argument('--link-timeout', type=float, default=LINK_TIMEOUT * 1000.0, metavar='MS',
+                        help="tiempo sin telemetría o sin acuse para declarar el enlace perdido")
+    parser.add_argument('--estop-port', type=int, metavar='PUERTO',
+                        help="puerto UDP local para emergencias externas (datagramas ESTOP / HOVER / RTH / SAFE)")
+    parser.add_argument('--no-map', action='store_true',
+                        help="sin mapa local de ocupación")
+    parser.add_argument('--fanout', metavar='HOST:PUERTO',
+                        help="difundir la telemetría del dron enfocado a observadores (fanout.py --watch)")
+    return parser.parse_known_args(argv[1:])
+
+
 def main():
+    args, qt_args = parse_args(sys.argv)
+    links = args.link or ['sim'] * max(1, args.fleet)
+    
     # Instalar handler de mensajes para debug
     qInstallMessageHandler(qt_message_handler)
     
-    app = QApplication(sys.argv)
+    app = QApplication([sys.argv[0]] + qt_args)
     app.setApplicationName("Drone Teleoperation")
     app.setOrganizationName("DroneInspection")
     
     engine = QQmlApplicationEngine()
     
     # Registrar controlador ANTES de cargar el QML
-    controller = TeleoperationController()
+    rules = DEFAULT_RULES
+    if args.detection_config:
+        rules = rules_from_detection_config(load_detection_config(args.detection_config))
+        print(f"✓ Umbrales de detección: {args.detection_config}")
+    recorder = None
+    if not args.no_record:
+        recorder = FlightRecorder(args.record_dir, meta={'link': ','.join(links)}).start()
+        print(f"✓ Registrador de vuelo: {recorder.segments[0]}")
+    camera = open_camera(args.camera)
+    clips = None
+    if not args.no_event_clips:
+        clips = EventClips(args.capture_dir, CAMERA_SIZE if camera is not None else None,
+                           args.pre_event, args.post_event).start()
+    fleet = [(f"UAV-{i + 1}", open_source(link, args.rate, args.sim_delay / 1000.0, args.sim_jitter / 1000.0))
+             for i, link in enumerate(links)]
+    publisher = None
+    if args.fanout:
+        publisher = TelemetryPublisher(*parse_address(args.fanout, '0.0.0.0'))
+        publisher.start()
+        print(f"✓ Difusión a observadores: {publisher.address[0]}:{publisher.address[1]}")
+    controller = TeleoperationController(None, rules, recorder, camera=camera, capture_dir=args.capture_dir,
+                                         clips=clips, fleet=fleet, publisher=publisher,
+                                         risk_behavior=args.risk_behavior, link_timeout=args.link_timeout / 1000.0,
+                                         estop_port=args.estop_port,
+                                         occupancy=None if args.no_map else OccupancyGrid())
+    print(f"✓ Vigilante del enlace: {args.link_timeout:.0f} ms, riskBehavior {args.risk_behavior}")
+    if args.estop_port is not None:
+        print(f"✓ E-STOP externo: udp://127.0.0.1:{args.estop_port}")
+    for (name, _), link in zip(fleet, links):
+        print(f"✓ Enlace de telemetría {name}: {link}")
+    provider = controller.camera_image_provider()
+    if provider is not None:
+        engine.addImageProvider("camera", provider)
+        print(f"✓ Video: {args.camera}")
+    provider = controller.occupancy_image_provider()
+    if provider is not None:
+        engine.addImageProvider("occupancy", provider)
+    app.aboutToQuit.connect(controller.shutdown)
     engine.rootContext().setContextProperty("teleop", controller)
     
     # Cargar QML
@@ -611,6 +940,10 @@ def main():
         print(f"Archivo buscado: {qml_file}")
         sys.exit(-1)
     
+    # La ventana informa cada intercambio de buffers (hilo de render)
+    engine.rootObjects()[0].frameSwapped.connect(controller.frame_presented,
+                                                 Qt.ConnectionType.DirectConnection)
+    
     sys.exit(app.exec())
 
 
@@ -0,0 +1,180 @@
+"""
+Modelos de lista (QAbstractListModel) de la interfaz de teleoperación
+
+El modelo de alertas mantiene una fila por regla activa, en el orden de la
+tabla de reglas. Al llegar un nuevo vector de niveles solo inserta, quita o
+actualiza las filas de las reglas cuyo nivel cambió, de modo que la lista
+no se reinicia ni parpadea mientras un valor ronda un umbral.
+
+El modelo de la flota tiene una fila por dron con un resumen compacto
+(una fila de una matriz float). Los valores nuevos se preparan por dron y
+se confirman juntos: solo las filas que cambiaron emiten dataChanged.
+"""
+
+from bisect import bisect_left
+
+import numpy as np
+from PyQt6.QtCore import QAbstractListModel, QModelIndex, Qt, pyqtProperty, pyqtSignal, pyqtSlot
+
+from alerts import LEVEL_NAMES
+from wire import STATE_FIELDS
+
+
+# Rol QML -> campo del frame, en el resumen de cada dron de la flota
+FLEET_FIELDS = {
+    'battery': 'battery', 'signal': 'signal_strength', 'latency': 'latency',
+    'ch4': 'ch4', 'co': 'co', 'o2': 'o2',
+    'x': 'x', 'y': 'y', 'z': 'z',
+}
+# Columnas que no vienen del frame: nivel de alerta máximo, armado, en vuelo
+FLEET_FLAGS = ('alertLevel', 'armed', 'flying')
+
+
+class AlertListModel(QAbstractListModel):
+    """Alertas activas: roles ruleId, type y message"""
+
+    countChanged = pyqtSignal()
+
+    ROLES = {
+        Qt.ItemDataRole.UserRole + 1: b'ruleId',
+        Qt.ItemDataRole.UserRole + 2: b'type',
+        Qt.ItemDataRole.UserRole + 3: b'message',
+    }
+
+    def __init__(self, rules, parent=None):
+        super().__init__(parent)
+        self._rules = rules
+        self._levels = [0] * len(rules)
+        self._rows = []  # índices de regla activos, crecientes
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def roleNames(self):
+        return self.ROLES
+
+    def _alert(self, rule_index):
+        level = self._levels[rule_index]
+        rule = self._rules[rule_index]
+        return {'ruleId': rule['id'], 'type': LEVEL_NAMES[level], 'message': rule['messages'][level - 1]}
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        name = self.ROLES.get(role)
+        if name is None or not index.isValid() or not 0 <= index.row() < len(self._rows):
+            return None
+        return self._alert(self._rows[index.row()])[name.decode()]
+
+    @pyqtProperty(int, notify=countChanged)
+    def count(self):
+        return len(self._rows)
+
+    @pyqtSlot(int, result='QVariant')
+    def get(self, row):
+        """Alerta completa de una fila"""
+        if 0 <= row < len(self._rows):
+            return self._alert(self._rows[row])
+        return None
+
+    def active(self):
+        return [self._alert(rule_index) for rule_index in self._rows]
+
+    def set_levels(self, levels):
+        """Aplica un vector de niveles; devuelve las alertas nuevas o agravadas"""
+        raised = []
+        count = len(self._rows)
+        for rule_index, level in enumerate(levels.tolist()):
+            old = self._levels[rule_index]
+            if level == old:
+                continue
+            self._levels[rule_index] = level
+            row = bisect_left(self._rows, rule_index)
+            if old == 0:
+                self.beginInsertRows(QModelIndex(), row, row)
+                self._rows.insert(row, rule_index)
+                self.endInsertRows()
+            elif level == 0:
+                self.beginRemoveRows(QModelIndex(), row, row)
+                del self._rows[row]
+                self.endRemoveRows()
+            else:
+                model_index = self.index(row)
+                self.dataChanged.emit(model_index, model_index)
+            if level > old:
+                raised.append(self._alert(rule_index))
+        if len(self._rows) != count:
+            self.countChanged.emit()
+        return raised
+
+
+class FleetModel(QAbstractListModel):
+    """Resumen por dron: roles name, focused y las columnas de la flota"""
+
+    COLUMNS = tuple(FLEET_FIELDS) + FLEET_FLAGS
+    ROLES = {Qt.ItemDataRole.UserRole + 1: b'name', Qt.ItemDataRole.UserRole + 2: b'focused'}
+    ROLES.update({Qt.ItemDataRole.UserRole + 3 + i: name.encode() for i, name in enumerate(COLUMNS)})
+
+    focusChanged = pyqtSignal()
+
+    def __init__(self, names, parent=None):
+        super().__init__(parent)
+        self._names = list(names)
+        self._indices = np.array([STATE_FIELDS.index(field) for field in FLEET_FIELDS.values()])
+        self._staged = np.zeros((len(self._names), len(self.COLUMNS)))
+        self._values = np.full_like(self._staged, np.nan)  # el primer commit emite todas las filas
+        self._rows = [[0.0] * len(self.COLUMNS) for _ in self._names]
+        self._focus = 0
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._names)
+
+    def roleNames(self):
+        return self.ROLES
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or not 0 <= index.row() < len(self._names):
+            return None
+        row = index.row()
+        if role == Qt.ItemDataRole.UserRole + 1:
+            return self._names[row]
+        if role == Qt.ItemDataRole.UserRole + 2:
+            return row == self._focus
+        column = role - (Qt.ItemDataRole.UserRole + 3)
+        if 0 <= column < len(self.COLUMNS):
+            return self._rows[row][column]
+        return None
+
+    @pyqtProperty(int, constant=True)
+    def count(self):
+        return len(self._names)
+
+    @pyqtProperty(int, notify=focusChanged)
+    def focus(self):
+        return self._focus
+
+    def name(self, row):
+        return self._names[row]
+
+    def set_focus(self, row):
+        old, self._focus = self._focus, row
+        for changed in (old, row):
+            model_index = self.index(changed)
+            self.dataChanged.emit(model_index, model_index)
+        self.focusChanged.emit()
+
+    def stage(self, row, vector, alert_level, armed, flying):
+        """Prepara el resumen de un dron a partir de su vector de estado"""
+        staged = self._staged[row]
+        staged[:len(FLEET_FIELDS)] = vector[self._indices]
+        staged[len(FLEET_FIELDS):] = (alert_level, armed, flying)
+
+    def commit(self):
+        """Publica lo preparado; devuelve el número de filas que cambiaron"""
+        changed = np.flatnonzero((self._staged != self._values).any(axis=1))
+        if not len(changed):
+            return 0
+        self._values[changed] = self._staged[changed]
+        for row in changed.tolist():
+            self._rows[row] = self._values[row].tolist()
+            model_index = self.index(row)
+            self.dataChanged.emit(model_index, model_index)
+        return len(changed)
@@ -0,0 +1,302 @@
+"""
+Mapa local de ocupación a partir de las distancias a obstáculos
+
+Las cuatro distancias horizontales (frente, izquierda, atrás, derecha) se
+fusionan en cada frame del dron enfocado con su posición y su guiñada en
+una grilla 2D de log-odds alrededor del dron: las celdas recorridas por
+cada rayo suman evidencia de espacio libre y la celda del extremo (si la
+lectura no está en el alcance máximo) evidencia de ocupación. Una lectura
+ruidosa aislada mueve poco la grilla; un obstáculo visto varias veces la
+satura.
+
+La grilla tiene tamaño fijo y sigue al dron sin copiar datos: la celda del
+mundo (i, j) vive en [j % N, i % N] y, al desplazarse la ventana, solo se
+borran las filas o columnas que salieron de ella. La memoria no depende de
+la duración del vuelo. Las distancias superior e inferior no entran en el
+mapa (es un corte horizontal a la altura de vuelo).
+
+La interfaz pinta la ventana centrada en el dron (norte arriba) en una
+QImage a frecuencia acotada y QML la muestra con image://occupancy/<n>.
+`clearance()` da la distancia libre en una dirección según la evidencia
+acumulada, no según la última lectura.
+
+Costo por frame y por repintado, y estabilidad frente a lecturas ruidosas:
+    python occupancy.py --bench
+"""
+
+import argparse
+import math
+import random
+import threading
+import time
+
+import numpy as np
+from PyQt6 import sip
+from PyQt6.QtCore import QSize
+from PyQt6.QtGui import QImage
+from PyQt6.QtQuick import QQuickImageProvider
+
+from wire import STATE_FIELDS
+
+
+GRID_SIZE = 160          # celdas por lado (16 m con 10 cm por celda)
+GRID_RESOLUTION = 0.1    # m por celda
+MAX_RANGE = 5.0          # m: alcance de los sensores (500 cm en el simulador)
+RANGE_SCALE = 0.01       # cm -> m
+LOG_ODDS_HIT = 0.85
+LOG_ODDS_MISS = -0.4
+LOG_ODDS_MIN = -2.0
+LOG_ODDS_MAX = 3.5
+OCCUPIED = 1.2           # log-odds desde el que una celda se considera ocupada (dos ecos, p ~ 0.77)
+
+# Campo del frame y ángulo del rayo respecto de la guiñada (°, antihorario)
+BEAMS = (('obstacle_front', 0.0), ('obstacle_left', 90.0),
+         ('obstacle_back', 180.0), ('obstacle_right', -90.0))
+
+X_INDEX = STATE_FIELDS.index('x')
+Y_INDEX = STATE_FIELDS.index('y')
+YAW_INDEX = STATE_FIELDS.index('yaw')
+
+
+def _color_table():
+    """Log-odds cuantizado (0..255) -> 0xffRRGGBB: libre oscuro, desconocido gris, ocupado rojo"""
+    levels = np.linspace(LOG_ODDS_MIN, LOG_ODDS_MAX, 256)
+    p = 1.0 / (1.0 + np.exp(-levels))
+    free, unknown, occupied = np.array([13, 17, 23]), np.array([48, 54, 61]), np.array([248, 81, 73])
+    low = np.clip(p / 0.5, 0.0, 1.0)[:, None]
+    high = np.clip((p - 0.5) / 0.5, 0.0, 1.0)[:, None]
+    rgb = np.where(p[:, None] < 0.5, free + (unknown - free) * low, unknown + (occupied - unknown) * high)
+    rgb = rgb.astype(np.uint32)
+    return 0xff000000 | (rgb[:, 0] << 16) | (rgb[:, 1] << 8) | rgb[:, 2]
+
+
+COLOR_TABLE = _color_table()
+
+
+class OccupancyGrid:
+    """Grilla de log-odds de tamaño fijo que sigue al dron (hilo de ingesta e hilo de Qt)"""
+
+    def __init__(self, size=GRID_SIZE, resolution=GRID_RESOLUTION, max_range=MAX_RANGE):
+        self.size = size
+        self.resolution = resolution
+        self.max_range = max_range
+        self.log_odds = np.zeros((size, size), dtype=np.float32)
+        self.origin = None  # celda del mundo (i, j) de la esquina inferior izquierda de la ventana
+        self.pose = (0.0, 0.0, 0.0)  # última x, y (m) y guiñada (rad)
+        self.version = 0
+        self._beam_fields = np.array([STATE_FIELDS.index(name) for name, _ in BEAMS])
+        self._beam_angles = np.radians([angle for _, angle in BEAMS])
+        # Distancias de muestreo de los rayos: dos por celda
+        self._steps = np.arange(0.0, max_range, resolution * 0.5)
+        self._lock = threading.Lock()
+
+    def reset(self):
+        with self._lock:
+            self.log_odds.fill(0.0)
+            self.origin = None
+            self.version += 1
+
+    def _cells(self, coordinates):
+        return np.floor(coordinates / self.resolution).astype(np.int64)
+
+    def _follow(self, x, y):
+        """Centra la ventana en el dron; borra solo lo que sale de ella"""
+        half = self.size // 2
+        origin = (math.floor(x / self.resolution) - half, math.floor(y / self.resolution) - half)
+        if self.origin is not None:
+            for axis, (old, new) in enumerate(zip(self.origin, origin)):
+                if old != new:
+                    self._clear(axis, old, new)
+        self.origin = origin
+
+    def _clear(self, axis, old, new):
+        size = self.size
+        if abs(new - old) >= size:
+            self.log_odds.fill(0.0)
+            return
+        # Celdas del mundo que estaban en [old, old + N) y no están en [new, new + N)
+        gone = np.arange(old, new) if new > old else np.arange(new + size, old + size)
+        if axis == 0:
+            self.log_odds[:, gone % size] = 0.0   # columnas: eje x
+        else:
+            self.log_odds[gone % size, :] = 0.0   # filas: eje y
+
+    def integrate(self, vector):
+        """Fusiona las distancias de un frame de estado (vector float32 de wire.py)"""
+        x, y = float(vector[X_INDEX]), float(vector[Y_INDEX])
+        yaw = math.radians(float(vector[YAW_INDEX]))
+        ranges = vector[self._beam_fields].astype(np.float64) * RANGE_SCALE
+        angles = yaw + self._beam_angles
+        ux, uy = np.cos(angles)[:, None], np.sin(angles)[:, None]
+        steps = self._steps[None, :]
+        # Libre: muestras antes del extremo de cada rayo; ocupado: el extremo si hubo eco
+        free = steps < ranges[:, None] - self.resolution * 0.5
+        fi = self._cells(x + ux * steps)[free]
+        fj = self._cells(y + uy * steps)[free]
+        echo = (ranges > 0.0) & (ranges < self.max_range)
+        hi = self._cells(x + ux[:, 0] * ranges)[echo]
+        hj = self._cells(y + uy[:, 0] * ranges)[echo]
+        size = self.size
+        with self._lock:
+            self._follow(x, y)
+            i0, j0 = self.origin
+            hit = (hi - i0) * size + (hj - j0)
+            hit = hit[(hi >= i0) & (hi < i0 + size) & (hj >= j0) & (hj < j0 + size)]
+            inside = (fi >= i0) & (fi < i0 + size) & (fj >= j0) & (fj < j0 + size)
+            # Una actualización por celda y por frame aunque varias muestras caigan en ella
+            cleared = np.setdiff1d((fi[inside] - i0) * size + (fj[inside] - j0), hit)
+            for cells, delta in ((cleared, LOG_ODDS_MISS), (np.unique(hit), LOG_ODDS_HIT)):
+                ri, rj = np.divmod(cells, size)
+                rows, cols = (rj + j0) % size, (ri + i0) % size
+                self.log_odds[rows, cols] = np.clip(self.log_odds[rows, cols] + delta,
+                                                    LOG_ODDS_MIN, LOG_ODDS_MAX)
+            self.pose = (x, y, yaw)
+            self.version += 1
+
+    def clearance(self, bearing=0.0):
+        """Distancia libre (m) desde la última pose en `bearing` (° respecto de la guiñada)"""
+        with self._lock:
+            if self.origin is None:
+                return self.max_range
+            x, y, yaw = self.pose
+            angle = yaw + math.radians(bearing)
+            i = self._cells(x + math.cos(angle) * self._steps)
+            j = self._cells(y + math.sin(angle) * self._steps)
+            i0, j0 = self.origin
+            inside = (i >= i0) & (i < i0 + self.size) & (j >= j0) & (j < j0 + self.size)
+            values = np.full(len(self._steps), LOG_ODDS_MIN, dtype=np.float32)
+            values[inside] = self.log_odds[j[inside] % self.size, i[inside] % self.size]
+        occupied = np.flatnonzero(values > OCCUPIED)
+        return float(self._steps[occupied[0]]) if len(occupied) else self.max_range
+
+    def render(self, out):
+        """Pinta la ventana (norte arriba, dron al centro) en `out` (uint32, N×N)"""
+        size = self.size
+        scale = 255.0 / (LOG_ODDS_MAX - LOG_ODDS_MIN)
+        with self._lock:
+            if self.origin is None:
+                out.fill(COLOR_TABLE[int(-LOG_ODDS_MIN * scale)])
+                return
+            i0, j0 = self.origin
+            rows = (j0 + np.arange(size)) % size
+            cols = (i0 + np.arange(size)) % size
+            window = self.log_odds[np.ix_(rows, cols)]
+        levels = ((window - LOG_ODDS_MIN) * scale).astype(np.uint8)
+        # Fila 0 de la imagen arriba: y del mundo creciente hacia arriba
+        np.take(COLOR_TABLE, levels[::-1], out=out)
+
+
+class MapTexture:
+    """Imagen del mapa: arreglo NumPy y QImage sobre la misma memoria (hilo de Qt)"""
+
+    def __init__(self, size=GRID_SIZE):
+        self.array = np.zeros((size, size), dtype=np.uint32)
+        self.image = QImage(sip.voidptr(self.array.ctypes.data), size, size, size * 4,
+                            QImage.Format.Format_RGB32)
+
+
+class OccupancyImageProvider(QQuickImageProvider):
+    """image://occupancy/<n>: el último mapa pintado, sin copias"""
+
+    def __init__(self, texture):
+        super().__init__(QQuickImageProvider.ImageType.Image)
+        self._texture = texture
+
+    def requestImage(self, image_id, requested_size):
+        image = self._texture.image
+        return image, QSize(image.width(), image.height())
+
+
+# ===== MEDICIÓN =====
+
+CORRIDOR_HALF_WIDTH = 1.2  # m
+WALL_AHEAD = 12.0          # m: pared transversal al final del tramo
+
+
+def _true_ranges(x, y, yaw):
+    """Distancias exactas (m) en un túnel recto con una pared al fondo"""
+    ranges = []
+    for _, offset in BEAMS:
+        angle = math.radians(yaw + offset)
+        ux, uy = math.cos(angle), math.sin(angle)
+        hits = [MAX_RANGE]
+        if uy > 1e-9:
+            hits.append((CORRIDOR_HALF_WIDTH - y) / uy)
+        if uy < -1e-9:
+            hits.append((-CORRIDOR_HALF_WIDTH - y) / uy)
+        if ux > 1e-9:
+            hits.append((WALL_AHEAD - x) / ux)
+        ranges.append(min(hits))
+    return ranges
+
+
+def _bench(args):
+    rng = random.Random(1)
+    grid = OccupancyGrid()
+    vector = np.zeros(len(STATE_FIELDS), dtype=np.float32)
+    beam_fields = [STATE_FIELDS.index(name) for name, _ in BEAMS]
+    integrate_cost, raw_error, map_error = [], [], []
+    dt = 1.0 / args.rate
+    x, y, yaw = 0.0, 0.0, 0.0
+    for step in range(int(args.duration * args.rate)):
+        t = step * dt
+        x = min(WALL_AHEAD - 1.0, 0.4 * t)
+        y = 0.3 * math.sin(0.3 * t)
+        yaw = 8.0 * math.sin(0.5 * t)
+        truth = _true_ranges(x, y, yaw)
+        for field, distance in zip(beam_fields, truth):
+            measured = distance + rng.gauss(0.0, args.noise)
+            if rng.random() < args.outliers:
+                measured = rng.uniform(0.3, distance)  # eco espurio (polvo, gotas)
+            vector[field] = min(MAX_RANGE, max(0.0, measured)) / RANGE_SCALE
+        vector[X_INDEX], vector[Y_INDEX], vector[YAW_INDEX] = x, y, yaw
+        started = time.perf_counter()
+        grid.integrate(vector)
+        integrate_cost.append(time.perf_counter() - started)
+        if t > 5.0 and truth[0] < MAX_RANGE - 0.5:
+            raw_error.append(vector[beam_fields[0]] * RANGE_SCALE - truth[0])
+            map_error.append(grid.clearance(0.0) - truth[0])
+
+    texture = np.zeros((grid.size, grid.size), dtype=np.uint32)
+    render_cost = []
+    for _ in range(200):
+        started = time.perf_counter()
+        grid.render(texture)
+        render_cost.append(time.perf_counter() - started)
+
+    integrate_us = np.array(integrate_cost) * 1e6
+    render_us = np.array(render_cost) * 1e6
+    print(f"Túnel de {2 * CORRIDOR_HALF_WIDTH:.1f} m, {args.rate:.0f} Hz durante {args.duration:.0f} s, "
+          f"ruido σ {args.noise * 100:.0f} cm y {args.outliers * 100:.0f}% de ecos espurios")
+    print(f"  grilla {grid.size}×{grid.size} a {grid.resolution * 100:.0f} cm: "
+          f"{grid.log_odds.nbytes // 1024} KB fijos, {grid.size * grid.resolution:.0f} m de lado")
+    print(f"  fusión por frame   p50 {np.percentile(integrate_us, 50):.0f} µs  p99 {np.percentile(integrate_us, 99):.0f} µs")
+    print(f"  repintado          p50 {np.percentile(render_us, 50):.0f} µs  p99 {np.percentile(render_us, 99):.0f} µs")
+    # Falso cercano: frenaría sin motivo; sin confirmar: el obstáculo aún no tiene evidencia suficiente
+    margin = 0.3
+    print(f"Distancia al frente ({len(raw_error)} frames)  error p50   falso cercano   sin confirmar (±{margin * 100:.0f} cm)")
+    false_near = {}
+    for label, error in (('última lectura', np.array(raw_error)), ('mapa (clearance)', np.array(map_error))):
+        false_near[label] = np.mean(error < -margin) * 100.0
+        print(f"  {label:22s} {np.median(np.abs(error)) * 100:7.1f} cm {false_near[label]:11.1f} % "
+              f"{np.mean(error > margin) * 100:12.1f} %")
+    ok = false_near['mapa (clearance)'] < false_near['última lectura']
+    print(f"{'✓' if ok else '⚠'} La evidencia acumulada filtra los ecos espurios de una sola lectura")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mapa local de ocupación")
+    parser.add_argument('--bench', action='store_true', help="costo y estabilidad con lecturas ruidosas")
+    parser.add_argument('--rate', type=float, default=10.0, help="frames por segundo")
+    parser.add_argument('--duration', type=float, default=60.0, help="segundos de vuelo simulado")
+    parser.add_argument('--noise', type=float, default=0.15, help="σ del ruido de distancia (m)")
+    parser.add_argument('--outliers', type=float, default=0.05, help="fracción de ecos espurios")
+    args = parser.parse_args()
+    if args.bench:
+        _bench(args)
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
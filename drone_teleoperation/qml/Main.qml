@@ -354,7 +354,7 @@ ApplicationWindow {
                             font.weight: Font.Bold
                         }
                         Text {
-                            text: "Sistema de Teleoperación"
+                            text: teleop.droneCount > 1 ? "Sistema de Teleoperación · " + teleop.droneName : "Sistema de Teleoperación"
                             color: App.Theme.textTertiary
                             font.pixelSize: App.Theme.fontSizeXs
                         }
@@ -448,6 +448,55 @@ ApplicationWindow {
             }
         }
 
+        // FLOTA: resumen por dron (solo con más de un dron)
+        Rectangle {
+            Layout.fillWidth: true
+            Layout.preferredHeight: 44
+            visible: teleop.droneCount > 1
+            color: App.Theme.bgTertiary
+
+            Rectangle {
+                anchors.bottom: parent.bottom
+                width: parent.width
+                height: 1
+                color: App.Theme.borderMuted
+            }
+
+            ListView {
+                anchors.fill: parent
+                anchors.margins: 6
+                anchors.leftMargin: App.Theme.spacingL
+                anchors.rightMargin: App.Theme.spacingL
+                orientation: ListView.Horizontal
+                spacing: 6
+                clip: true
+                model: teleop.fleet
+                delegate: Rectangle {
+                    width: 150
+                    height: 32
+                    radius: App.Theme.radiusS
+                    color: model.focused ? App.Theme.accentBlueDim : App.Theme.bgSecondary
+                    border.width: 1
+                    border.color: model.alertLevel >= 2 ? App.Theme.statusCritical
+                                : model.alertLevel >= 1 ? App.Theme.statusWarning
+                                : model.focused ? App.Theme.accentBlue : App.Theme.borderMuted
+                    Row {
+                        anchors.centerIn: parent
+                        spacing: 6
+                        Rectangle { width: 8; height: 8; radius: 4; anchors.verticalCenter: parent.verticalCenter; color: model.flying ? App.Theme.statusSuccess : model.armed ? App.Theme.statusWarning : App.Theme.textTertiary }
+                        Text { text: model.name; color: App.Theme.textPrimary; font.pixelSize: App.Theme.fontSizeXs; font.weight: Font.Bold; anchors.verticalCenter: parent.verticalCenter }
+                        Text { text: model.battery.toFixed(0) + "%"; color: model.battery < 20 ? App.Theme.statusCritical : App.Theme.textSecondary; font.family: App.Theme.fontMono; font.pixelSize: App.Theme.fontSizeXs; anchors.verticalCenter: parent.verticalCenter }
+                        Text { text: model.latency.toFixed(0) + "ms"; color: App.Theme.textTertiary; font.family: App.Theme.fontMono; font.pixelSize: App.Theme.fontSizeXs; anchors.verticalCenter: parent.verticalCenter }
+                    }
+                    MouseArea {
+                        anchors.fill: parent
+                        cursorShape: Qt.PointingHandCursor
+                        onClicked: teleop.focusDrone(index)
+                    }
+                }
+            }
+        }
+
         // CONTENIDO PRINCIPAL
         RowLayout {
             Layout.fillWidth: true
@@ -631,9 +680,7 @@ ApplicationWindow {
                                 anchors.verticalCenterOffset: 6 
                                 label: "Throttle / Yaw"
                                 accentColor: App.Theme.accentBlue
-                                onMoved: function(x, y) {
-                                    if (teleop.isFlying) teleop.sendMovement(y, x, 0, 0)
-                                }
+                                onMoved: function(x, y) { teleop.setThrottleYaw(y, x) }
                             }
                         }
                     }
@@ -662,10 +709,13 @@ ApplicationWindow {
                         radius: App.Theme.radiusM
                         Image {
                             anchors.fill: parent
-                            source: Qt.resolvedUrl("imagen_socavon.png")
+                            // Con video: el último frame decodificado, entregado sin copia
+                            source: teleop.hasVideo ? "image://camera/" + teleop.cameraFrame
+                                                    : Qt.resolvedUrl("imagen_socavon.png")
+                            cache: false
                             fillMode: Image.PreserveAspectCrop
                             smooth: true
-                            opacity: 1.0   // si luego tienes stream real: visible: !teleop.hasVideo
+                            opacity: 1.0
                         }
 
                         // Overlay oscuro para que el UI siga legible
@@ -738,6 +788,8 @@ ApplicationWindow {
                                 Text { text: "YAW: " + teleop.orientation.yaw.toFixed(1) + "°"; color: "#ffffff"; font.family: App.Theme.fontMono; font.pixelSize: 11 }
                                 Text { text: "DIST: " + teleop.distanceTraveled.toFixed(1) + " m"; color: "#ffffff"; font.family: App.Theme.fontMono; font.pixelSize: 11 }
                                 Text { text: "BAT: " + teleop.battery.toFixed(0) + "%"; color: teleop.battery > 30 ? "#3fb950" : "#f85149"; font.family: App.Theme.fontMono; font.pixelSize: 11 }
+                                Text { visible: teleop.hasVideo; text: "VID: " + teleop.cameraFps.toFixed(0) + " fps " + teleop.cameraLatency.toFixed(0) + " ms"; color: "#ffffff"; font.family: App.Theme.fontMono; font.pixelSize: 11 }
+                                Text { visible: teleop.hasVideo; text: "DROP: " + teleop.cameraDropped; color: "#ffffff"; font.family: App.Theme.fontMono; font.pixelSize: 11 }
                             }
                         }
                         // Perfil Cámara
@@ -774,6 +826,44 @@ ApplicationWindow {
                                 }
                             }
                         }
+
+                        // Mapa local de ocupación (norte arriba, dron al centro)
+                        Rectangle {
+                            anchors.bottom: parent.bottom
+                            anchors.left: parent.left
+                            anchors.margins: App.Theme.spacingM
+                            width: 160
+                            height: 184
+                            radius: App.Theme.radiusS
+                            color: Qt.rgba(0, 0, 0, 0.7)
+                            visible: teleop.hasMap
+                            Column {
+                                anchors.fill: parent
+                                anchors.margins: 6
+                                spacing: 4
+                                Text { text: "MAPA " + teleop.mapExtent.toFixed(0) + " m · LIBRE " + teleop.mapClearance.toFixed(1) + " m"; color: "#ffffff"; font.family: App.Theme.fontMono; font.pixelSize: 10 }
+                                Item {
+                                    width: parent.width
+                                    height: width
+                                    Image {
+                                        anchors.fill: parent
+                                        // Se repinta a frecuencia acotada; celdas nítidas, sin suavizado
+                                        source: teleop.hasMap && teleop.mapFrame > 0 ? "image://occupancy/" + teleop.mapFrame : ""
+                                        cache: false
+                                        smooth: false
+                                        opacity: 0.9
+                                    }
+                                    Text {
+                                        anchors.centerIn: parent
+                                        text: "▲"
+                                        color: App.Theme.accentCyan
+                                        font.pixelSize: 12
+                                        // Guiñada antihoraria desde el este; QML rota en sentido horario desde el norte
+                                        rotation: 90 - teleop.orientation.yaw
+                                    }
+                                }
+                            }
+                        }
                     }
                 }
 
@@ -984,9 +1074,9 @@ ApplicationWindow {
                                 Text { text: "Alertas"; color: App.Theme.textPrimary; font.pixelSize: App.Theme.fontSizeS; font.weight: Font.Bold }
                                 Rectangle {
                                     width: 20; height: 20; radius: 10
-                                    color: teleop.alerts.length > 0 ? App.Theme.statusCritical : App.Theme.bgTertiary
-                                    visible: teleop.alerts.length > 0
-                                    Text { anchors.centerIn: parent; text: teleop.alerts.length; color: "#ffffff"; font.pixelSize: 10; font.weight: Font.Bold }
+                                    color: teleop.alerts.count > 0 ? App.Theme.statusCritical : App.Theme.bgTertiary
+                                    visible: teleop.alerts.count > 0
+                                    Text { anchors.centerIn: parent; text: teleop.alerts.count; color: "#ffffff"; font.pixelSize: 10; font.weight: Font.Bold }
                                 }
                             }
 
@@ -1000,18 +1090,18 @@ ApplicationWindow {
                                     width: ListView.view.width
                                     height: 32
                                     radius: App.Theme.radiusS
-                                    color: modelData.type === "critical" ? App.Theme.statusCriticalBg : App.Theme.statusWarningBg
+                                    color: model.type === "critical" ? App.Theme.statusCriticalBg : App.Theme.statusWarningBg
                                     border.width: 1
-                                    border.color: modelData.type === "critical" ? App.Theme.statusCritical : App.Theme.statusWarning
+                                    border.color: model.type === "critical" ? App.Theme.statusCritical : App.Theme.statusWarning
                                     Row {
                                         anchors.fill: parent
                                         anchors.margins: 6
                                         spacing: 6
-                                        Rectangle { width: 6; height: 6; radius: 3; color: modelData.type === "critical" ? App.Theme.statusCritical : App.Theme.statusWarning; anchors.verticalCenter: parent.verticalCenter }
-                                        Text { text: modelData.message; color: modelData.type === "critical" ? App.Theme.statusCritical : App.Theme.statusWarning; font.pixelSize: 10; anchors.verticalCenter: parent.verticalCenter; elide: Text.ElideRight; width: parent.width - 20 }
+                                        Rectangle { width: 6; height: 6; radius: 3; color: model.type === "critical" ? App.Theme.statusCritical : App.Theme.statusWarning; anchors.verticalCenter: parent.verticalCenter }
+                                        Text { text: model.message; color: model.type === "critical" ? App.Theme.statusCritical : App.Theme.statusWarning; font.pixelSize: 10; anchors.verticalCenter: parent.verticalCenter; elide: Text.ElideRight; width: parent.width - 20 }
                                     }
                                 }
-                                Text { anchors.centerIn: parent; text: "✓ Sin alertas"; color: App.Theme.accentGreen; font.pixelSize: App.Theme.fontSizeS; visible: teleop.alerts.length === 0 }
+                                Text { anchors.centerIn: parent; text: "✓ Sin alertas"; color: App.Theme.accentGreen; font.pixelSize: App.Theme.fontSizeS; visible: teleop.alerts.count === 0 }
                             }
                         }
                     }
@@ -1066,10 +1156,7 @@ ApplicationWindow {
                                 anchors.verticalCenterOffset: 6
                                 label: "Pitch / Roll"
                                 accentColor: App.Theme.accentGreen
-                                onMoved: function(x, y) {
-                                    if (teleop.isFlying)
-                                        teleop.sendMovement(0, 0, y, x)
-                                }
+                                onMoved: function(x, y) { teleop.setPitchRoll(y, x) }
                             }
                         }
                     }
@@ -1079,23 +1166,59 @@ ApplicationWindow {
     }
     
 
-    // Teclado
+    // Teclado: las teclas mantenidas fijan los mandos; el lazo de comandos
+    // los muestrea a frecuencia fija (la repetición automática se ignora).
+    // Mientras hay teclas pulsadas se renuevan periódicamente: si la
+    // renovación se corta, el lazo da los mandos por soltados
     Item {
+        id: keyboardSticks
         focus: true
+        property var held: ({})
+        readonly property bool flying: teleop.isFlying
+        readonly property var axes: ({
+            [Qt.Key_W]: [2, 1], [Qt.Key_S]: [2, -1],
+            [Qt.Key_A]: [3, -1], [Qt.Key_D]: [3, 1],
+            [Qt.Key_Q]: [1, -1], [Qt.Key_E]: [1, 1],
+            [Qt.Key_Space]: [0, 1], [Qt.Key_Control]: [0, -1]
+        })
+
+        function publish() {
+            var sticks = [0, 0, 0, 0]  // throttle, yaw, pitch, roll
+            for (var key in held) {
+                var axis = axes[key]
+                sticks[axis[0]] += axis[1]
+            }
+            teleop.sendMovement(sticks[0], sticks[1], sticks[2], sticks[3])
+            refresh.running = Object.keys(held).length > 0
+        }
+
+        function releaseAll() {
+            held = {}
+            publish()
+        }
+
+        // Sin foco no llegan las liberaciones: todo se suelta
+        onActiveFocusChanged: if (!activeFocus) releaseAll()
+        Window.onActiveChanged: if (!Window.active) releaseAll()
+        onFlyingChanged: if (!flying) releaseAll()
+
+        Timer {
+            id: refresh
+            interval: teleop.keyboardRefreshMs
+            repeat: true
+            onTriggered: keyboardSticks.publish()
+        }
+
         Keys.onPressed: function(event) {
+            if (event.isAutoRepeat || !(event.key in axes)) return
             if (!teleop.isFlying || !isTeleoperated) return
-            var t = 0, y = 0, p = 0, r = 0
-            switch(event.key) {
-                case Qt.Key_W: p = 1; break
-                case Qt.Key_S: p = -1; break
-                case Qt.Key_A: r = -1; break
-                case Qt.Key_D: r = 1; break
-                case Qt.Key_Q: y = -1; break
-                case Qt.Key_E: y = 1; break
-                case Qt.Key_Space: t = 1; break
-                case Qt.Key_Control: t = -1; break
-            }
-            if (t !== 0 || y !== 0 || p !== 0 || r !== 0) teleop.sendMovement(t, y, p, r)
+            held[event.key] = true
+            publish()
+        }
+        Keys.onReleased: function(event) {
+            if (event.isAutoRepeat || !(event.key in held)) return
+            delete held[event.key]
+            publish()
         }
     }
 
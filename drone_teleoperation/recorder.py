@@ -0,0 +1,190 @@
+"""
+Registrador de vuelo (caja negra)
+
+Agrega a un registro binario cada frame de telemetría, los comandos del
+operador y los eventos marcados. Los productores (hilo de ingesta e hilo
+de Qt) solo encolan una tupla; la codificación, el agrupamiento en lotes,
+la escritura y la rotación de archivos ocurren en un hilo escritor.
+
+Formato .fdr (little-endian), un archivo por segmento:
+
+    cabecera   '<8sHHI'  magic 'UAVFDR\\0\\0', versión, tamaño de frame,
+                         largo del bloque JSON de metadatos
+    metadatos  JSON: recording, segment, started (epoch), fields
+    registros  '<BxHd'   tipo, largo del contenido, t (s desde el inicio
+                         de la grabación) + contenido:
+        1 TELEMETRY  frame de estado del protocolo (wire.py)
+        2 MOVE       4 × f32: throttle, yaw, pitch, roll (mandos muestreados)
+        3 COMMAND    JSON {"name": ..., "args": [...]}
+        4 EVENT      JSON del evento marcado
+
+Los segmentos de una grabación se llaman <grabación>_000.fdr, _001.fdr...
+La Interfaz 3 los abre directamente (drone_analysis/flight_log.py).
+"""
+
+import json
+import os
+import queue
+import struct
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from wire import STATE_FIELDS, FRAME_SIZE
+
+
+FDR_MAGIC = b'UAVFDR\x00\x00'
+FDR_VERSION = 1
+FILE_HEADER = struct.Struct('<8sHHI')
+RECORD_HEADER = struct.Struct('<BxHd')
+MOVE_PAYLOAD = struct.Struct('<4f')
+
+REC_TELEMETRY = 1
+REC_MOVE = 2
+REC_COMMAND = 3
+REC_EVENT = 4
+
+SEGMENT_MAX_BYTES = 64 * 1024 * 1024
+SEGMENT_MAX_SECONDS = 15 * 60
+BATCH_MAX_RECORDS = 512
+FLUSH_INTERVAL = 0.5  # s: máximo tiempo que un registro espera en cola
+
+
+class FlightRecorder:
+    """Escritor en segundo plano con lotes y rotación de segmentos"""
+
+    def __init__(self, directory, max_segment_bytes=SEGMENT_MAX_BYTES,
+                 max_segment_seconds=SEGMENT_MAX_SECONDS, meta=None):
+        self.directory = Path(directory) if directory is not None else None  # None: no graba
+        self.max_segment_bytes = max_segment_bytes
+        self.max_segment_seconds = max_segment_seconds
+        self.meta = dict(meta or {})
+        self.name = None
+        self.segments = []
+        self.records = 0
+        self.bytes_written = 0
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._t0 = None
+        self._file = None
+        self._segment_bytes = 0
+        self._segment_opened = 0.0
+
+    # ===== PRODUCTORES (cualquier hilo, sin E/S) =====
+
+    def _elapsed(self):
+        return time.monotonic() - self._t0
+
+    def record_frame(self, raw, received=None):
+        """Frame de estado; `raw` no debe modificarse después (copia del snapshot)"""
+        if self._thread is not None:
+            t = (received if received is not None else time.monotonic()) - self._t0
+            self._queue.put((REC_TELEMETRY, t, raw))
+
+    def record_movement(self, throttle, yaw, pitch, roll):
+        if self._thread is not None:
+            self._queue.put((REC_MOVE, self._elapsed(), (throttle, yaw, pitch, roll)))
+
+    def record_command(self, name, *args):
+        if self._thread is not None:
+            self._queue.put((REC_COMMAND, self._elapsed(), (name, args)))
+
+    def record_event(self, event):
+        if self._thread is not None:
+            self._queue.put((REC_EVENT, self._elapsed(), event))
+
+    # ===== CICLO DE VIDA =====
+
+    def start(self):
+        """Crea el directorio, abre el primer segmento e inicia el hilo escritor"""
+        if self.directory is None:
+            return self
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._started_wall = time.time()
+        self.name = datetime.fromtimestamp(self._started_wall).strftime("flight_%Y%m%d_%H%M%S")
+        self._t0 = time.monotonic()
+        self._open_segment()
+        self._thread = threading.Thread(target=self._run, name="flight-recorder", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=5.0):
+        """Vacía la cola, cierra el segmento actual y detiene el hilo"""
+        if self._thread is None:
+            return
+        thread, self._thread = self._thread, None
+        self._queue.put(None)
+        thread.join(timeout)
+
+    # ===== HILO ESCRITOR =====
+
+    def _open_segment(self):
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+        index = len(self.segments)
+        path = self.directory / f"{self.name}_{index:03d}.fdr"
+        meta = dict(self.meta, recording=self.name, segment=index,
+                    started=self._started_wall, fields=list(STATE_FIELDS))
+        meta_bytes = json.dumps(meta).encode('utf-8')
+        self._file = open(path, 'wb')
+        self._file.write(FILE_HEADER.pack(FDR_MAGIC, FDR_VERSION, FRAME_SIZE, len(meta_bytes)))
+        self._file.write(meta_bytes)
+        self._segment_bytes = FILE_HEADER.size + len(meta_bytes)
+        self._segment_opened = time.monotonic()
+        self.segments.append(path)
+
+    @staticmethod
+    def _encode(batch, kind, t, payload):
+        if kind == REC_TELEMETRY:
+            batch += RECORD_HEADER.pack(kind, len(payload), t)
+            batch += payload
+            return
+        if kind == REC_MOVE:
+            body = MOVE_PAYLOAD.pack(*payload)
+        elif kind == REC_COMMAND:
+            name, args = payload
+            body = json.dumps({'name': name, 'args': list(args)}).encode('utf-8')
+        else:
+            body = json.dumps(payload, default=str).encode('utf-8')
+        batch += RECORD_HEADER.pack(kind, len(body), t)
+        batch += body
+
+    def _run(self):
+        batch = bytearray()
+        running = True
+        while running:
+            try:
+                item = self._queue.get(timeout=FLUSH_INTERVAL)
+            except queue.Empty:
+                continue
+            count = 0
+            # Lote: lo que ya esté en cola, hasta BATCH_MAX_RECORDS
+            while True:
+                if item is None:
+                    running = False
+                    break
+                self._encode(batch, *item)
+                count += 1
+                if count >= BATCH_MAX_RECORDS:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                self._file.write(batch)
+                self._file.flush()
+                self._segment_bytes += len(batch)
+                self.bytes_written += len(batch)
+                self.records += count
+                batch.clear()
+            if running and (self._segment_bytes >= self.max_segment_bytes or
+                            time.monotonic() - self._segment_opened >= self.max_segment_seconds):
+                self._open_segment()
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        self._file = None
@@ -0,0 +1,441 @@
+"""
+Simulador local del dron
+
+Reemplaza al hardware para pruebas: mantiene pose y sensores, integra las
+velocidades comandadas en cada paso (y se detiene si dejan de llegar
+comandos), vuelve solo al punto de despegue o limita su velocidad en modo
+seguro y hace derivar los valores en pequeños pasos aleatorios. Se usa
+en proceso (SimulatedSource) o como proceso aparte que transmite frames
+del protocolo binario por loopback:
+
+    python simulator.py --rate 100 --port 14550          # UDP hacia la interfaz
+    python simulator.py --rate 500 --port 14550 --tcp    # servidor TCP
+
+Cada comando se responde con un acuse; --delay y --jitter (ms) retienen
+los acuses para emular un enlace lento al medir la latencia.
+"""
+
+import argparse
+import heapq
+import math
+import random
+import select
+import socket
+import threading
+import time
+
+from latency import LatencyMonitor
+from wire import (STATE_FIELDS, COMMAND_DTYPE, COMMAND_SIZE, CMD_MOVE, CMD_FLIGHT, CMD_RETURN_HOME,
+                  CMD_SAFE_MODE, CMD_FLAG_ALTITUDE_HOLD, RecordBuffer, ack_for, new_frame)
+
+
+# Campos de telemetría que produce el dron (mismos nombres que DroneState sin '_')
+TELEMETRY_FIELDS = STATE_FIELDS
+
+INITIAL_TELEMETRY = {
+    'x': 0.0, 'y': 0.0, 'z': 1.5,
+    'vx': 0.0, 'vy': 0.0, 'vz': 0.0,
+    'roll': 0.0, 'pitch': 0.0, 'yaw': 45.0,
+    'battery': 87.0,
+    'signal_strength': 92,
+    'latency': 45,
+    'slam_confidence': 94.0,
+    'obstacle_front': 245,
+    'obstacle_back': 380,
+    'obstacle_left': 120,
+    'obstacle_right': 185,
+    'obstacle_top': 95,
+    'obstacle_bottom': 150,
+    'temp_motor1': 42.0,
+    'temp_motor2': 44.0,
+    'temp_motor3': 43.0,
+    'temp_motor4': 45.0,
+    'temp_controller': 38.0,
+    'temp_battery': 32.0,
+    'ch4': 0.35,
+    'co': 4.2,
+    'o2': 20.8,
+    'h2s': 2.5,
+}
+
+BASE_STEP = 0.1  # segundos: las derivas están calibradas para 10 Hz
+COMMAND_TIMEOUT = 0.5  # s sin comandos de movimiento antes de detenerse
+RETURN_SPEED = 1.0     # m/s hacia el punto de despegue
+SAFE_SPEED = 0.5       # m/s máximos por eje en modo seguro
+
+
+class DroneSimulator:
+    """Modelo simple de pose y sensores con deriva aleatoria"""
+
+    def __init__(self, seed=None):
+        self._rng = random.Random(seed)
+        self.flying = False
+        self.values = dict(INITIAL_TELEMETRY)
+        self._yaw_rate = 0.0
+        self._altitude_hold = True
+        self._since_command = 0.0
+        self._home = (0.0, 0.0)
+        self.returning = False
+        self.safe = False
+
+    def _drift(self, key, step, low, high):
+        self.values[key] = max(low, min(high, self.values[key] + self._rng.uniform(-step, step)))
+
+    def set_flying(self, flying):
+        """Despegue (z = 1.5 m) o aterrizaje / parada (z = 0, velocidad nula)"""
+        self.flying = flying
+        self.returning = False
+        v = self.values
+        v['z'] = 1.5 if flying else 0.0
+        if flying:
+            self._home = (v['x'], v['y'])
+        else:
+            self.safe = False
+            v['vx'] = v['vy'] = v['vz'] = 0.0
+            self._yaw_rate = 0.0
+
+    def move(self, vx, vy, vz, yaw_rate, altitude_hold=True):
+        """Fija las velocidades comandadas (m/s, °/s); step() las integra"""
+        if not self.flying or self.returning:
+            return
+        if self.safe:
+            vx, vy, vz = (max(-SAFE_SPEED, min(SAFE_SPEED, value)) for value in (vx, vy, vz))
+            altitude_hold = True
+        v = self.values
+        v['vx'], v['vy'], v['vz'] = vx, vy, vz
+        self._yaw_rate = yaw_rate
+        self._altitude_hold = altitude_hold
+        self._since_command = 0.0
+
+    def return_home(self):
+        """Vuelve solo al punto de despegue y se mantiene allí; ignora los mandos"""
+        if self.flying:
+            self.returning = True
+            self._yaw_rate = 0.0
+
+    def safe_mode(self):
+        """Altitud fija y velocidad limitada hasta el próximo aterrizaje"""
+        if self.flying:
+            self.safe = True
+            self._altitude_hold = True
+
+    def _return_step(self, dt):
+        v = self.values
+        dx, dy = self._home[0] - v['x'], self._home[1] - v['y']
+        distance = math.hypot(dx, dy)
+        if distance < 1e-3:
+            v['vx'] = v['vy'] = v['vz'] = 0.0  # en casa: se mantiene
+            return
+        speed = min(RETURN_SPEED, distance / dt)
+        v['vx'], v['vy'], v['vz'] = dx / distance * speed, dy / distance * speed, 0.0
+        v['x'] += v['vx'] * dt
+        v['y'] += v['vy'] * dt
+
+    def _integrate(self, dt):
+        v = self.values
+        if self.returning:
+            self._return_step(dt)
+            return
+        self._since_command += dt
+        if self._since_command > COMMAND_TIMEOUT:
+            # Sin comandos del operador (enlace o interfaz caídos): se detiene
+            v['vx'] = v['vy'] = v['vz'] = 0.0
+            self._yaw_rate = 0.0
+            return
+        v['x'] += v['vx'] * dt
+        v['y'] += v['vy'] * dt
+        if not self._altitude_hold:
+            v['z'] = max(0.0, v['z'] + v['vz'] * dt)
+        v['yaw'] = (v['yaw'] + self._yaw_rate * dt) % 360.0
+
+    def step(self, dt=BASE_STEP):
+        """Avanza la simulación `dt` segundos y devuelve los valores"""
+        if self.flying:
+            self._integrate(dt)
+        # Paseo aleatorio: la amplitud escala con la raíz del paso
+        k = math.sqrt(dt / BASE_STEP)
+        v = self.values
+        v['battery'] = max(0, v['battery'] - 0.001 * dt / BASE_STEP)
+        self._drift('signal_strength', 2 * k, 0, 100)
+        self._drift('latency', 5 * k, 20, 200)
+        self._drift('slam_confidence', 1 * k, 60, 100)
+
+        # Variaciones de temperatura
+        for motor in ('temp_motor1', 'temp_motor2', 'temp_motor3', 'temp_motor4'):
+            self._drift(motor, 0.5 * k, 30, 70)
+
+        # Variaciones de distancia a obstáculos
+        self._drift('obstacle_front', 10 * k, 30, 500)
+        self._drift('obstacle_left', 5 * k, 30, 300)
+        self._drift('obstacle_right', 5 * k, 30, 300)
+
+        # Gases
+        self._drift('ch4', 0.05 * k, 0, 5)
+        self._drift('co', 0.2 * k, 0, 50)
+        self._drift('o2', 0.1 * k, 18, 22)
+        self._drift('h2s', 0.3 * k, 0, 20)
+
+        # Orientación (pequeños movimientos en vuelo)
+        if self.flying:
+            self._drift('roll', 1 * k, -15, 15)
+            self._drift('pitch', 1 * k, -15, 15)
+        return v
+
+    def fill(self, frame):
+        """Escribe los valores actuales en un frame del protocolo"""
+        for name in STATE_FIELDS:
+            frame[name] = self.values[name]
+
+    def apply_command(self, command):
+        """Aplica un comando recibido por el enlace (RecordBuffer de COMMAND_DTYPE)"""
+        kind = int(command['type'])
+        if kind == CMD_MOVE:
+            hold = bool(int(command['flags']) & CMD_FLAG_ALTITUDE_HOLD)
+            self.move(float(command['a']), float(command['b']), float(command['c']),
+                      float(command['d']), hold)
+        elif kind == CMD_FLIGHT:
+            self.set_flying(float(command['a']) > 0.5)
+        elif kind == CMD_RETURN_HOME:
+            self.return_home()
+        elif kind == CMD_SAFE_MODE:
+            self.safe_mode()
+
+
+class DelayedAcks:
+    """Acuses retenidos `delay` + U(0, `jitter`) segundos (enlace emulado)"""
+
+    def __init__(self, delay=0.0, jitter=0.0, seed=None):
+        self.delay = delay
+        self.jitter = jitter
+        self._rng = random.Random(seed)
+        self._heap = []
+        self._count = 0
+        self._ready = threading.Condition()
+
+    def push(self, ack, now):
+        due = now + self.delay + (self._rng.uniform(0, self.jitter) if self.jitter else 0.0)
+        with self._ready:
+            heapq.heappush(self._heap, (due, self._count, ack))
+            self._count += 1
+            self._ready.notify()
+
+    def next_due(self):
+        with self._ready:
+            return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now):
+        """Acuses cuyo plazo ya venció, en orden"""
+        due = []
+        with self._ready:
+            while self._heap and self._heap[0][0] <= now:
+                due.append(heapq.heappop(self._heap)[2])
+        return due
+
+    def wait_until(self, deadline):
+        """Espera hasta `deadline` o hasta el próximo acuse, lo que ocurra antes"""
+        with self._ready:
+            if self._heap:
+                deadline = min(deadline, self._heap[0][0])
+            wait = deadline - time.monotonic()
+            if wait > 0:
+                self._ready.wait(wait)
+
+
+class SimulatedSource:
+    """Fuente de telemetría en proceso: un frame del simulador cada periodo
+
+    Los comandos se reconocen como en el enlace real; con `delay`/`jitter`
+    (s) los acuses llegan retenidos y la latencia medida los refleja.
+    """
+
+    def __init__(self, simulator=None, rate_hz=10.0, delay=0.0, jitter=0.0):
+        self.simulator = simulator or DroneSimulator()
+        self.period = 1.0 / rate_hz
+        self.latency = LatencyMonitor()
+        self._acks = DelayedAcks(delay, jitter) if delay or jitter else None
+        self._next = None
+        self._seq = 0
+
+    def _acknowledge(self):
+        now = time.monotonic()
+        self.latency.sent(now)
+        if self._acks is None:
+            self.latency.acked(now)
+        else:
+            self._acks.push(now, now)
+
+    def set_flying(self, flying):
+        self.simulator.set_flying(flying)
+        self._acknowledge()
+
+    def send_movement(self, vx, vy, vz, yaw_rate, altitude_hold=True):
+        self.simulator.move(vx, vy, vz, yaw_rate, altitude_hold)
+        self._acknowledge()
+
+    def ping(self):
+        self._acknowledge()
+
+    def return_home(self):
+        self.simulator.return_home()
+        self._acknowledge()
+
+    def safe_mode(self):
+        self.simulator.safe_mode()
+        self._acknowledge()
+
+    def _wait(self, deadline):
+        """Espera hasta `deadline` entregando los acuses retenidos a tiempo"""
+        if self._acks is None:
+            wait = deadline - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            return
+        while True:
+            now = time.monotonic()
+            for sent in self._acks.pop_due(now):
+                self.latency.acked(sent, now)
+            if now >= deadline:
+                return
+            self._acks.wait_until(deadline)
+
+    def next_due(self):
+        """Instante (time.monotonic()) del próximo frame o acuse retenido"""
+        due = self._next if self._next is not None else time.monotonic()
+        if self._acks is not None:
+            ack = self._acks.next_due()
+            if ack is not None:
+                due = min(due, ack)
+        return due
+
+    def read_into(self, state, timeout=None):
+        """Espera al próximo periodo y escribe un frame en `state`; False si vence timeout"""
+        now = time.monotonic()
+        if self._next is None:
+            self._next = now
+        if timeout is not None and self._next - now > timeout:
+            self._wait(now + timeout)
+            return False
+        self._wait(self._next)
+        # Si el lector se atrasó, no se acumulan frames pendientes
+        self._next = max(self._next + self.period, time.monotonic())
+        self.simulator.step(self.period)
+        self._seq = (self._seq + 1) & 0xFFFFFFFF
+        state['seq'] = self._seq
+        state['timestamp'] = time.monotonic()
+        self.simulator.fill(state)
+        return True
+
+    def close(self):
+        pass
+
+
+# ===== PROCESO SIMULADOR =====
+
+def _drain_commands(sock, simulator, command, acks):
+    """Aplica todos los comandos pendientes sin bloquear; False si se cerró la conexión"""
+    stream = sock.type == socket.SOCK_STREAM
+    flags = socket.MSG_WAITALL if stream else 0  # en TCP, comandos completos
+    while select.select([sock], [], [], 0)[0]:
+        try:
+            n = sock.recv_into(command.raw, COMMAND_SIZE, flags)
+        except ConnectionRefusedError:
+            continue  # ICMP de un datagrama anterior sin receptor (UDP)
+        except OSError:
+            return False
+        if n == 0 and stream:
+            return False
+        if n == COMMAND_SIZE and command.raw[0:2] == b'UC':
+            simulator.apply_command(command)
+            acks.push(ack_for(command.raw), time.monotonic())
+    return True
+
+
+def _stream(send, sock, rate, simulator, acks):
+    """Transmite frames a `rate` Hz y responde comandos hasta que falle el envío"""
+    frame = new_frame()
+    command = RecordBuffer(COMMAND_DTYPE)
+    period = 1.0 / rate
+    next_time = time.monotonic()
+    seq = 0
+    sent = 0
+    report = time.monotonic() + 5
+    while True:
+        now = time.monotonic()
+        for ack in acks.pop_due(now):
+            if not send(ack):
+                return
+        if now >= next_time:
+            simulator.step(period)
+            seq = (seq + 1) & 0xFFFFFFFF
+            frame['seq'] = seq
+            frame['timestamp'] = time.monotonic()
+            simulator.fill(frame)
+            if not send(frame.view):
+                return
+            sent += 1
+            if now >= report:
+                print(f"  {sent / 5:.0f} frames/s")
+                sent = 0
+                report = now + 5
+            next_time = max(next_time + period, now)
+        # Se espera al próximo frame o acuse, atendiendo comandos mientras tanto
+        ack_due = acks.next_due()
+        wake = next_time if ack_due is None else min(next_time, ack_due)
+        if select.select([sock], [], [], max(0.0, wake - time.monotonic()))[0]:
+            if not _drain_commands(sock, simulator, command, acks):
+                return
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulador de dron (telemetría por loopback)")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=14550, help="Puerto de la interfaz (UDP) o de escucha (TCP)")
+    parser.add_argument('--rate', type=float, default=50.0, help="Frames por segundo (10-500)")
+    parser.add_argument('--tcp', action='store_true', help="Servir por TCP en lugar de UDP")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--delay', type=float, default=0.0, help="retardo de los acuses (ms)")
+    parser.add_argument('--jitter', type=float, default=0.0, help="jitter uniforme de los acuses (ms)")
+    args = parser.parse_args()
+
+    rate = max(10.0, min(500.0, args.rate))
+    simulator = DroneSimulator(args.seed)
+    acks = DelayedAcks(args.delay / 1000.0, args.jitter / 1000.0, args.seed)
+    if args.delay or args.jitter:
+        print(f"✓ Acuses retenidos {args.delay:.0f} ms + U(0, {args.jitter:.0f}) ms")
+
+    if args.tcp:
+        server = socket.create_server((args.host, args.port))
+        print(f"✓ Simulador TCP en {args.host}:{args.port} a {rate:.0f} Hz")
+        while True:
+            conn, peer = server.accept()
+            print(f"✓ Interfaz conectada: {peer[0]}:{peer[1]}")
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            def send(payload, conn=conn):
+                try:
+                    conn.sendall(payload)
+                    return True
+                except OSError:
+                    return False
+
+            _stream(send, conn, rate, simulator, acks)
+            conn.close()
+            print("⚠ Interfaz desconectada")
+    else:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind((args.host, 0))
+        target = (args.host, args.port)
+        print(f"✓ Simulador UDP → {args.host}:{args.port} a {rate:.0f} Hz")
+
+        def send(payload):
+            try:
+                sock.sendto(payload, target)
+            except ConnectionRefusedError:
+                pass  # nadie escuchando todavía: se descarta el frame
+            return True
+
+        _stream(send, sock, rate, simulator, acks)
+
+
+if __name__ == "__main__":
+    main()
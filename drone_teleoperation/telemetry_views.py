@@ -0,0 +1,68 @@
+"""
+Vistas QML de grupos de telemetría
+
+Cada grupo (gases, temperaturas, obstáculos, pose) es un QObject con una
+propiedad float por campo. Los valores se copian una vez por actualización
+visible del grupo a una lista de floats de Python; las lecturas desde QML
+(`teleop.gases.ch4`, repetidas en texto y color) solo devuelven ese valor,
+sin construir diccionarios ni QVariantMap en cada binding.
+"""
+
+import numpy as np
+from PyQt6.QtCore import QObject, pyqtProperty, pyqtSignal
+
+from wire import STATE_FIELDS
+
+
+# Propiedad QML -> campo del frame, por vista
+VIEW_FIELDS = {
+    'position': {'x': 'x', 'y': 'y', 'z': 'z'},
+    'velocity': {'vx': 'vx', 'vy': 'vy', 'vz': 'vz'},
+    'orientation': {'roll': 'roll', 'pitch': 'pitch', 'yaw': 'yaw'},
+    'obstacles': {
+        'front': 'obstacle_front', 'back': 'obstacle_back',
+        'left': 'obstacle_left', 'right': 'obstacle_right',
+        'top': 'obstacle_top', 'bottom': 'obstacle_bottom',
+    },
+    'temperatures': {
+        'motor1': 'temp_motor1', 'motor2': 'temp_motor2',
+        'motor3': 'temp_motor3', 'motor4': 'temp_motor4',
+        'controller': 'temp_controller', 'battery': 'temp_battery',
+    },
+    'gases': {'ch4': 'ch4', 'co': 'co', 'o2': 'o2', 'h2s': 'h2s'},
+}
+
+
+class TelemetryView(QObject):
+    """Base de las vistas: valores cacheados y una señal de cambio"""
+
+    FIELDS = {}
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._indices = np.array([STATE_FIELDS.index(field) for field in self.FIELDS.values()])
+        self._values = [0.0] * len(self._indices)
+
+    def update(self, vector):
+        """Copia los campos del vector de estado y notifica a QML"""
+        self._values = vector[self._indices].tolist()
+        self.changed.emit()
+
+    def to_dict(self):
+        return dict(zip(self.FIELDS, self._values))
+
+
+def _field_property(slot, changed):
+    return pyqtProperty(float, lambda self: self._values[slot], notify=changed)
+
+
+def _make_view(name, fields):
+    # PyQt exige que la señal de notificación esté declarada en la misma clase
+    changed = pyqtSignal()
+    attrs = {'FIELDS': fields, 'changed': changed, '__doc__': f"Vista QML del grupo '{name}'"}
+    for slot, key in enumerate(fields):
+        attrs[key] = _field_property(slot, changed)
+    return type(f"{name.capitalize()}View", (TelemetryView,), attrs)
+
+
+VIEW_CLASSES = {name: _make_view(name, fields) for name, fields in VIEW_FIELDS.items()}
@@ -0,0 +1,219 @@
+"""
+Ingesta de telemetría en un hilo dedicado
+
+Un único hilo atiende las fuentes de todos los drones (simulador local o
+enlaces UDP/TCP). Cada frame se decodifica en el frame preasignado de su
+dron, se evalúan las alertas del dron y se publica una copia en su lugar
+del buzón. La interfaz solo toma el snapshot más reciente: si el hilo de
+Qt se demora (un repintado pesado, por ejemplo), la ingesta sigue a su
+ritmo y los snapshots intermedios se reemplazan.
+
+Con un solo dron el hilo se bloquea en la lectura de su fuente. Con una
+flota las fuentes se leen sin bloquear y el hilo espera con select() sobre
+los sockets abiertos hasta el próximo frame de los simuladores en proceso
+o el próximo intento de reconexión de un enlace TCP caído. Solo
+los frames del dron enfocado despiertan a la interfaz; los demás quedan
+en el buzón para el resumen de la flota. Los heartbeats a cada dron (que
+mantienen la latencia medida) los envía el vigilante del enlace
+(watchdog.py), que también usa el instante del último frame de cada dron.
+
+La latencia medida con los acuses de comandos (latency.py) se calcula en
+este hilo unas veces por segundo y reemplaza en el frame el campo
+`latency` informado por el dron: alertas, interfaz y registrador ven el
+p95 de la ventana deslizante.
+
+Cada frame del dron enfocado también se copia al registrador de vuelo y
+al anillo de telemetría de los eventos marcados (event_clips.py), si se
+configuraron, se fusiona en el mapa local de ocupación (occupancy.py) y
+se entrega al publicador de observadores remotos (fanout.py), que lo
+codifica y envía en su propio hilo.
+
+Cada snapshot es una copia nueva del frame que nadie modifica después de
+publicarla: la interfaz, el registrador y el publicador la retienen el
+tiempo que necesiten sin coordinarse con la ingesta.
+"""
+
+import select
+import threading
+import time
+from urllib.parse import urlsplit
+
+from alerts import AlertEngine
+from latency import NO_LATENCY
+from simulator import SimulatedSource
+from wire import STATE_FIELDS, UdpTelemetrySource, TcpTelemetrySource, new_frame, state_vector
+
+
+LATENCY_INTERVAL = 0.5  # s entre recálculos de percentiles
+LATENCY_INDEX = STATE_FIELDS.index('latency')
+MAX_IDLE_WAIT = 0.01      # s de espera si alguna fuente no indica cuándo leerla
+
+
+class LatestValues:
+    """Buzón con el último valor de cada dron, sin bloqueos
+
+    Un único escritor reemplaza la referencia de un lugar y un único lector
+    toma la más reciente; el intercambio de referencias es atómico en
+    CPython. Solo las publicaciones del lugar enfocado despiertan al lector.
+    """
+
+    def __init__(self, count=1):
+        self.slots = [(0, None)] * count
+        self.focus = 0
+        self._consumed = True
+
+    def publish(self, index, value):
+        """Reemplaza el valor de `index`; devuelve True si el lector debe ser despertado"""
+        self.slots[index] = (self.slots[index][0] + 1, value)
+        if index == self.focus and self._consumed:
+            self._consumed = False
+            return True
+        return False
+
+    def take(self):
+        """Devuelve (secuencia, valor) del último publicado por el dron enfocado"""
+        # Marcar antes de leer: una publicación concurrente vuelve a despertar
+        self._consumed = True
+        return self.slots[self.focus]
+
+
+class TelemetrySnapshot:
+    """Telemetría decodificada más las alertas evaluadas sobre ella"""
+
+    __slots__ = ('values', 'alerts', 'received', 'latency')
+
+    def __init__(self, values, alerts, received, latency=NO_LATENCY):
+        self.values = values  # RecordBuffer (campos por nombre)
+        self.alerts = alerts  # niveles por regla del motor de alertas (int8)
+        self.received = received  # time.monotonic() de recepción
+        self.latency = latency  # LatencyStats de la ventana deslizante (ms)
+
+
+class DroneFeed:
+    """Fuente de un dron y su estado de ingesta (solo lo usa el hilo de ingesta)"""
+
+    def __init__(self, source, alert_engine=None):
+        self.source = source
+        self.alert_engine = alert_engine or AlertEngine()
+        self.state = new_frame()  # destino preasignado de la decodificación
+        self.vector = state_vector(self.state)
+        self.monitor = getattr(source, 'latency', None)
+        self.latency = NO_LATENCY
+        self.next_latency = 0.0
+        self.frames = 0
+        self.received = None  # time.monotonic() del último frame (watchdog.py)
+
+
+class TelemetryWorker(threading.Thread):
+    """Hilo de ingesta: fuentes -> decodificación -> alertas -> buzón"""
+
+    def __init__(self, feeds, notify=None, poll_timeout=0.5, recorder=None, clips=None,
+                 publisher=None, occupancy=None):
+        super().__init__(name="telemetry-ingest", daemon=True)
+        self.feeds = list(feeds)
+        self.recorder = recorder
+        self.clips = clips
+        self.publisher = publisher
+        self.occupancy = occupancy
+        self.latest = LatestValues(len(self.feeds))
+        self._notify = notify  # se llama desde este hilo (p. ej. emit de una señal Qt)
+        self._poll_timeout = poll_timeout
+        self._stop_event = threading.Event()
+        self.frames = 0
+
+    def set_focus(self, index):
+        """Dron cuyos frames despiertan a la interfaz y se registran"""
+        self.latest.focus = index
+
+    def _ingest(self, index, feed, now):
+        vector = feed.vector
+        if feed.monitor is not None:
+            if now >= feed.next_latency:
+                feed.latency = feed.monitor.stats(now)
+                feed.next_latency = now + LATENCY_INTERVAL
+            if feed.latency.count or feed.latency.p95:
+                vector[LATENCY_INDEX] = feed.latency.p95
+        engine = feed.alert_engine
+        engine.update(vector, now)
+        snapshot = TelemetrySnapshot(feed.state.copy(), engine.levels, now, feed.latency)
+        if index == self.latest.focus:
+            if self.recorder is not None:
+                # La copia del snapshot no se modifica: el registrador la escribe tal cual
+                self.recorder.record_frame(snapshot.values.raw, now)
+            if self.clips is not None:
+                self.clips.add_telemetry(feed.state.record, now)
+            if self.occupancy is not None:
+                self.occupancy.integrate(vector)
+            if self.publisher is not None:
+                self.publisher.offer(snapshot.values)
+        feed.frames += 1
+        feed.received = now
+        self.frames += 1
+        if self.latest.publish(index, snapshot) and self._notify is not None:
+            self._notify()
+
+    def run(self):
+        if len(self.feeds) == 1:
+            self._run_single()
+        else:
+            self._run_fleet()
+
+    def _run_single(self):
+        feed = self.feeds[0]
+        source = feed.source
+        while not self._stop_event.is_set():
+            if source.read_into(feed.state, self._poll_timeout):
+                self._ingest(0, feed, time.monotonic())
+            elif not getattr(source, 'connected', True):
+                # Enlace TCP caído: hasta el próximo intento de reconexión
+                wait = min(self._poll_timeout, source.next_due() - time.monotonic())
+                self._stop_event.wait(max(0.0, wait))
+
+    def _run_fleet(self):
+        sources = [feed.source for feed in self.feeds]
+        sockets = [source for source in sources if hasattr(source, 'fileno')]
+        scheduled = [source for source in sources if hasattr(source, 'next_due')]
+        unknown = sum(1 for source in sources if source not in sockets and source not in scheduled)
+        while not self._stop_event.is_set():
+            for index, feed in enumerate(self.feeds):
+                while feed.source.read_into(feed.state, 0):
+                    self._ingest(index, feed, time.monotonic())
+            now = time.monotonic()
+            # Hasta el próximo frame (o acuse) de los simuladores o datos en algún socket
+            wait = self._poll_timeout
+            if unknown:
+                wait = min(wait, MAX_IDLE_WAIT)
+            for source in scheduled:
+                wait = min(wait, source.next_due() - now)
+            wait = max(0.0, wait)
+            # Los sockets cerrados (enlace TCP caído) quedan fuera del select
+            readable = [source for source in sockets if source.fileno() >= 0]
+            if readable:
+                select.select(readable, [], [], wait)
+            elif wait:
+                time.sleep(wait)
+
+    def stop(self, timeout=1.0):
+        """Detiene el hilo y cierra las fuentes"""
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
+        for feed in self.feeds:
+            feed.source.close()
+
+
+def open_source(link='sim', rate_hz=10.0, delay=0.0, jitter=0.0):
+    """Crea la fuente de telemetría: 'sim', 'udp://host:puerto' o 'tcp://host:puerto'
+
+    `delay` y `jitter` (s) retienen los acuses del simulador en proceso.
+    """
+    if link == 'sim':
+        return SimulatedSource(rate_hz=rate_hz, delay=delay, jitter=jitter)
+    url = urlsplit(link)
+    host = url.hostname or '127.0.0.1'
+    port = url.port or 14550
+    if url.scheme == 'udp':
+        return UdpTelemetrySource(host, port)
+    if url.scheme == 'tcp':
+        return TcpTelemetrySource(host, port)
+    raise ValueError(f"Enlace no soportado: {link}")
@@ -0,0 +1,474 @@
+"""
+Vigilancia del enlace y canal de emergencia independientes del hilo de Qt
+
+Un hilo de alta prioridad (SCHED_FIFO si el sistema lo permite) revisa el
+enlace cada 20 ms, sin pasar por el bucle de eventos de Qt:
+
+    heartbeats   ping a cada dron que no recibió comandos en los últimos
+                 HEARTBEAT_INTERVAL s (en tierra o sin foco)
+    enlace       perdido si no llega telemetría o un comando sigue sin
+                 acuse durante más que el presupuesto (`link_timeout`);
+                 con el dron comandado en vuelo ejecuta el riskBehavior
+                 de la misión (return_base, hover, mark_continue,
+                 alert_only) antes de avisar a la interfaz
+    interfaz     el hilo de Qt late cada GUI_HEARTBEAT_MS; si se detiene
+                 más de `gui_timeout` en vuelo, los mandos quedan al
+                 centro para que el lazo de comandos no siga repitiendo
+                 la última deflexión
+    E-STOP       datagramas b'ESTOP', b'HOVER', b'RTH' o b'SAFE' en un
+                 puerto UDP local (botón físico, pedal u otro proceso)
+
+Las emergencias (EmergencyChannel) se envían desde el hilo que las pide:
+el slot de la interfaz, el vigilante o el puerto local. La interfaz se
+entera después por una señal en cola, actualiza su estado y escribe los
+mensajes: este hilo no imprime (la salida estándar puede bloquearlo).
+
+Paradas de emergencia con el hilo de Qt detenido (E-STOP por la cola de Qt
+contra el canal de emergencia, con un slot de la interfaz en cola que
+reconfigura el lazo), carrera entre la parada y el lazo de comandos y
+detección de pérdida de enlace:
+    python watchdog.py --stall-test
+"""
+
+import argparse
+import os
+import random
+import select
+import socket
+import sys
+import threading
+import time
+
+
+HEARTBEAT_INTERVAL = 0.2  # s sin comandos antes de un heartbeat
+LINK_TIMEOUT = 1.0        # s sin telemetría o sin acuse: enlace perdido
+GUI_TIMEOUT = 0.3         # s sin latido del hilo de Qt en vuelo: mandos al centro
+GUI_HEARTBEAT_MS = 50     # latido del hilo de Qt
+WATCHDOG_PERIOD = 0.02    # s entre revisiones
+WATCHDOG_PRIORITY = 10    # SCHED_FIFO
+RISK_BEHAVIORS = ('return_base', 'hover', 'mark_continue', 'alert_only')
+DEFAULT_RISK_BEHAVIOR = 'return_base'
+EMERGENCY_MESSAGES = {b'ESTOP': 'E-STOP', b'HOVER': 'HOVER', b'RTH': 'RTH', b'SAFE': 'SAFE_MODE'}
+
+
+class EmergencyChannel:
+    """Comandos de emergencia enviados desde el hilo que los pide
+
+    Solo toca el lazo de comandos y el enlace del dron comandado, ambos
+    seguros entre hilos; el estado de la interfaz lo actualiza el hilo de Qt.
+    """
+
+    def __init__(self, commands, recorder=None):
+        self.commands = commands
+        self.recorder = recorder
+
+    def _record(self, name, origin):
+        if self.recorder is not None:
+            self.recorder.record_command(name, origin)
+
+    def emergency_stop(self, origin):
+        """Corta el movimiento y detiene el dron"""
+        # Primero el lazo (parada retenida hasta rearmar): ningún comando de
+        # movimiento sale después de FLIGHT=0, ni aunque la interfaz reconfigure
+        self.commands.emergency_stop()
+        self.commands.source.set_flying(False)
+        self._record('emergencyStop', origin)
+
+    def hover(self, origin):
+        """Mandos al centro y comando nulo inmediato"""
+        self.commands.hold()
+        self.commands.source.send_movement(0.0, 0.0, 0.0, 0.0, self.commands.altitude_hold)
+        self._record('hover', origin)
+
+    def return_home(self, origin):
+        """Mandos al centro y retorno autónomo al punto de despegue"""
+        self.commands.hold()
+        self.commands.source.return_home()
+        self._record('returnToHome', origin)
+
+    def safe_mode(self, origin):
+        """Altitud fija y velocidad limitada en el dron"""
+        self.commands.source.safe_mode()
+        self._record('safeMode', origin)
+
+    def send(self, kind, origin):
+        """Emergencia por nombre de evento ('E-STOP', 'HOVER', 'RTH', 'SAFE_MODE')"""
+        {'E-STOP': self.emergency_stop, 'HOVER': self.hover,
+         'RTH': self.return_home, 'SAFE_MODE': self.safe_mode}[kind](origin)
+
+    def failsafe(self, behavior, origin):
+        """Parte de enlace del riskBehavior; devuelve False si no aplica (en tierra)"""
+        if behavior == 'alert_only' or not self.commands.flying:
+            return False
+        if behavior == 'hover':
+            self.hover(origin)
+        elif behavior == 'return_base':
+            self.return_home(origin)
+        else:
+            # El marcado lo hace la interfaz; nadie debe seguir pilotando a ciegas
+            self.commands.hold()
+        self._record('failsafe', f"{behavior}:{origin}")
+        return True
+
+
+class LinkWatchdog(threading.Thread):
+    """Heartbeats, pérdida de enlace, latido de la interfaz y E-STOP externo
+
+    `notify(evento, dron)` se llama desde este hilo (p. ej. emit de una señal
+    Qt): 'link_lost', 'link_restored', 'gui_stalled' o una emergencia
+    externa ('E-STOP', 'HOVER', 'RTH', 'SAFE_MODE').
+    """
+
+    def __init__(self, worker, channel, risk_behavior=DEFAULT_RISK_BEHAVIOR, link_timeout=LINK_TIMEOUT,
+                 gui_timeout=GUI_TIMEOUT, notify=None, estop_port=None):
+        super().__init__(name="link-watchdog", daemon=True)
+        if risk_behavior not in RISK_BEHAVIORS:
+            raise ValueError(f"riskBehavior no soportado: {risk_behavior}")
+        self.worker = worker
+        self.channel = channel
+        self.risk_behavior = risk_behavior
+        self.link_timeout = link_timeout
+        self.gui_timeout = gui_timeout
+        self._notify = notify
+        self._listener = None
+        if estop_port is not None:
+            self._listener = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self._listener.bind(('127.0.0.1', estop_port))
+            self._listener.setblocking(False)
+        self._created = time.monotonic()
+        self._gui_beat = self._created
+        self._gui_stalled = False
+        self._running = threading.Event()
+        self.lost = [False] * len(worker.feeds)
+        self.priority = 'normal'
+        self.losses = 0
+        self.gui_stalls = 0
+        self.last_loss = None       # time.monotonic() de la última pérdida detectada
+        self.last_emergency = None  # time.monotonic() del último E-STOP/HOVER externo
+
+    @property
+    def estop_address(self):
+        return self._listener.getsockname() if self._listener is not None else None
+
+    def gui_alive(self):
+        """Latido del hilo de Qt (QTimer)"""
+        self._gui_beat = time.monotonic()
+
+    def _raise_priority(self):
+        # En Linux el pid 0 es el hilo que llama
+        try:
+            os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(WATCHDOG_PRIORITY))
+            self.priority = 'SCHED_FIFO'
+        except (AttributeError, OSError):
+            pass
+
+    def run(self):
+        self._raise_priority()
+        self._running.set()
+        while self._running.is_set():
+            if self._listener is not None:
+                # Un E-STOP externo despierta al hilo de inmediato
+                if select.select([self._listener], [], [], WATCHDOG_PERIOD)[0]:
+                    self._receive_emergencies()
+            else:
+                time.sleep(WATCHDOG_PERIOD)
+            now = time.monotonic()
+            self._send_heartbeats(now)
+            self._check_links(now)
+            self._check_gui(now)
+        if self._listener is not None:
+            self._listener.close()
+
+    def _receive_emergencies(self):
+        while True:
+            try:
+                message = self._listener.recv(64)
+            except OSError:
+                return
+            kind = EMERGENCY_MESSAGES.get(message.strip().upper())
+            if kind is None:
+                continue
+            self.channel.send(kind, 'external')
+            self.last_emergency = time.monotonic()
+            self._emit(kind, self.worker.latest.focus)
+
+    def _send_heartbeats(self, now):
+        for feed in self.worker.feeds:
+            monitor = feed.monitor
+            if monitor is None or now - monitor.last_sent >= HEARTBEAT_INTERVAL:
+                feed.source.ping()
+
+    def _check_links(self, now):
+        focus = self.worker.latest.focus
+        for index, feed in enumerate(self.worker.feeds):
+            silent = now - (feed.received if feed.received is not None else self._created)
+            waiting = feed.monitor.waiting(now) if feed.monitor is not None else 0.0
+            lost = max(silent, waiting) > self.link_timeout
+            if lost == self.lost[index]:
+                continue
+            self.lost[index] = lost
+            if lost:
+                self.losses += 1
+                self.last_loss = now
+                if index == focus:
+                    self.channel.failsafe(self.risk_behavior, 'link_lost')
+                self._emit('link_lost', index)
+            else:
+                self._emit('link_restored', index)
+
+    def _check_gui(self, now):
+        stalled = now - self._gui_beat > self.gui_timeout
+        if stalled and not self._gui_stalled and self.channel.commands.flying:
+            self.gui_stalls += 1
+            self.channel.commands.hold()
+            self._emit('gui_stalled', self.worker.latest.focus)
+        self._gui_stalled = stalled
+
+    def _emit(self, event, index):
+        if self._notify is not None:
+            self._notify(event, index)
+
+    def stop(self, timeout=1.0):
+        self._running.clear()
+        if self.is_alive():
+            self.join(timeout)
+
+
+# ===== PRUEBA CON EL HILO DE QT DETENIDO =====
+
+RACE_RATE_HZ = 1000.0
+
+
+class _OrderProbe:
+    """Enlace que cuenta los MOVE enviados después de FLIGHT=0"""
+
+    def __init__(self):
+        self.stopped = False
+        self.moves = 0
+        self.late = 0
+
+    def send_movement(self, vx, vy, vz, yaw_rate, altitude_hold=True):
+        self.moves += 1
+        if self.stopped:
+            self.late += 1
+
+    def set_flying(self, flying):
+        self.stopped = not flying
+
+
+def _race_check(trials):
+    """Paradas en instantes al azar contra el lazo de comandos a RACE_RATE_HZ
+
+    Tras cada parada se reconfigura el lazo como lo haría un slot de la
+    interfaz en cola; devuelve (MOVE después de FLIGHT=0, MOVE totales).
+    """
+    from command_loop import CommandLoop
+
+    probe = _OrderProbe()
+    loop = CommandLoop(probe, rate_hz=RACE_RATE_HZ)
+    channel = EmergencyChannel(loop)
+    loop.start()
+    rng = random.Random(2)
+    for _ in range(trials):
+        loop.rearm()
+        probe.stopped = False
+        loop.configure(True, True, 'normal', False)
+        time.sleep(rng.uniform(0.002, 0.01))
+        channel.emergency_stop('race')
+        loop.configure(True, True, 'normal', False)
+        time.sleep(0.005)
+    loop.stop()
+    return probe.late, probe.moves
+
+
+def _stall_test(args):
+    """E-STOP y pérdida de enlace mientras el hilo de Qt está bloqueado"""
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from pathlib import Path
+    import numpy as np
+    from PyQt6.QtCore import Q_ARG, QMetaObject, QObject, Qt, QUrl, pyqtSlot, qInstallMessageHandler
+    from PyQt6.QtQml import QQmlApplicationEngine
+    from PyQt6.QtWidgets import QApplication
+
+    import main
+    from simulator import SimulatedSource
+
+    class ProbeSource(SimulatedSource):
+        """Simulador con enlace que se puede cortar; registra cuándo llega la parada"""
+
+        def __init__(self, rate_hz):
+            super().__init__(rate_hz=rate_hz)
+            self.link_up = True
+            self.stopped = None
+            self.moves_after_stop = 0  # MOVE recibidos entre una parada y el próximo despegue
+
+        def set_flying(self, flying):
+            if not self.link_up:
+                self.latency.sent(time.monotonic())
+                return
+            super().set_flying(flying)
+            if flying:
+                self.stopped = None
+            elif self.stopped is None:
+                self.stopped = time.monotonic()
+
+        def send_movement(self, vx, vy, vz, yaw_rate, altitude_hold=True):
+            if not self.link_up:
+                self.latency.sent(time.monotonic())
+                return
+            if self.stopped is not None:
+                self.moves_after_stop += 1
+            super().send_movement(vx, vy, vz, yaw_rate, altitude_hold)
+
+        def ping(self):
+            if not self.link_up:
+                self.latency.sent(time.monotonic())
+                return
+            super().ping()
+
+        def read_into(self, state, timeout=None):
+            if not self.link_up:
+                time.sleep(min(0.05, timeout if timeout is not None else 0.05))
+                return False
+            return super().read_into(state, timeout)
+
+    class Staller(QObject):
+        """Bloquea el hilo de Qt (repintado pesado, JS lento, E/S síncrona)"""
+
+        def __init__(self):
+            super().__init__()
+            self.seconds = 0.0
+            self.started = threading.Event()
+            self.finished = threading.Event()
+
+        @pyqtSlot()
+        def stall(self):
+            self.started.set()
+            time.sleep(self.seconds)
+            self.finished.set()
+
+    def invoke(target, slot):
+        QMetaObject.invokeMethod(target, slot, Qt.ConnectionType.QueuedConnection)
+
+    def wait_for(condition, timeout):
+        end = time.monotonic() + timeout
+        while not condition() and time.monotonic() < end:
+            time.sleep(0.005)
+        return condition()
+
+    qInstallMessageHandler(lambda *a: None)
+    app = QApplication([sys.argv[0]])
+    engine = QQmlApplicationEngine()
+    source = ProbeSource(args.rate)
+    controller = main.TeleoperationController(source, risk_behavior='hover', estop_port=0,
+                                              link_timeout=args.link_timeout / 1000.0)
+    engine.rootContext().setContextProperty("teleop", controller)
+    engine.load(QUrl.fromLocalFile(str(Path(__file__).parent / "qml" / "Main.qml")))
+    staller = Staller()
+    watchdog = controller._watchdog
+    stall = args.stall / 1000.0
+    rng = random.Random(1)
+    results = {'gui': [], 'channel': [], 'link': []}
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def stall_gui():
+        staller.started.clear()
+        staller.finished.clear()
+        staller.seconds = stall
+        invoke(staller, "stall")
+        staller.started.wait()
+
+    def take_off():
+        invoke(controller, "arm")
+        invoke(controller, "takeoff")
+        return wait_for(lambda: source.simulator.flying, 2.0)
+
+    def scenario():
+        time.sleep(1.0)  # carga del QML
+        for trial in range(args.trials):
+            for path in ('gui', 'channel'):
+                if not take_off():
+                    continue
+                source.stopped = None
+                stall_gui()
+                time.sleep(rng.uniform(0.1, 0.6) * stall)
+                pressed = time.monotonic()
+                if path == 'gui':
+                    invoke(controller, "emergencyStop")  # botón de la interfaz: pasa por la cola de Qt
+                else:
+                    # Un slot ya en cola reconfigura el lazo antes de que la interfaz
+                    # se entere de la parada: no debe reactivar el movimiento
+                    QMetaObject.invokeMethod(controller, "setAltitudeHold",
+                                             Qt.ConnectionType.QueuedConnection, Q_ARG(bool, True))
+                    sender.sendto(b'ESTOP', watchdog.estop_address)
+                if wait_for(lambda: source.stopped is not None, stall + 2.0):
+                    results[path].append(source.stopped - pressed)
+                staller.finished.wait()
+                time.sleep(0.2)
+        for trial in range(args.link_trials):
+            if not take_off():
+                continue
+            losses = watchdog.losses
+            stall_gui()
+            source.link_up = False
+            cut = time.monotonic()
+            if wait_for(lambda: watchdog.losses > losses, args.link_timeout / 1000.0 + stall + 1.0):
+                results['link'].append(watchdog.last_loss - cut)
+            staller.finished.wait()
+            source.link_up = True
+            wait_for(lambda: not watchdog.lost[0], 2.0)
+            invoke(controller, "land")
+            time.sleep(0.3)
+        QMetaObject.invokeMethod(app, "quit", Qt.ConnectionType.QueuedConnection)
+
+    threading.Thread(target=scenario, daemon=True).start()
+    app.exec()
+    stalls = watchdog.gui_stalls
+    priority = watchdog.priority
+    moves_after_stop = source.moves_after_stop
+    controller.shutdown()
+    race_late, race_moves = _race_check(args.race_trials)
+
+    print(f"\nE-STOP con el hilo de Qt detenido {args.stall:.0f} ms (pulsado en un instante al azar de la detención)")
+    print(f"  hilo del vigilante: {priority}; detenciones detectadas: {stalls}")
+    print(f"{'vía':24s} {'n':>3} {'p50':>9} {'p99':>9} {'máx':>9}")
+    for key, label in (('gui', 'slot de Qt (en cola)'), ('channel', 'canal de emergencia'),
+                       ('link', 'pérdida de enlace')):
+        if not results[key]:
+            continue
+        values = np.array(results[key]) * 1000.0
+        p50, p99 = np.percentile(values, (50, 99))
+        print(f"{label:24s} {len(values):3d} {p50:6.1f} ms {p99:6.1f} ms {values.max():6.1f} ms")
+    print(f"  MOVE recibidos después de FLIGHT=0 (con slots en cola reconfigurando): {moves_after_stop}")
+    print(f"  carrera parada/lazo a {RACE_RATE_HZ:.0f} Hz, {args.race_trials} paradas: "
+          f"{race_late} MOVE después de FLIGHT=0 de {race_moves}")
+    channel_ok = bool(results['channel']) and max(results['channel']) * 1000.0 < args.bound
+    latch_ok = moves_after_stop == 0 and race_late == 0
+    link_ok = (bool(results['link']) and
+               max(results['link']) * 1000.0 < args.link_timeout + WATCHDOG_PERIOD * 1000.0 + args.bound)
+    print(f"{'✓' if channel_ok else '⚠'} E-STOP por el canal de emergencia < {args.bound:.0f} ms "
+          f"con la interfaz detenida")
+    print(f"{'✓' if latch_ok else '⚠'} Ningún comando de movimiento después de la parada")
+    print(f"{'✓' if link_ok else '⚠'} Pérdida de enlace detectada dentro del presupuesto "
+          f"({args.link_timeout:.0f} ms + {WATCHDOG_PERIOD * 1000:.0f} ms de revisión)")
+    return 0 if channel_ok and latch_ok and link_ok else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vigilancia del enlace y canal de emergencia")
+    parser.add_argument('--stall-test', action='store_true', help="E-STOP con el hilo de Qt detenido")
+    parser.add_argument('--stall', type=float, default=1000.0, metavar='MS', help="duración de cada detención")
+    parser.add_argument('--trials', type=int, default=10, help="E-STOP por vía")
+    parser.add_argument('--link-trials', type=int, default=3)
+    parser.add_argument('--race-trials', type=int, default=200, help="paradas contra el lazo a 1 kHz")
+    parser.add_argument('--link-timeout', type=float, default=LINK_TIMEOUT * 1000.0, metavar='MS')
+    parser.add_argument('--rate', type=float, default=50.0, help="frecuencia de telemetría (Hz)")
+    parser.add_argument('--bound', type=float, default=50.0, metavar='MS', help="cota esperada del E-STOP")
+    args = parser.parse_args()
+    if args.stall_test:
+        sys.exit(_stall_test(args))
+    parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
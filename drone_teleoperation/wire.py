@@ -0,0 +1,489 @@
+"""
+Protocolo binario de telemetría y comandos
+
+Cada frame de estado es un registro de tamaño fijo (little-endian):
+
+    magic u16 ('TU') | version u8 | flags u8 | seq u32 | timestamp f64
+    29 × f32: posición, velocidad, orientación, batería, enlace, SLAM,
+              6 distancias a obstáculos, 6 temperaturas, 4 gases
+
+El receptor lee con recv_into sobre un buffer preasignado, valida la
+cabecera leyendo bytes sueltos y copia el frame completo al estado del
+hilo de ingesta (una copia de memoria, sin diccionarios ni objetos por
+frame). Los campos se leen por nombre a través de una vista NumPy sobre
+los mismos bytes.
+
+Los comandos hacia el dron usan un registro de 32 bytes ('UC'). El dron
+responde cada comando con un acuse del mismo tamaño ('UA') que repite su
+tipo, secuencia y marca de tiempo; con ellos se mide la latencia de ida y
+vuelta (latency.py).
+
+Benchmark de decodificación:
+    python wire.py --bench
+"""
+
+import abc
+import argparse
+import socket
+import struct
+import sys
+import threading
+import time
+
+import numpy as np
+
+from latency import LatencyMonitor
+
+
+MAGIC = b'TU'
+COMMAND_MAGIC = b'UC'
+ACK_MAGIC = b'UA'
+VERSION = 1
+
+# Campos de estado en el orden del frame
+STATE_FIELDS = (
+    'x', 'y', 'z',
+    'vx', 'vy', 'vz',
+    'roll', 'pitch', 'yaw',
+    'battery', 'signal_strength', 'latency', 'slam_confidence',
+    'obstacle_front', 'obstacle_back', 'obstacle_left',
+    'obstacle_right', 'obstacle_top', 'obstacle_bottom',
+    'temp_motor1', 'temp_motor2', 'temp_motor3', 'temp_motor4',
+    'temp_controller', 'temp_battery',
+    'ch4', 'co', 'o2', 'h2s',
+)
+
+HEADER_FIELDS = [('magic', 'S2'), ('version', 'u1'), ('flags', 'u1'),
+                 ('seq', '<u4'), ('timestamp', '<f8')]
+
+FRAME_DTYPE = np.dtype(HEADER_FIELDS + [(name, '<f4') for name in STATE_FIELDS])
+FRAME_SIZE = FRAME_DTYPE.itemsize  # 132 bytes
+HEADER_SIZE = FRAME_SIZE - 4 * len(STATE_FIELDS)
+
+# Comandos: MOVE (vx, vy, vz en m/s, guiñada en °/s), FLIGHT (a = 1 en vuelo,
+# 0 en tierra), PING (sin efecto, solo se responde con el acuse), RETURN_HOME
+# (el dron vuelve solo al punto de despegue) y SAFE_MODE (altitud fija y
+# velocidad limitada por el propio dron)
+CMD_MOVE = 1
+CMD_FLIGHT = 2
+CMD_PING = 3
+CMD_RETURN_HOME = 4
+CMD_SAFE_MODE = 5
+CMD_FLAG_ALTITUDE_HOLD = 0x01
+
+COMMAND_DTYPE = np.dtype([('magic', 'S2'), ('type', 'u1'), ('flags', 'u1'),
+                          ('seq', '<u4'), ('timestamp', '<f8'),
+                          ('a', '<f4'), ('b', '<f4'), ('c', '<f4'), ('d', '<f4')])
+COMMAND_SIZE = COMMAND_DTYPE.itemsize  # 32 bytes
+ACK_FIELDS = struct.Struct('<4xId')     # seq y marca de tiempo repetidas
+
+_SEQ_HALF = 1 << 31
+
+# Reconexión TCP: espera inicial y máxima entre intentos (s)
+RECONNECT_MIN = 0.5
+RECONNECT_MAX = 5.0
+
+# UDP: sin frames válidos del emisor fijado durante este tiempo (s) se vuelve
+# a aceptar cualquier origen (el mismo plazo que LINK_TIMEOUT en watchdog.py)
+PEER_TIMEOUT = 1.0
+
+
+def seq_newer(seq, last):
+    """True si `seq` es posterior a `last` (aritmética módulo 2^32)"""
+    return 0 < ((seq - last) & 0xFFFFFFFF) < _SEQ_HALF
+
+
+class RecordBuffer:
+    """Registro preasignado: bytes crudos + vista NumPy con campos nombrados"""
+
+    __slots__ = ('raw', 'view', 'record')
+
+    def __init__(self, dtype=FRAME_DTYPE):
+        self.raw = bytearray(dtype.itemsize)
+        self.view = memoryview(self.raw)
+        self.record = np.frombuffer(self.raw, dtype=dtype).reshape(())
+
+    def __getitem__(self, name):
+        return self.record[name]
+
+    def __setitem__(self, name, value):
+        self.record[name] = value
+
+    def copy_from(self, other):
+        self.view[:] = other.view
+
+    def copy(self):
+        clone = RecordBuffer(self.record.dtype)
+        clone.view[:] = self.view
+        return clone
+
+
+def new_frame():
+    """Frame de estado vacío con cabecera válida"""
+    frame = RecordBuffer(FRAME_DTYPE)
+    frame['magic'] = MAGIC
+    frame['version'] = VERSION
+    return frame
+
+
+def state_vector(frame):
+    """Campos de estado de un frame como vector float32 (vista, sin copia)"""
+    return np.frombuffer(frame.raw, dtype='<f4', count=len(STATE_FIELDS), offset=HEADER_SIZE)
+
+
+def new_command():
+    command = RecordBuffer(COMMAND_DTYPE)
+    command['magic'] = COMMAND_MAGIC
+    return command
+
+
+def is_ack(raw, nbytes):
+    return nbytes == COMMAND_SIZE and raw[0] == 0x55 and raw[1] == 0x41  # 'UA'
+
+
+def ack_for(command_bytes):
+    """Acuse de un comando recibido: los mismos bytes con magic 'UA'"""
+    return ACK_MAGIC + bytes(command_bytes[2:COMMAND_SIZE])
+
+
+class FrameDecoder:
+    """Valida frames recibidos en su buffer y los copia al estado destino"""
+
+    def __init__(self):
+        self.buffer = RecordBuffer(FRAME_DTYPE)
+        # Vista del número de secuencia; el formato es little-endian
+        self._seq = self.buffer.view[4:8].cast('I') if sys.byteorder == 'little' else None
+        self.last_seq = None
+        self.decoded = 0
+        self.rejected = 0  # tamaño, magic o versión inválidos
+        self.stale = 0     # duplicados o desordenados (UDP)
+
+    def _read_seq(self):
+        if self._seq is not None:
+            return self._seq[0]
+        return int.from_bytes(self.buffer.raw[4:8], 'little')
+
+    def decode_into(self, nbytes, state):
+        """Copia el frame de `self.buffer` a `state`; False si se descarta"""
+        raw = self.buffer.raw
+        if nbytes != FRAME_SIZE or raw[0] != 0x54 or raw[1] != 0x55 or raw[2] != VERSION:
+            self.rejected += 1
+            return False
+        seq = self._read_seq()
+        if self.last_seq is not None and not seq_newer(seq, self.last_seq):
+            self.stale += 1
+            return False
+        self.last_seq = seq
+        state.view[:] = self.buffer.view
+        self.decoded += 1
+        return True
+
+
+class _CommandSender(abc.ABC):
+    """Codifica comandos en un buffer preasignado (hilo de Qt y lazo de comandos)"""
+
+    def __init__(self):
+        self._command = new_command()
+        self._seq = 0
+        self._lock = threading.Lock()
+        self.latency = LatencyMonitor()
+
+    def _encode(self, kind, flags, a=0.0, b=0.0, c=0.0, d=0.0):
+        command = self._command
+        self._seq = (self._seq + 1) & 0xFFFFFFFF
+        command['type'] = kind
+        command['flags'] = flags
+        command['seq'] = self._seq
+        now = time.monotonic()
+        command['timestamp'] = now
+        self.latency.sent(now)
+        command['a'] = a
+        command['b'] = b
+        command['c'] = c
+        command['d'] = d
+        return command.view
+
+    def send_movement(self, vx, vy, vz, yaw_rate, altitude_hold=True):
+        flags = CMD_FLAG_ALTITUDE_HOLD if altitude_hold else 0
+        with self._lock:
+            self._send(self._encode(CMD_MOVE, flags, vx, vy, vz, yaw_rate))
+
+    def set_flying(self, flying):
+        with self._lock:
+            self._send(self._encode(CMD_FLIGHT, 0, 1.0 if flying else 0.0))
+
+    def ping(self):
+        with self._lock:
+            self._send(self._encode(CMD_PING, 0))
+
+    def return_home(self):
+        with self._lock:
+            self._send(self._encode(CMD_RETURN_HOME, 0))
+
+    def safe_mode(self):
+        with self._lock:
+            self._send(self._encode(CMD_SAFE_MODE, 0))
+
+    def _receive_ack(self, raw):
+        _, timestamp = ACK_FIELDS.unpack_from(raw)
+        self.latency.acked(timestamp)
+
+    @abc.abstractmethod
+    def _send(self, payload):
+        """Envía un comando codificado por el enlace (errores de envío ignorados)"""
+
+
+class UdpTelemetrySource(_CommandSender):
+    """Recibe frames por UDP; los comandos vuelven al emisor de los frames
+
+    El socket se conecta al emisor del primer frame válido: desde entonces
+    el sistema descarta los datagramas de cualquier otro origen. Si ese
+    emisor pasa PEER_TIMEOUT sin enviar un frame válido (el dron o el
+    simulador se reiniciaron, quizá desde otro puerto y con la secuencia
+    otra vez en cero), se reabre el socket sin fijar y se olvida la
+    última secuencia.
+    """
+
+    def __init__(self, host='127.0.0.1', port=14550):
+        super().__init__()
+        self.decoder = FrameDecoder()
+        self._address = (host, port)
+        self._sock = self._open()
+        self._timeout = None
+        self._peer = None
+        self._last_valid = 0.0
+        self.unpins = 0
+
+    def _open(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind(self._address)
+        return sock
+
+    def _unpin(self):
+        """Vuelve a aceptar frames de cualquier origen (nueva sesión del dron)"""
+        self._peer = None
+        self._sock.close()
+        self._sock = self._open()
+        self._timeout = None
+        self.decoder.last_seq = None
+        self.unpins += 1
+
+    def read_into(self, state, timeout=None):
+        if self._peer is not None and time.monotonic() - self._last_valid > PEER_TIMEOUT:
+            self._unpin()
+        if timeout != self._timeout:
+            self._sock.settimeout(timeout)
+            self._timeout = timeout
+        try:
+            if self._peer is None:
+                nbytes, peer = self._sock.recvfrom_into(self.decoder.buffer.raw)
+            else:
+                nbytes = self._sock.recv_into(self.decoder.buffer.raw)
+        except (socket.timeout, OSError):
+            return False
+        raw = self.decoder.buffer.raw
+        if self._peer is None:
+            # Solo un frame válido fija el dron; hasta entonces no hay acuses
+            if not self.decoder.decode_into(nbytes, state):
+                return False
+            self._sock.connect(peer)
+            self._peer = peer
+            self._last_valid = time.monotonic()
+            return True
+        if is_ack(raw, nbytes):
+            self._receive_ack(raw)
+            return False
+        if not self.decoder.decode_into(nbytes, state):
+            return False
+        self._last_valid = time.monotonic()
+        return True
+
+    def _send(self, payload):
+        sock = self._sock  # el hilo de ingesta puede reemplazarlo
+        if self._peer is not None:
+            try:
+                sock.send(payload)
+            except OSError:
+                pass
+
+    def fileno(self):
+        """Socket para select() (hilo de ingesta compartido por la flota)"""
+        return self._sock.fileno()
+
+    def close(self):
+        self._sock.close()
+
+
+class TcpTelemetrySource(_CommandSender):
+    """Recibe frames y acuses por un flujo TCP (el dron es el servidor)
+
+    Se leen primero COMMAND_SIZE bytes (el mensaje más corto); el magic
+    indica si es un acuse completo o el comienzo de un frame.
+
+    Si el dron cierra la conexión o esta falla, el socket se cierra (sale
+    del select() del hilo de ingesta: fileno() pasa a -1) y se reintenta
+    con una conexión no bloqueante y espera exponencial entre intentos;
+    next_due() indica el próximo intento. La pérdida se ve en la interfaz
+    como cualquier otro corte del enlace (watchdog.py).
+    """
+
+    def __init__(self, host='127.0.0.1', port=14550):
+        super().__init__()
+        self.decoder = FrameDecoder()
+        self._address = (host, port)
+        self._sock = socket.create_connection(self._address)
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._timeout = None
+        self._got = 0
+        self._backoff = RECONNECT_MIN
+        self._retry_at = 0.0
+        self.disconnects = 0
+        # Vistas precalculadas del resto del buffer por cada posición de llenado
+        view = self.decoder.buffer.view
+        self._tails = [view[i:] for i in range(FRAME_SIZE)]
+
+    @property
+    def connected(self):
+        return self._sock is not None
+
+    def _disconnect(self):
+        """Cierra el socket caído y programa el próximo intento"""
+        self._sock.close()
+        self._sock = None
+        self._got = 0
+        self.disconnects += 1
+        self._retry_at = time.monotonic() + self._backoff
+        self._backoff = min(self._backoff * 2, RECONNECT_MAX)
+
+    def _reconnect(self):
+        """Inicia una conexión no bloqueante; se completa (o falla) en las lecturas"""
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.setblocking(False)
+        sock.connect_ex(self._address)
+        self._timeout = 0.0
+        self.decoder.last_seq = None  # el dron puede haber reiniciado la secuencia
+        self._sock = sock
+
+    def next_due(self):
+        """Próximo intento de reconexión (infinito mientras hay conexión)"""
+        return float('inf') if self._sock is not None else self._retry_at
+
+    def read_into(self, state, timeout=None):
+        if self._sock is None:
+            if time.monotonic() < self._retry_at:
+                return False
+            self._reconnect()
+        if timeout != self._timeout:
+            self._sock.settimeout(timeout)
+            self._timeout = timeout
+        raw = self.decoder.buffer.raw
+        need = COMMAND_SIZE if self._got < COMMAND_SIZE else FRAME_SIZE
+        while self._got < need:
+            try:
+                n = self._sock.recv_into(self._tails[self._got], need - self._got)
+            except (socket.timeout, BlockingIOError, InterruptedError):
+                return False
+            except OSError:
+                n = 0  # conexión rechazada o reiniciada
+            if n == 0:
+                self._disconnect()  # conexión cerrada por el dron
+                return False
+            self._got += n
+            self._backoff = RECONNECT_MIN
+            if self._got == COMMAND_SIZE:
+                if is_ack(raw, COMMAND_SIZE):
+                    self._got = 0
+                    self._receive_ack(raw)
+                    return False
+                need = FRAME_SIZE
+        self._got = 0
+        return self.decoder.decode_into(FRAME_SIZE, state)
+
+    def _send(self, payload):
+        sock = self._sock  # el hilo de ingesta puede reemplazarlo
+        if sock is None:
+            return
+        try:
+            sock.sendall(payload)
+        except OSError:
+            pass
+
+    def fileno(self):
+        """Socket para select() (hilo de ingesta compartido por la flota); -1 sin conexión"""
+        sock = self._sock
+        return sock.fileno() if sock is not None else -1
+
+    def close(self):
+        if self._sock is not None:
+            self._sock.close()
+
+
+# ===== BENCHMARK =====
+
+def _bench_decode(frames):
+    """Decodificación en memoria: frames/s sostenibles por el receptor"""
+    decoder = FrameDecoder()
+    state = new_frame()
+    source = new_frame()
+    source['battery'] = 87.0
+    raw = decoder.buffer.view
+    start = time.perf_counter()
+    for seq in range(1, frames + 1):
+        source['seq'] = seq
+        raw[:] = source.view  # simula la llegada del datagrama al buffer
+        decoder.decode_into(FRAME_SIZE, state)
+    elapsed = time.perf_counter() - start
+    assert decoder.decoded == frames
+    return frames / elapsed, elapsed / frames * 1e6
+
+
+def _bench_udp(duration):
+    """Flujo UDP por loopback sin límite de tasa: frames recibidos y decodificados por segundo"""
+    receiver = UdpTelemetrySource('127.0.0.1', 0)
+    port = receiver._sock.getsockname()[1]
+    stop = threading.Event()
+
+    def send():
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        frame = new_frame()
+        seq = 0
+        while not stop.is_set():
+            seq += 1
+            frame['seq'] = seq
+            sock.sendto(frame.view, ('127.0.0.1', port))
+        sock.close()
+
+    sender = threading.Thread(target=send, daemon=True)
+    state = new_frame()
+    sender.start()
+    end = time.monotonic() + duration
+    while time.monotonic() < end:
+        receiver.read_into(state, 0.1)
+    stop.set()
+    sender.join()
+    decoded = receiver.decoder.decoded
+    receiver.close()
+    return decoded / duration
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del protocolo de telemetría")
+    parser.add_argument('--bench', action='store_true', help="Medir la decodificación")
+    parser.add_argument('--frames', type=int, default=200000)
+    parser.add_argument('--duration', type=float, default=2.0, help="Segundos de prueba UDP")
+    args = parser.parse_args()
+    if not args.bench:
+        parser.print_help()
+        return
+
+    print(f"Frame de estado: {FRAME_SIZE} bytes, comando: {COMMAND_SIZE} bytes")
+    rate, per_frame = _bench_decode(args.frames)
+    print(f"✓ Decodificación en memoria: {rate:,.0f} frames/s ({per_frame:.2f} µs/frame)")
+    rate = _bench_udp(args.duration)
+    print(f"✓ UDP loopback (recepción + decodificación): {rate:,.0f} frames/s")
+
+
+if __name__ == "__main__":
+    main()